@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Parity check and benchmark for the class-airspace step of xc_airport_db.py.
+Runs the original row-by-row classification and the vectorized load_airspace
+on the same CLS_ARSP.csv and compares their output airport by airport.
+Exits non-zero when the two disagree. tests/test_airspace.py runs the same
+comparison on a fixed fixture.
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# xc_airport_db reads the database URL at import time; nothing here connects
+os.environ.setdefault("NEON_DATABASE_URL", "")
+
+from xc_airport_db import (  # noqa: E402
+    ZIP_BASE_URL,
+    NasrCsvSource,
+    download_to_cache,
+    get_current_nasr_effective_date,
+    load_airspace,
+)
+
+
+def determine_airspace(row) -> str:
+    if row["CLASS_B_AIRSPACE"] == "Y":
+        return "B"
+    if row["CLASS_C_AIRSPACE"] == "Y":
+        return "C"
+    if row["CLASS_D_AIRSPACE"] == "Y":
+        return "D"
+    if row["CLASS_E_AIRSPACE"] == "Y":
+        return "E"
+    return "G"
+
+
+def reference_load_airspace(source: NasrCsvSource) -> dict[str, dict]:
+    """load_airspace as it was before vectorization (groupby + iterrows)."""
+    df = source.read_csv("CLS_ARSP.csv", dtype=str)
+    df["REMARK"] = df["REMARK"].fillna("").str.strip()
+
+    airspace_info: dict[str, dict] = {}
+
+    for site_no, group in df.groupby("SITE_NO"):
+        highest = "G"
+        remark = ""
+
+        for _, row in group.iterrows():
+            classification = determine_airspace(row)
+
+            if classification == "B":
+                highest = "B"
+            elif classification == "C" and highest not in ["B"]:
+                highest = "C"
+            elif classification == "D" and highest not in ["B", "C"]:
+                highest = "D"
+            elif classification == "E" and highest not in ["B", "C", "D"]:
+                highest = "E"
+
+            remark = row.get("REMARK", remark)
+
+        airspace_info[str(site_no)] = {"airspace": highest, "remarks": remark}
+
+    return airspace_info
+
+
+def time_call(fn, iterations: int):
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return result, timings[len(timings) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare and time the original and vectorized airspace loaders.")
+    parser.add_argument(
+        "--zip",
+        help="NASR subscription ZIP (or a directory of NASR CSVs); defaults to downloading the current cycle",
+    )
+    parser.add_argument("--iterations", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.zip:
+        path = Path(args.zip)
+    else:
+        effective_date = get_current_nasr_effective_date()
+        print(f"Current NASR effective date: {effective_date}")
+        path = download_to_cache(ZIP_BASE_URL.format(effective_date))
+
+    with NasrCsvSource(path) as source:
+        expected, reference_s = time_call(lambda: reference_load_airspace(source), args.iterations)
+        actual, vectorized_s = time_call(lambda: load_airspace(source), args.iterations)
+
+    print(f"reference: {len(expected):,} airports, median {reference_s * 1000:.1f} ms")
+    print(f"vectorized: {len(actual):,} airports, median {vectorized_s * 1000:.1f} ms")
+    if vectorized_s > 0:
+        print(f"speedup: {reference_s / vectorized_s:.1f}x")
+
+    missing = sorted(expected.keys() - actual.keys())
+    extra = sorted(actual.keys() - expected.keys())
+    different = sorted(site_no for site_no in expected.keys() & actual.keys() if expected[site_no] != actual[site_no])
+
+    for label, site_nos in (("missing", missing), ("extra", extra), ("different", different)):
+        if site_nos:
+            print(f"{label}: {len(site_nos)} airports")
+            for site_no in site_nos[:10]:
+                print(f"  {site_no}: expected {expected.get(site_no)}, got {actual.get(site_no)}")
+
+    if missing or extra or different:
+        sys.exit(1)
+    print("parity: identical output")
+
+
+if __name__ == "__main__":
+    main()
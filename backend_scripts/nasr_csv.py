@@ -0,0 +1,204 @@
+"""
+Row-wise NASR CSV parsing: the part of the NASR load that runs inside the
+CSV_WORKERS process pool of xc_airport_db.py. Kept to pandas/numpy (and
+pyarrow when installed) so pool workers import no more than they need.
+"""
+
+import io
+import resource
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+# Columns read from each NASR CSV member and their parse dtypes; everything else is skipped.
+# Low-cardinality codes and Y/N flags are categoricals, coordinates and elevation are parsed as floats.
+NASR_CSV_COLUMNS = {
+    "APT_BASE.csv": {
+        "SITE_NO": "str",
+        "SITE_TYPE_CODE": "category",
+        "ARPT_ID": "str",
+        "ICAO_ID": "str",
+        "ARPT_NAME": "str",
+        "CITY": "str",
+        "STATE_NAME": "category",
+        "COUNTY_NAME": "str",
+        "COUNTRY_CODE": "category",
+        "LAT_DECIMAL": "float64",
+        "LONG_DECIMAL": "float64",
+        "ELEV": "float64",
+        "FUEL_TYPES": "str",
+    },
+    "APT_RWY.csv": {
+        "SITE_NO": "str",
+        "RWY_ID": "str",
+        "RWY_LEN": "str",
+        "RWY_WIDTH": "str",
+        "SURFACE_TYPE_CODE": "category",
+        "COND": "category",
+    },
+    "CLS_ARSP.csv": {
+        "SITE_NO": "str",
+        "CLASS_B_AIRSPACE": "category",
+        "CLASS_C_AIRSPACE": "category",
+        "CLASS_D_AIRSPACE": "category",
+        "CLASS_E_AIRSPACE": "category",
+        "REMARK": "str",
+    },
+}
+
+
+def read_nasr_csv(data: bytes, member_name: str) -> pd.DataFrame:
+    """
+    Parse a NASR CSV member with the column spec from NASR_CSV_COLUMNS.
+    - only the listed columns present in the header are read
+    - the multithreaded Arrow engine is used when pyarrow is installed
+    - if a typed column holds an unparsable value, the member is re-read as
+      plain strings and the prepare_* steps coerce it as before
+    """
+    header = pd.read_csv(io.BytesIO(data), nrows=0).columns
+    spec = {column: dtype for column, dtype in NASR_CSV_COLUMNS[member_name].items() if column in header}
+
+    if pyarrow is not None:
+        try:
+            return pd.read_csv(io.BytesIO(data), engine="pyarrow", usecols=list(spec), dtype=spec)
+        except (ValueError, pyarrow.ArrowInvalid) as e:
+            print(f"Typed parse of {member_name} failed ({e}); reading it as text")
+    return pd.read_csv(io.BytesIO(data), usecols=list(spec), dtype=str)
+
+
+def clean_text(series: pd.Series, upper: bool = False) -> pd.Series:
+    """Stripped (optionally upper-cased) text with missing values as ''; categoricals are cleaned per category."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = series.cat.categories.astype(str).str.strip()
+        if upper:
+            categories = categories.str.upper()
+        values = np.append(categories.to_numpy(dtype=object), "")[series.cat.codes.to_numpy()]
+        return pd.Series(values, index=series.index, dtype="str")
+
+    series = series.fillna("").astype(str).str.strip()
+    return series.str.upper() if upper else series
+
+
+def prepare_airport_base(df: pd.DataFrame) -> pd.DataFrame:
+    df = df[df["SITE_TYPE_CODE"].str.upper() == "A"].copy()
+
+    df["ICAO_ID"] = df["ICAO_ID"].fillna("").str.strip().str.upper()
+    df["ARPT_ID"] = df["ARPT_ID"].fillna("").str.strip().str.upper()
+    df["AirportCode"] = df["ICAO_ID"]
+    df.loc[df["AirportCode"] == "", "AirportCode"] = df["ARPT_ID"]
+
+    df["FUEL_TYPES"] = df["FUEL_TYPES"].fillna("").str.strip().str.upper()
+    df["LAT_DECIMAL"] = pd.to_numeric(df["LAT_DECIMAL"], errors="coerce")
+    df["LONG_DECIMAL"] = pd.to_numeric(df["LONG_DECIMAL"], errors="coerce")
+    df["ELEV"] = pd.to_numeric(df["ELEV"], errors="coerce")
+
+    df = df.dropna(subset=["AirportCode", "LAT_DECIMAL", "LONG_DECIMAL", "SITE_NO", "ELEV"])
+    return df
+
+
+def prepare_runways(df: pd.DataFrame) -> pd.DataFrame:
+    df = df[["SITE_NO", "RWY_ID", "RWY_LEN", "RWY_WIDTH", "SURFACE_TYPE_CODE", "COND"]].copy()
+    for column in ["RWY_ID", "RWY_LEN", "RWY_WIDTH"]:
+        df[column] = clean_text(df[column])
+    df["SURFACE_TYPE_CODE"] = clean_text(df["SURFACE_TYPE_CODE"], upper=True)
+    df["COND"] = clean_text(df["COND"], upper=True).replace("", "Unknown Condition")
+
+    # Skip helipads / water runways and runways without a usable length
+    keep = (
+        df["SITE_NO"].notna()
+        & (df["RWY_ID"] != "")
+        & ~df["RWY_ID"].str.contains("X", regex=False)
+        & ~df["RWY_ID"].str.contains("H", regex=False)
+        & (df["RWY_LEN"] != "")
+        & (df["RWY_LEN"] != "0")
+    )
+    df = df[keep].reset_index(drop=True)
+    df["SITE_NO"] = df["SITE_NO"].astype(str)
+    return df
+
+
+def prepare_airspace(df: pd.DataFrame) -> pd.DataFrame:
+    df = df[df["SITE_NO"].notna()]
+
+    # Ordinal rank per row (G=0 ... B=4); the highest flagged class wins
+    rank = np.select(
+        [df[f"CLASS_{airspace_class}_AIRSPACE"] == "Y" for airspace_class in ("B", "C", "D", "E")],
+        [4, 3, 2, 1],
+        default=0,
+    )
+
+    return pd.DataFrame(
+        {
+            "SITE_NO": df["SITE_NO"].astype(str),
+            "rank": rank,
+            "remark": clean_text(df["REMARK"]),
+        }
+    )
+
+
+# member -> row-wise step run inside the worker processes
+CSV_PREPARERS = {
+    "APT_BASE.csv": prepare_airport_base,
+    "APT_RWY.csv": prepare_runways,
+    "CLS_ARSP.csv": prepare_airspace,
+}
+
+
+def split_csv_bytes(data: bytes, parts: int) -> list[bytes]:
+    """
+    Split CSV bytes into up to `parts` line-aligned chunks, each led by the header row.
+    Cut points only land on newlines outside quoted fields, so multi-line REMARK
+    values stay in one piece.
+    """
+    header_end = data.find(b"\n") + 1
+    if header_end == 0 or parts <= 1:
+        return [data]
+
+    header = data[:header_end]
+    chunk_size = max(1, (len(data) - header_end) // parts)
+    cuts = [header_end]
+    quotes = 0
+    scanned = header_end
+
+    for _ in range(parts - 1):
+        pos = max(cuts[-1], cuts[0] + chunk_size * len(cuts)) - 1
+        while True:
+            pos = data.find(b"\n", pos + 1)
+            if pos == -1:
+                break
+            quotes += data.count(b'"', scanned, pos)
+            scanned = pos
+            if quotes % 2 == 0:
+                break
+        if pos == -1 or pos + 1 >= len(data):
+            break
+        cuts.append(pos + 1)
+
+    cuts.append(len(data))
+    return [
+        data[:end] if start == header_end else header + data[start:end]
+        for start, end in zip(cuts, cuts[1:])
+        if end > start
+    ]
+
+
+def prepare_csv_chunk(member_name: str, chunk: bytes) -> pd.DataFrame:
+    return CSV_PREPARERS[member_name](read_nasr_csv(chunk, member_name))
+
+
+def prepare_csv_chunk_with_usage(member_name: str, chunk: bytes) -> tuple[pd.DataFrame, float, float]:
+    """
+    prepare_csv_chunk plus the worker's own resource usage: the CPU seconds this
+    chunk took and the worker's running peak RSS in MB. Pool workers are not
+    reaped by the parent (forkserver forks them), so RUSAGE_CHILDREN never sees them.
+    """
+    cpu_start = time.process_time()
+    frame = prepare_csv_chunk(member_name, chunk)
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return frame, time.process_time() - cpu_start, peak_rss_mb
@@ -3,6 +3,7 @@ import argparse
 import csv
 import json
 import os
+import time
 from pathlib import Path
 
 import psycopg
@@ -26,6 +27,65 @@ def load_json(json_path: Path):
         return json.load(f)
 
 
+def iter_json_records(json_path: Path, chunk_size: int = 1 << 20):
+    """
+    Yield (airport_code, record) pairs from the top-level JSON object one at a time.
+    Only the current chunk of text plus one record is held in memory.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    eof = False
+
+    with json_path.open("r", encoding="utf-8") as f:
+
+        def fill():
+            nonlocal buf, pos, eof
+            chunk = f.read(chunk_size)
+            buf = buf[pos:] + chunk
+            pos = 0
+            eof = not chunk
+
+        def skip(chars):
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in chars:
+                    pos += 1
+                if pos < len(buf) or eof:
+                    return
+                fill()
+
+        def decode():
+            nonlocal pos
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    # Value runs past the buffered text; read more unless we're at EOF
+                    if eof:
+                        raise
+                    fill()
+                    continue
+                pos = end
+                return value
+
+        fill()
+        skip(" \t\r\n")
+        if buf[pos:pos + 1] != "{":
+            raise ValueError(f"{json_path} does not contain a JSON object")
+        pos += 1
+
+        while True:
+            skip(" \t\r\n,")
+            if pos >= len(buf):
+                raise ValueError(f"Unexpected end of {json_path}")
+            if buf[pos] == "}":
+                return
+            airport_code = decode()
+            skip(" \t\r\n:")
+            yield airport_code, decode()
+
+
 def ensure_schema(cur):
     schema_sql = (Path(__file__).with_name("schema_v2.sql")).read_text(encoding="utf-8")
     cur.execute(schema_sql)
@@ -134,6 +194,203 @@ def refresh_children(cur, records):
         )
 
 
+def copy_rows(cur, sql, rows):
+    with cur.copy(sql) as copy:
+        for row in rows:
+            copy.write_row(row)
+
+
+def import_batch(cur, batch):
+    """
+    Load one bounded batch of airports with COPY:
+    airports go through a temp stage so the upsert keeps ON CONFLICT semantics,
+    children are replaced per airport and streamed straight into their tables.
+    Returns (runway_count, approach_count).
+    """
+    cur.execute("TRUNCATE airports_v2_import_stage")
+    copy_rows(
+        cur,
+        """
+        COPY airports_v2_import_stage (
+            airport_code, site_no, airport_name, city, state, country,
+            lat, lon, elevation, airspace_class, fuel_raw, remarks, raw_json
+        ) FROM STDIN
+        """,
+        (
+            (
+                airport_code,
+                rec.get("site_no"),
+                rec.get("airport_name"),
+                rec.get("city"),
+                rec.get("state"),
+                rec.get("country") or "US",
+                rec.get("lat"),
+                rec.get("lon"),
+                rec.get("elevation"),
+                rec.get("airspace"),
+                rec.get("fuel"),
+                rec.get("remarks"),
+                json.dumps(rec, ensure_ascii=False),
+            )
+            for airport_code, rec in batch
+        ),
+    )
+
+    cur.execute("""
+        INSERT INTO airports_v2 (
+            airport_code, site_no, airport_name, city, state, country,
+            lat, lon, elevation, airspace_class, fuel_raw, remarks, raw_json
+        )
+        SELECT
+            airport_code, site_no, airport_name, city, state, country,
+            lat, lon, elevation, airspace_class, fuel_raw, remarks, raw_json
+        FROM airports_v2_import_stage
+        ON CONFLICT (airport_code) DO UPDATE SET
+            site_no = EXCLUDED.site_no,
+            airport_name = EXCLUDED.airport_name,
+            city = EXCLUDED.city,
+            state = EXCLUDED.state,
+            country = EXCLUDED.country,
+            lat = EXCLUDED.lat,
+            lon = EXCLUDED.lon,
+            elevation = EXCLUDED.elevation,
+            airspace_class = EXCLUDED.airspace_class,
+            fuel_raw = EXCLUDED.fuel_raw,
+            remarks = EXCLUDED.remarks,
+            raw_json = EXCLUDED.raw_json
+    """)
+    cur.execute("""
+        DELETE FROM airport_runways_v2 r
+        USING airports_v2_import_stage s
+        WHERE r.airport_code = s.airport_code
+    """)
+    cur.execute("""
+        DELETE FROM airport_approaches_v2 ap
+        USING airports_v2_import_stage s
+        WHERE ap.airport_code = s.airport_code
+    """)
+
+    runway_rows = [
+        (
+            airport_code,
+            rw.get("rwy_id"),
+            to_int_or_none(rw.get("length")),
+            to_int_or_none(rw.get("width")),
+            rw.get("surface"),
+            rw.get("condition"),
+        )
+        for airport_code, rec in batch
+        for rw in rec.get("runways", []) or []
+    ]
+    copy_rows(
+        cur,
+        "COPY airport_runways_v2 (airport_code, rwy_id, length_ft, width_ft, surface, condition) FROM STDIN",
+        runway_rows,
+    )
+
+    approach_rows = [
+        (
+            airport_code,
+            ap.get("name"),
+            ap.get("pdf_url"),
+            ap.get("procuid"),
+            ap.get("amdt_num"),
+            ap.get("amdt_date"),
+        )
+        for airport_code, rec in batch
+        for ap in rec.get("approaches", []) or []
+    ]
+    copy_rows(
+        cur,
+        "COPY airport_approaches_v2 (airport_code, approach_name, pdf_url, procuid, amdt_num, amdt_date) FROM STDIN",
+        approach_rows,
+    )
+
+    return len(runway_rows), len(approach_rows)
+
+
+def stream_import(cur, json_path: Path, batch_size: int):
+    """
+    Streaming import: parse the JSON airport by airport and COPY it in
+    batches of batch_size airports, so memory stays flat regardless of file size.
+    Returns the number of airports imported.
+    """
+    cur.execute("""
+        CREATE TEMP TABLE airports_v2_import_stage ON COMMIT DROP AS
+        SELECT airport_code, site_no, airport_name, city, state, country,
+               lat, lon, elevation, airspace_class, fuel_raw, remarks, raw_json
+        FROM airports_v2
+        WITH NO DATA
+    """)
+
+    started = time.monotonic()
+    airports = runways = approaches = 0
+    batch = []
+
+    def flush():
+        nonlocal airports, runways, approaches
+        runway_count, approach_count = import_batch(cur, batch)
+        airports += len(batch)
+        runways += runway_count
+        approaches += approach_count
+        batch.clear()
+
+        elapsed = time.monotonic() - started
+        rows = airports + runways + approaches
+        print(
+            f"  {airports:,} airports, {runways:,} runways, {approaches:,} approaches "
+            f"({rows / elapsed if elapsed else 0:,.0f} rows/s)",
+            flush=True,
+        )
+
+    for item in iter_json_records(json_path):
+        batch.append(item)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    return airports
+
+
+def refresh_airport_summaries(cur):
+    cur.execute("""
+        WITH runway_summary AS (
+            SELECT
+                airport_code,
+                max(CASE WHEN split_part(upper(coalesce(surface, '')), '-', 1) = 'ASPH' THEN coalesce(length_ft, 0) ELSE 0 END) AS max_asph,
+                max(CASE WHEN split_part(upper(coalesce(surface, '')), '-', 1) = 'CONC' THEN coalesce(length_ft, 0) ELSE 0 END) AS max_conc,
+                max(CASE WHEN split_part(upper(coalesce(surface, '')), '-', 1) = 'TURF' THEN coalesce(length_ft, 0) ELSE 0 END) AS max_turf,
+                max(CASE WHEN split_part(upper(coalesce(surface, '')), '-', 1) NOT IN ('ASPH', 'CONC', 'TURF') THEN coalesce(length_ft, 0) ELSE 0 END) AS max_other
+            FROM airport_runways_v2
+            GROUP BY airport_code
+        ),
+        approach_summary AS (
+            SELECT
+                airport_code,
+                count(*)::int AS approach_count,
+                bool_or(upper(approach_name) LIKE '%RNAV%') AS has_rnav,
+                bool_or(upper(approach_name) LIKE '%ILS%' OR upper(approach_name) LIKE '%LOC%') AS has_ilsloc,
+                bool_or(upper(approach_name) LIKE '%VOR%' OR upper(approach_name) LIKE '%NDB%') AS has_vorndb
+            FROM airport_approaches_v2
+            GROUP BY airport_code
+        )
+        UPDATE airports_v2 a
+        SET max_asph = coalesce(rs.max_asph, 0),
+            max_conc = coalesce(rs.max_conc, 0),
+            max_turf = coalesce(rs.max_turf, 0),
+            max_other = coalesce(rs.max_other, 0),
+            approach_count = coalesce(ap.approach_count, 0),
+            has_rnav = coalesce(ap.has_rnav, false),
+            has_ilsloc = coalesce(ap.has_ilsloc, false),
+            has_vorndb = coalesce(ap.has_vorndb, false)
+        FROM airports_v2 base
+        LEFT JOIN runway_summary rs ON rs.airport_code = base.airport_code
+        LEFT JOIN approach_summary ap ON ap.airport_code = base.airport_code
+        WHERE a.airport_code = base.airport_code
+    """)
+
+
 def backfill_scrape_status_from_legacy(cur):
     cur.execute("""
         INSERT INTO airport_scrape_status_v2 (
@@ -168,6 +425,8 @@ def main():
     parser.add_argument("--json", default=str(Path(__file__).with_name("airport_base_info_with_runways_airspace_approaches.json")))
     parser.add_argument("--database-url", default=os.getenv("NEON_DATABASE_URL"))
     parser.add_argument("--skip-status-backfill", action="store_true")
+    parser.add_argument("--stream", action="store_true", help="Parse the JSON incrementally and COPY it in bounded batches")
+    parser.add_argument("--batch-size", type=int, default=2000, help="Airports per COPY batch in --stream mode")
     args = parser.parse_args()
 
     if not args.database_url:
@@ -177,19 +436,24 @@ def main():
     if not json_path.exists():
         raise SystemExit(f"JSON file not found: {json_path}")
 
-    records = load_json(json_path)
+    records = None if args.stream else load_json(json_path)
 
     with psycopg.connect(args.database_url) as conn:
         with conn.cursor() as cur:
             ensure_schema(cur)
-            upsert_airports(cur, records)
-            refresh_children(cur, records)
+            if args.stream:
+                airport_count = stream_import(cur, json_path, args.batch_size)
+            else:
+                upsert_airports(cur, records)
+                refresh_children(cur, records)
+                airport_count = len(records)
+            refresh_airport_summaries(cur)
             if not args.skip_status_backfill:
                 backfill_scrape_status_from_legacy(cur)
         conn.commit()
 
-    print(f"Imported {len(records):,} airports into airports_v2.")
-    print("Refreshed airport_runways_v2 and airport_approaches_v2.")
+    print(f"Imported {airport_count:,} airports into airports_v2.")
+    print("Refreshed airport_runways_v2, airport_approaches_v2 and airports_v2 summaries.")
     if not args.skip_status_backfill:
         print("Attempted airport_scrape_status_v2 backfill from legacy airports table.")
 
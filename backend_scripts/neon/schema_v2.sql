@@ -13,9 +13,33 @@ CREATE TABLE IF NOT EXISTS airports_v2 (
     airspace_class text,
     fuel_raw text,
     remarks text,
-    raw_json jsonb
+    raw_json jsonb,
+    max_asph integer NOT NULL DEFAULT 0,
+    max_conc integer NOT NULL DEFAULT 0,
+    max_turf integer NOT NULL DEFAULT 0,
+    max_other integer NOT NULL DEFAULT 0,
+    approach_count integer NOT NULL DEFAULT 0,
+    has_rnav boolean NOT NULL DEFAULT false,
+    has_ilsloc boolean NOT NULL DEFAULT false,
+    has_vorndb boolean NOT NULL DEFAULT false,
+    fingerprint text,
+    runways_hash text,
+    approaches_hash text
 );
 
+ALTER TABLE airports_v2
+    ADD COLUMN IF NOT EXISTS max_asph integer NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS max_conc integer NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS max_turf integer NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS max_other integer NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS approach_count integer NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS has_rnav boolean NOT NULL DEFAULT false,
+    ADD COLUMN IF NOT EXISTS has_ilsloc boolean NOT NULL DEFAULT false,
+    ADD COLUMN IF NOT EXISTS has_vorndb boolean NOT NULL DEFAULT false,
+    ADD COLUMN IF NOT EXISTS fingerprint text,
+    ADD COLUMN IF NOT EXISTS runways_hash text,
+    ADD COLUMN IF NOT EXISTS approaches_hash text;
+
 CREATE INDEX IF NOT EXISTS idx_airports_v2_state
     ON airports_v2 (state);
 
@@ -60,6 +84,7 @@ CREATE TABLE IF NOT EXISTS airport_approaches_v2 (
     airport_code text NOT NULL,
     approach_name text NOT NULL,
     pdf_url text,
+    pdf_name text,
     procuid text,
     amdt_num text,
     amdt_date text,
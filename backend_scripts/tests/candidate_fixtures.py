@@ -0,0 +1,197 @@
+"""
+Small fixed airport set and brute-force ports of the src/utils/filtering.js
+searches, shared by the candidate and triangle tests.
+"""
+
+import math
+
+import numpy as np
+
+from xc_candidates import CandidateFilters
+
+APPROACH_NAMES = ("RNAV (GPS) RWY 09", "ILS OR LOC RWY 27", "VOR-A", "NDB RWY 18")
+
+
+def airport(lat, lon, airspace="D", fuel="100LL", elevation=800, runway_summary=None, approaches=("RNAV (GPS) RWY 09",)):
+    return {
+        "lat": lat,
+        "lon": lon,
+        "elevation": elevation,
+        "airspace": airspace,
+        "fuel": fuel,
+        "airport_name": "",
+        "city": "",
+        "state": "unknown",
+        "runway_summary": runway_summary or {"ASPH": 5000, "CONC": 0, "TURF": 0, "OTHER": 0},
+        "approaches": [{"name": name} for name in approaches],
+    }
+
+
+def _build_airport_data() -> dict[str, dict]:
+    rng = np.random.default_rng(20261029)
+    data = {"KHOM": airport(40.0, -83.0)}
+
+    # Mixed attributes around KHOM, far enough out for 200 nm triangles
+    for i in range(80):
+        approaches = [name for name in APPROACH_NAMES if rng.random() < 0.3]
+        data[f"K{i:03d}"] = airport(
+            round(float(rng.uniform(36.5, 43.5)), 4),
+            round(float(rng.uniform(-87.5, -78.5)), 4),
+            airspace=str(rng.choice(list("BCDEG"))),
+            fuel="None" if rng.random() < 0.2 else "100LL",
+            elevation=int(rng.integers(0, 8000)),
+            runway_summary={
+                "ASPH": int(rng.choice([0, 2500, 3000, 5000])),
+                "CONC": int(rng.choice([0, 0, 4000])),
+                "TURF": int(rng.choice([0, 2000, 3500])),
+                "OTHER": 0,
+            },
+            approaches=approaches,
+        )
+
+    # Across the antimeridian: the index sorts by latitude only, so neighbors on the
+    # other side of +/-180 must still be found
+    data["PDLA"] = airport(52.0, 179.6)
+    data["PDLB"] = airport(52.4, -179.3)
+    data["PDLC"] = airport(51.3, 178.9)
+    data["PDLD"] = airport(52.1, -178.2)
+    data["PDLE"] = airport(53.2, 179.9)
+
+    # Near the pole: latitude bands run past +90 and neighbors sit at any longitude
+    data["NPOA"] = airport(89.6, 0.0)
+    data["NPOB"] = airport(89.3, 180.0)
+    data["NPOC"] = airport(88.8, 90.0)
+    data["NPOD"] = airport(89.9, -45.0)
+    data["NPOE"] = airport(88.4, -120.0)
+    data["NPOF"] = airport(88.0, 10.0)
+    return data
+
+
+AIRPORT_DATA = _build_airport_data()
+HOMES = ("KHOM", "PDLA", "NPOA")
+
+PERMISSIVE = CandidateFilters(
+    airspaces=("B", "C", "D", "E", "G"),
+    max_airport_elev=10000,
+    must_have_fuel=False,
+    surfaces=("ASPH", "CONC", "TURF", "OTHER"),
+    min_runway_length=0,
+    approaches=(),
+)
+
+
+def js_haversine(lat1, lon1, lat2, lon2):
+    """haversine from src/utils/geo.js."""
+    to_rad = math.pi / 180
+    d_lat = (lat2 - lat1) * to_rad
+    d_lon = (lon2 - lon1) * to_rad
+    a = math.sin(d_lat / 2) ** 2 + math.cos(lat1 * to_rad) * math.cos(lat2 * to_rad) * math.sin(d_lon / 2) ** 2
+    return 3440.065 * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+def matches_filters(rec: dict, filters: CandidateFilters) -> bool:
+    """airportMatchesFilters."""
+    if rec["airspace"] not in filters.airspaces:
+        return False
+    if rec["elevation"] > filters.max_airport_elev:
+        return False
+    if filters.must_have_fuel and rec["fuel"] == "None":
+        return False
+    if not any(rec["runway_summary"].get(s, 0) >= filters.min_runway_length for s in filters.surfaces):
+        return False
+    if filters.approaches:
+        names = [ap["name"].upper() for ap in rec["approaches"]]
+        has = {
+            "RNAV": any("RNAV" in n for n in names),
+            "ILS/LOC": any("ILS" in n or "LOC" in n for n in names),
+            "VOR/NDB": any("VOR" in n or "NDB" in n for n in names),
+        }
+        if not any(has.get(a, False) for a in filters.approaches) and not (
+            not names and "None" in filters.approaches
+        ):
+            return False
+    return True
+
+
+def _distance(a: dict, b: dict) -> float:
+    return js_haversine(a["lat"], a["lon"], b["lat"], b["lon"])
+
+
+def _sorted(results: list[tuple[str, float]], sort_by: str) -> list[tuple[str, float]]:
+    if sort_by == "alphabetical":
+        return sorted(results, key=lambda r: r[0])
+    return sorted(results, key=lambda r: r[1])
+
+
+def first_leg(data, home_code, filters):
+    """findFirstLegDestinations as (code, distance) pairs."""
+    home = data[home_code]
+    results = []
+    for code, rec in data.items():
+        if code == home_code or not matches_filters(rec, filters):
+            continue
+        distance = _distance(home, rec)
+        if distance < filters.first_leg_min or distance > filters.first_leg_max:
+            continue
+        if filters.trip_type == "two" and distance * 2 > filters.total_leg_max:
+            continue
+        results.append((code, distance))
+    return _sorted(results, filters.sort_by)
+
+
+def filtered_in_range(data, home_code, filters):
+    """findFilteredInRangeFirstLegDestinations as (code, distance) pairs."""
+    home = data[home_code]
+    results = []
+    for code, rec in data.items():
+        if code == home_code:
+            continue
+        distance = _distance(home, rec)
+        if distance < filters.first_leg_min or distance > filters.first_leg_max:
+            continue
+        if filters.trip_type == "two" and distance * 2 > filters.total_leg_max:
+            continue
+        if matches_filters(rec, filters):
+            continue
+        results.append((code, distance))
+    return _sorted(results, filters.sort_by)
+
+
+def nearby_outer(data, home_code, filters, outer_buffer_nm=100):
+    """findNearbyOuterFirstLegDestinations as (code, distance) pairs."""
+    home = data[home_code]
+    results = []
+    for code, rec in data.items():
+        if code == home_code or not matches_filters(rec, filters):
+            continue
+        distance = _distance(home, rec)
+        if distance <= filters.first_leg_max or distance > filters.first_leg_max + outer_buffer_nm:
+            continue
+        results.append((code, distance))
+    return _sorted(results, filters.sort_by)
+
+
+def second_leg(data, home_code, first_code, filters):
+    """findSecondLegDestinations as (code, leg2, leg3, total) tuples, unsorted."""
+    home, first = data[home_code], data[first_code]
+    base_to_first = _distance(home, first)
+    results = []
+    for code, rec in data.items():
+        if code in (home_code, first_code) or not matches_filters(rec, filters):
+            continue
+        leg2 = _distance(first, rec)
+        leg3 = _distance(rec, home)
+        total = base_to_first + leg2 + leg3
+        if total < filters.total_leg_min or total > filters.total_leg_max:
+            continue
+        results.append((code, leg2, leg3, total))
+    return results
+
+
+def triangles(data, home_code, filters):
+    """Every (first, second) -> total over the first-leg candidates, by brute force."""
+    trips = {}
+    for first_code, _ in first_leg(data, home_code, CandidateFilters(**{**vars(filters), "trip_type": "one"})):
+        for second_code, _, _, total in second_leg(data, home_code, first_code, filters):
+            trips[(first_code, second_code)] = total
+    return trips
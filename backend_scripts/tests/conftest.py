@@ -0,0 +1,22 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# The scripts import each other as top-level modules and read the database URL at import time;
+# nothing under tests/ opens a connection
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("NEON_DATABASE_URL", "postgresql://localhost/xc_planner_test")
+
+
+@pytest.fixture(params=["pyarrow", "pandas"])
+def csv_engine(request, monkeypatch):
+    """Run a test on both NASR CSV read paths: the typed Arrow parse and plain pandas."""
+    import nasr_csv
+
+    if request.param == "pandas":
+        monkeypatch.setattr(nasr_csv, "pyarrow", None)
+    elif nasr_csv.pyarrow is None:
+        pytest.skip("pyarrow is not installed")
+    return request.param
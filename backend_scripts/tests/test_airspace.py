@@ -0,0 +1,54 @@
+import pytest
+
+import nasr_csv
+from bench_airspace import reference_load_airspace
+from xc_airport_db import NasrCsvSource, load_airspace
+
+CLS_ARSP_CSV = """\
+SITE_NO,CLASS_B_AIRSPACE,CLASS_C_AIRSPACE,CLASS_D_AIRSPACE,CLASS_E_AIRSPACE,AIRSPACE_HRS,REMARK
+100.1,Y,N,N,Y,,Class B core
+100.1,N,N,N,Y,,
+200.2,N,Y,N,N,,  Class C  
+200.2,N,N,Y,N,,later remark
+300.3,N,N,Y,N,0600-2200,"Tower hours,
+see A/FD"
+400.4,N,N,N,Y,,
+500.5,N,N,N,N,,Class G
+600.6,,,,,,
+700.7,N,N,Y,N,,first
+700.7,Y,N,N,N,,
+,Y,N,N,N,,no site
+800.8,y, Y,N,N,,not flagged
+"""
+
+EXPECTED = {
+    "100.1": {"airspace": "B", "remarks": ""},
+    "200.2": {"airspace": "C", "remarks": "later remark"},
+    "300.3": {"airspace": "D", "remarks": "Tower hours,\nsee A/FD"},
+    "400.4": {"airspace": "E", "remarks": ""},
+    "500.5": {"airspace": "G", "remarks": "Class G"},
+    "600.6": {"airspace": "G", "remarks": ""},
+    "700.7": {"airspace": "B", "remarks": ""},
+    "800.8": {"airspace": "G", "remarks": "not flagged"},
+}
+
+
+@pytest.fixture
+def nasr_dir(tmp_path):
+    (tmp_path / "CLS_ARSP.csv").write_text(CLS_ARSP_CSV)
+    return tmp_path
+
+
+@pytest.mark.parametrize("use_pyarrow", [True, False])
+def test_load_airspace_matches_baseline(nasr_dir, monkeypatch, use_pyarrow):
+    if not use_pyarrow:
+        monkeypatch.setattr(nasr_csv, "pyarrow", None)
+    elif nasr_csv.pyarrow is None:
+        pytest.skip("pyarrow is not installed")
+
+    with NasrCsvSource(nasr_dir) as source:
+        expected = reference_load_airspace(source)
+        actual = load_airspace(source)
+
+    assert expected == EXPECTED
+    assert actual == expected
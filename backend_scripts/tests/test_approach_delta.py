@@ -0,0 +1,51 @@
+from xc_airport_db import diff_approach_procedures
+
+
+def row(airport_code, name, procuid, amdt_num="1", amdt_date="01/01/2026", pdf_name=None):
+    return (airport_code, name, pdf_name or f"{procuid or name}.PDF", procuid, amdt_num, amdt_date)
+
+
+def test_diff_approach_procedures():
+    stored = [
+        row("KAAA", "ILS RWY 04", "100"),
+        row("KAAA", "RNAV (GPS) RWY 22", "101"),
+        row("KAAA", "VOR RWY 22", "102"),
+        row("KBBB", "RNAV (GPS) RWY 18", "200", amdt_num="2"),
+        row("KBBB", "LOC RWY 36", ""),
+    ]
+    incoming = [
+        row("KAAA", "ILS RWY 04", "100"),
+        # Same procedure, new amendment
+        row("KAAA", "RNAV (GPS) RWY 22", "101", amdt_num="2", amdt_date="02/19/2026"),
+        # Renamed without a new amendment still has to be rewritten
+        row("KBBB", "RNAV (GPS) Y RWY 18", "200", amdt_num="2"),
+        row("KBBB", "LOC RWY 36", ""),
+        row("KCCC", "NDB RWY 09", "300"),
+    ]
+
+    changes, delete_keys, write_rows = diff_approach_procedures(stored, incoming)
+
+    assert changes == {
+        "added": [("KCCC", "300")],
+        "amended": [("KAAA", "101"), ("KBBB", "200")],
+        "removed": [("KAAA", "102")],
+    }
+    assert delete_keys == [("KAAA", "101"), ("KBBB", "200"), ("KAAA", "102")]
+    assert write_rows == [incoming[4], incoming[1], incoming[2]]
+
+
+def test_diff_approach_procedures_unchanged_and_shared_procuid():
+    # Continuation charts can share a procuid; they are diffed as one procedure
+    stored = [
+        row("KAAA", "ILS RWY 04", "100", pdf_name="A.PDF"),
+        row("KAAA", "ILS RWY 04 (CONT.)", "100", pdf_name="B.PDF"),
+    ]
+    changes, delete_keys, write_rows = diff_approach_procedures(stored, list(reversed(stored)))
+    assert changes == {"added": [], "amended": [], "removed": []}
+    assert delete_keys == [] and write_rows == []
+
+    incoming = [stored[0]]
+    changes, delete_keys, write_rows = diff_approach_procedures(stored, incoming)
+    assert changes["amended"] == [("KAAA", "100")]
+    assert delete_keys == [("KAAA", "100")]
+    assert write_rows == incoming
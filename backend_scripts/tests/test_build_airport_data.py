@@ -0,0 +1,78 @@
+from xc_airport_db import NasrCsvSource, build_airport_data, load_airport_base
+
+APT_BASE_CSV = """\
+SITE_NO,SITE_TYPE_CODE,ARPT_ID,ICAO_ID,ARPT_NAME,CITY,STATE_CODE,STATE_NAME,COUNTY_NAME,COUNTRY_CODE,LAT_DECIMAL,LONG_DECIMAL,ELEV,FUEL_TYPES
+1.1,A, abc ,kabc,Alpha Field,Springfield,VA,VIRGINIA,FAIRFAX,US,38.5,-77.25,312.4, 100ll 
+2.2,A,DEF,,,,,,,,39.0,-76.5,50,
+3.3,H,HEL,,Heliport,Town,MD,MARYLAND,X,US,39.1,-76.6,10,
+4.4,A,NOE,,No Elev,Town,MD,MARYLAND,X,US,39.2,-76.7,,
+5.5,A,GHI,KGHI,Gamma,Anytown,,,LINCOLN,US,40.0,-95.0,1100,A
+6.6,A,DUP,KGHI,Gamma Dup,Anytown,,,LINCOLN,US,40.1,-95.1,1200,A
+"""
+
+RUNWAYS = {"1.1": [{"rwy_id": "09/27", "length": "5000", "width": "100", "surface": "ASPH", "condition": "GOOD"}]}
+RUNWAY_SUMMARY = {"1.1": {"ASPH": 5000, "CONC": 0, "TURF": 0, "OTHER": 0}}
+AIRSPACE = {"1.1": {"airspace": "D", "remarks": "Tower"}}
+APPROACHES = {"KABC": [{"name": "ILS RWY 09"}]}
+NO_RUNWAYS = {"ASPH": 0, "CONC": 0, "TURF": 0, "OTHER": 0}
+
+
+def test_build_airport_data(tmp_path, csv_engine):
+    (tmp_path / "APT_BASE.csv").write_text(APT_BASE_CSV)
+    with NasrCsvSource(tmp_path) as source:
+        df_base = load_airport_base(source)
+    airport_data = build_airport_data(df_base, RUNWAYS, RUNWAY_SUMMARY, AIRSPACE, APPROACHES)
+
+    # The heliport and the airport without an elevation are dropped; blank text is ""
+    # (never "nan"), a blank state falls back to the county, then to "unknown"
+    assert airport_data == {
+        "KABC": {
+            "site_no": "1.1",
+            "lat": 38.5,
+            "lon": -77.25,
+            "elevation": 312.4,
+            "city": "Springfield",
+            "state": "VIRGINIA",
+            "country": "US",
+            "airport_name": "Alpha Field",
+            "runways": RUNWAYS["1.1"],
+            "runway_summary": RUNWAY_SUMMARY["1.1"],
+            "airspace": "D",
+            "fuel": "100LL",
+            "remarks": "Tower",
+            "approaches": APPROACHES["KABC"],
+        },
+        "DEF": {
+            "site_no": "2.2",
+            "lat": 39.0,
+            "lon": -76.5,
+            "elevation": 50.0,
+            "city": "",
+            "state": "unknown",
+            "country": "",
+            "airport_name": "",
+            "runways": [],
+            "runway_summary": NO_RUNWAYS,
+            "airspace": "G",
+            "fuel": "None",
+            "remarks": "",
+            "approaches": [],
+        },
+        # A later duplicate of an airport code replaces the earlier one
+        "KGHI": {
+            "site_no": "6.6",
+            "lat": 40.1,
+            "lon": -95.1,
+            "elevation": 1200.0,
+            "city": "Anytown",
+            "state": "LINCOLN",
+            "country": "US",
+            "airport_name": "Gamma Dup",
+            "runways": [],
+            "runway_summary": NO_RUNWAYS,
+            "airspace": "G",
+            "fuel": "A",
+            "remarks": "",
+            "approaches": [],
+        },
+    }
@@ -0,0 +1,90 @@
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from candidate_fixtures import AIRPORT_DATA, HOMES, PERMISSIVE, filtered_in_range, first_leg, nearby_outer
+from xc_candidates import AirportIndex, CandidateFilters, haversine_nm
+
+FILTERS = {
+    "default": CandidateFilters(),
+    "permissive": PERMISSIVE,
+    "wide": replace(PERMISSIVE, first_leg_min=0, first_leg_max=150, total_leg_max=300),
+    "two_leg": replace(CandidateFilters(), trip_type="two", total_leg_max=150),
+    "no_approach": replace(CandidateFilters(), approaches=("None", "VOR/NDB"), must_have_fuel=False),
+    "alphabetical": replace(PERMISSIVE, sort_by="alphabetical"),
+}
+
+
+@pytest.fixture(scope="module")
+def index():
+    return AirportIndex.from_airport_data(AIRPORT_DATA)
+
+
+def assert_same(results, expected):
+    assert [r["code"] for r in results] == [code for code, _ in expected]
+    assert [r["distance"] for r in results] == pytest.approx([d for _, d in expected], rel=1e-9)
+
+
+@pytest.mark.parametrize("filters", FILTERS.values(), ids=FILTERS.keys())
+@pytest.mark.parametrize("home", HOMES)
+def test_ring_queries_match_brute_force(index, home, filters):
+    assert_same(index.first_leg_candidates(home, filters), first_leg(AIRPORT_DATA, home, filters))
+    assert_same(index.filtered_in_range_candidates(home, filters), filtered_in_range(AIRPORT_DATA, home, filters))
+    assert_same(index.nearby_outer_candidates(home, filters), nearby_outer(AIRPORT_DATA, home, filters))
+
+
+def test_unknown_home_returns_nothing(index):
+    assert index.first_leg_candidates("XXXX", PERMISSIVE) == []
+    assert index.nearby_outer_candidates("XXXX", PERMISSIVE) == []
+
+
+def test_ring_crosses_the_antimeridian(index):
+    positions, _ = index.ring("PDLA", 0, 150)
+    assert {"PDLB", "PDLD"} <= set(index.codes[positions])
+
+
+def test_band_is_clamped_at_the_poles(index):
+    # A band reaching past +/-90 degrees simply runs to the end (or start) of the index
+    assert index.band(89.6, 300).stop == len(index)
+    assert index.band(-89.6, 300).start == 0
+
+    positions, _ = index.ring("NPOA", 0, 150)
+    expected = {
+        code
+        for code, rec in AIRPORT_DATA.items()
+        if code != "NPOA" and haversine_nm(89.6, 0.0, rec["lat"], rec["lon"]) <= 150
+    }
+    assert set(index.codes[positions]) == expected
+    # Across the pole from NPOA, at the other side of the band
+    assert "NPOB" in expected
+
+
+def test_band_holds_every_airport_within_the_radius(index):
+    for home in range(len(index)):
+        for radius in (25, 100, 400):
+            window = index.band(index.lat[home], radius)
+            distances = haversine_nm(index.lat[home], index.lon[home], index.lat, index.lon)
+            inside = np.flatnonzero(distances <= radius)
+            assert window.start <= inside.min() and inside.max() < window.stop
+
+
+def test_ring_bounds_are_inclusive(index):
+    positions, distances = index.ring("KHOM", 0, 300)
+    order = np.argsort(distances)
+    low, high = order[3], order[-4]
+    min_nm, max_nm = float(distances[low]), float(distances[high])
+
+    ring_positions, _ = index.ring("KHOM", min_nm, max_nm)
+    assert {positions[low], positions[high]} <= set(ring_positions.tolist())
+    assert len(ring_positions) == len(order) - 6
+
+    filters = replace(PERMISSIVE, first_leg_min=min_nm, first_leg_max=max_nm)
+    codes = [r["code"] for r in index.first_leg_candidates("KHOM", filters)]
+    assert codes[0] == index.codes[positions[low]]
+    assert codes[-1] == index.codes[positions[high]]
+
+    # The outer ring starts strictly beyond first_leg_max
+    outer = [r["code"] for r in index.nearby_outer_candidates("KHOM", filters, outer_buffer_nm=1000)]
+    assert index.codes[positions[high]] not in outer
+    assert outer[0] == index.codes[positions[order[-3]]]
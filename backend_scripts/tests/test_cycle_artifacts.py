@@ -0,0 +1,55 @@
+import json
+
+from xc_airport_db import prune_cycle_artifacts
+
+
+def test_prune_cycle_artifacts(tmp_path):
+    tmp_root, snapshot_root, graph_root = tmp_path / "tmp", tmp_path / "snapshots", tmp_path / "graphs"
+    for root in (snapshot_root, graph_root):
+        root.mkdir()
+    dates = ["2025-10-30", "2025-11-27", "2025-12-25", "2026-01-22", "2026-02-19"]
+    for date in dates:
+        (tmp_root / date).mkdir(parents=True)
+        (tmp_root / date / "base.abc.parquet").write_bytes(b"")
+        for name in (f"airports_base_{date}.aaa.json", f"airports_base_{date}.manifest.json"):
+            (snapshot_root / name).write_text("{}")
+        (graph_root / f"airport_neighbors_{date}.npz").write_bytes(b"")
+    (tmp_root / "not-a-date").mkdir()
+    # A rebuilt snapshot of the live cycle leaves the old hash behind
+    (snapshot_root / "airports_base_2026-01-22.old.json").write_text("{}")
+    # Artifacts written by an --stop-after artifacts run, not recorded in dataset_versions
+    (tmp_root / "2026-02-19" / "artifacts.v1.json").write_text(
+        json.dumps(
+            {
+                "snapshot": {"files": {"json": "airports_base_2026-02-19.aaa.json"}},
+                "neighbor_graph": {"file": "airport_neighbors_2026-02-19.npz"},
+            }
+        )
+    )
+    (snapshot_root / "latest.json").write_text(json.dumps({"files": {"json": "airports_base_2025-12-25.aaa.json"}}))
+
+    # Live 2026-01-22, staged 2025-10-30 (an old row left behind still counts as referenced)
+    prune_cycle_artifacts(
+        {"2026-01-22", "2025-10-30"},
+        {"airports_base_2026-01-22.aaa.json", "airport_neighbors_2026-01-22.npz", "airports_base_2025-10-30.aaa.json"},
+        keep=1,
+        tmp_root=tmp_root,
+        snapshot_root=snapshot_root,
+        graph_root=graph_root,
+    )
+
+    assert sorted(d.name for d in tmp_root.iterdir()) == ["2025-10-30", "2026-01-22", "2026-02-19", "not-a-date"]
+    assert sorted(p.name for p in snapshot_root.iterdir()) == [
+        "airports_base_2025-10-30.aaa.json",
+        "airports_base_2025-10-30.manifest.json",
+        "airports_base_2025-12-25.aaa.json",
+        "airports_base_2026-01-22.aaa.json",
+        "airports_base_2026-01-22.manifest.json",
+        "airports_base_2026-02-19.aaa.json",
+        "airports_base_2026-02-19.manifest.json",
+        "latest.json",
+    ]
+    assert sorted(p.name for p in graph_root.iterdir()) == [
+        "airport_neighbors_2026-01-22.npz",
+        "airport_neighbors_2026-02-19.npz",
+    ]
@@ -0,0 +1,30 @@
+from datetime import date
+
+import pytest
+
+from xc_airport_db import get_current_dtpp_cycle, get_cycle_from_effective_date, get_dtpp_cycle_start
+
+
+@pytest.mark.parametrize(
+    ("effective_date", "cycle"),
+    [
+        # Late in the year the AIRAC number runs one ahead of the month (13 cycles a year)
+        ("2025-12-25", "2513"),
+        ("2026-01-22", "2601"),
+        ("2026-10-01", "2610"),
+        ("2026-10-29", "2611"),
+        ("2026-11-26", "2612"),
+        ("2026-12-24", "2613"),
+        ("2027-01-21", "2701"),
+    ],
+)
+def test_preview_effective_dates_map_to_airac_cycles(effective_date, cycle):
+    assert get_current_dtpp_cycle(date.fromisoformat(effective_date)) == cycle
+    # The NASR update and preview staging must agree with the --approaches-only refresh
+    assert get_cycle_from_effective_date(effective_date) == cycle
+    assert get_dtpp_cycle_start(cycle) == date.fromisoformat(effective_date)
+
+
+def test_cycle_holds_until_the_next_effective_date():
+    assert get_current_dtpp_cycle(date(2026, 11, 25)) == "2611"
+    assert get_current_dtpp_cycle(date(2027, 1, 20)) == "2613"
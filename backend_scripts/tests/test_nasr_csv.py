@@ -0,0 +1,64 @@
+import pandas as pd
+import pytest
+
+import nasr_csv
+from nasr_csv import (
+    clean_text,
+    prepare_airport_base,
+    prepare_csv_chunk,
+    prepare_csv_chunk_with_usage,
+    read_nasr_csv,
+)
+
+APT_BASE_CSV = """\
+SITE_NO,SITE_TYPE_CODE,ARPT_ID,ICAO_ID,ARPT_NAME,CITY,STATE_CODE,STATE_NAME,COUNTY_NAME,COUNTRY_CODE,LAT_DECIMAL,LONG_DECIMAL,ELEV,FUEL_TYPES
+1.1,A,ABC,KABC,Alpha Field,Springfield,VA,VIRGINIA,FAIRFAX,US,38.5,-77.25,312.4,100LL
+2.2,A,DEF,,,,,,,,39.0,-76.5,50,
+"""
+BAD_ELEV_ROW = "3.3,A,BAD,,Bad Elev,Town,MD,MARYLAND,X,US,39.3,-76.8,12a,\n"
+
+
+def test_read_nasr_csv_prunes_and_types_columns(csv_engine):
+    df = read_nasr_csv(APT_BASE_CSV.encode(), "APT_BASE.csv")
+
+    assert "STATE_CODE" not in df.columns
+    assert list(df.columns) == [c for c in nasr_csv.NASR_CSV_COLUMNS["APT_BASE.csv"] if c in APT_BASE_CSV]
+    if csv_engine == "pyarrow":
+        assert df["ELEV"].tolist() == [312.4, 50.0]
+        assert isinstance(df["COUNTRY_CODE"].dtype, pd.CategoricalDtype)
+    else:
+        # Without pyarrow every column is text and prepare_* does the coercion
+        assert df["ELEV"].tolist() == ["312.4", "50"]
+
+
+def test_blank_values_clean_to_empty_text(csv_engine):
+    df = read_nasr_csv(APT_BASE_CSV.encode(), "APT_BASE.csv")
+
+    # Missing values read as NaN in every engine; cleaned they are "", never "nan"
+    assert clean_text(df["CITY"]).tolist() == ["Springfield", ""]
+    assert clean_text(df["COUNTRY_CODE"]).tolist() == ["US", ""]
+    assert clean_text(df["FUEL_TYPES"], upper=True).tolist() == ["100LL", ""]
+
+
+def test_untyped_value_falls_back_to_text(capsys):
+    if nasr_csv.pyarrow is None:
+        pytest.skip("pyarrow is not installed")
+    data = (APT_BASE_CSV + BAD_ELEV_ROW).encode()
+
+    df = read_nasr_csv(data, "APT_BASE.csv")
+    assert "reading it as text" in capsys.readouterr().out
+    assert df["ELEV"].tolist() == ["312.4", "50", "12a"]
+    assert "STATE_CODE" not in df.columns
+
+    # prepare_airport_base coerces the text as before and drops the unparsable elevation
+    airports = prepare_airport_base(df)
+    assert airports["AirportCode"].tolist() == ["KABC", "DEF"]
+    assert airports["ELEV"].tolist() == [312.4, 50.0]
+
+
+def test_prepare_csv_chunk_with_usage():
+    # What a pool worker returns: the same frame as prepare_csv_chunk plus its own usage
+    chunk = APT_BASE_CSV.encode()
+    frame, cpu_s, peak_rss_mb = prepare_csv_chunk_with_usage("APT_BASE.csv", chunk)
+    pd.testing.assert_frame_equal(frame, prepare_csv_chunk("APT_BASE.csv", chunk))
+    assert cpu_s >= 0 and peak_rss_mb > 0
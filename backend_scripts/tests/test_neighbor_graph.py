@@ -0,0 +1,23 @@
+import pytest
+
+from xc_candidates import NeighborGraph, build_neighbor_graph_artifact
+
+AIRPORT_DATA = {
+    "KAAA": {"lat": 40.0, "lon": -83.0},
+    "KBBB": {"lat": 40.5, "lon": -83.0},
+    "KCCC": {"lat": 42.0, "lon": -83.0},
+}
+
+
+def test_saved_graph_records_its_radius(tmp_path):
+    graph, path = build_neighbor_graph_artifact(AIRPORT_DATA, "2026-10-29", radius_nm=60, out_dir=tmp_path)
+    assert path.name == "airport_neighbors_2026-10-29.npz"
+    # KAAA-KBBB are 30 nm apart; KCCC is 90+ nm from both
+    assert graph.edge_count == 2
+
+    loaded = NeighborGraph.load(path, min_radius_nm=60)
+    assert loaded.radius_nm == 60
+    assert loaded.edge_count == graph.edge_count
+
+    with pytest.raises(ValueError, match="built for 60 nm"):
+        NeighborGraph.load(path, min_radius_nm=250)
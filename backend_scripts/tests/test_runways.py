@@ -0,0 +1,65 @@
+import io
+import zipfile
+
+from xc_airport_db import NasrCsvSource, load_runways
+
+APT_RWY_CSV = """\
+SITE_NO,RWY_ID,RWY_LEN,RWY_WIDTH,SURFACE_TYPE_CODE,COND,RWY_LEN_SOURCE
+1.1, 09/27 ,5000,100,asph-e,good,X
+1.1,18/36,3200,,TURF,,X
+1.1,H1,60,60,CONC,GOOD,X
+1.1,NW/SE,,75,ASPH,FAIR,X
+2.2,04/22,2800,60,CONC-TRTD,POOR,X
+2.2,X1,0,0,WATER,,X
+5.5,17W/35W,0,0,WATER,,X
+5.5,13/31,4000,75,GRVL,,X
+5.5,1/19,2100A,60,TURF-GRVL,,X
+"""
+
+
+def test_load_runways(tmp_path, csv_engine):
+    (tmp_path / "APT_RWY.csv").write_text(APT_RWY_CSV)
+    with NasrCsvSource(tmp_path) as source:
+        rwy_dict, rwy_summary = load_runways(source)
+
+    # Helipads, water runways and runways with a blank or zero length are dropped;
+    # blank text is "" (never "nan") and a blank condition reads "Unknown Condition"
+    assert rwy_dict == {
+        "1.1": [
+            {"rwy_id": "09/27", "length": "5000", "width": "100", "surface": "ASPH-E", "condition": "GOOD"},
+            {"rwy_id": "18/36", "length": "3200", "width": "", "surface": "TURF", "condition": "Unknown Condition"},
+        ],
+        "2.2": [
+            {"rwy_id": "04/22", "length": "2800", "width": "60", "surface": "CONC-TRTD", "condition": "POOR"},
+        ],
+        "5.5": [
+            {"rwy_id": "13/31", "length": "4000", "width": "75", "surface": "GRVL", "condition": "Unknown Condition"},
+            {"rwy_id": "1/19", "length": "2100A", "width": "60", "surface": "TURF-GRVL", "condition": "Unknown Condition"},
+        ],
+    }
+    # Buckets and leading-digit lengths as in deriveRunwaySummaryFromRunways
+    assert rwy_summary == {
+        "1.1": {"ASPH": 5000, "CONC": 0, "TURF": 3200, "OTHER": 0},
+        "2.2": {"ASPH": 0, "CONC": 2800, "TURF": 0, "OTHER": 0},
+        "5.5": {"ASPH": 0, "CONC": 0, "TURF": 2100, "OTHER": 4000},
+    }
+
+
+def test_nasr_zip_source_matches_directory(tmp_path):
+    # The subscription ZIP nests the CSVs in a second ZIP under CSV_Data/
+    inner = io.BytesIO()
+    with zipfile.ZipFile(inner, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("APT_RWY.csv", APT_RWY_CSV)
+        zf.writestr("APT_BASE.csv", "SITE_NO\n1.1\n")
+    zip_path = tmp_path / "nasr.zip"
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("CSV_Data/01_Jan_2026_CSV.zip", inner.getvalue())
+    (tmp_path / "csv").mkdir()
+    (tmp_path / "csv" / "APT_RWY.csv").write_text(APT_RWY_CSV)
+
+    with NasrCsvSource(zip_path) as source:
+        from_zip = load_runways(source)
+        with source.open("apt_base.csv") as f:
+            assert f.read() == b"SITE_NO\n1.1\n"
+    with NasrCsvSource(tmp_path / "csv") as source:
+        assert from_zip == load_runways(source)
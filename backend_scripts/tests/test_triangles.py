@@ -0,0 +1,87 @@
+from dataclasses import replace
+
+import pytest
+
+from candidate_fixtures import AIRPORT_DATA, HOMES, PERMISSIVE, second_leg, triangles
+from xc_candidates import AirportIndex, CandidateFilters, NeighborGraph
+
+FILTERS = {
+    "default": CandidateFilters(),
+    "permissive": PERMISSIVE,
+    "wide": replace(PERMISSIVE, first_leg_min=0, first_leg_max=150, total_leg_min=50, total_leg_max=300),
+    # Little budget is left after the first leg, so the ellipse prunes most of the pool
+    "tight": replace(PERMISSIVE, first_leg_min=60, first_leg_max=110, total_leg_min=0, total_leg_max=240),
+}
+
+
+@pytest.fixture(scope="module")
+def index():
+    return AirportIndex.from_airport_data(AIRPORT_DATA)
+
+
+def as_trips(result: dict) -> dict:
+    return {(f, s): t for f, s, t in zip(result["first"].tolist(), result["second"].tolist(), result["total"].tolist())}
+
+
+def assert_same_trips(actual: dict, expected: dict, rel: float = 1e-9):
+    assert actual.keys() == expected.keys()
+    for key, total in expected.items():
+        assert actual[key] == pytest.approx(total, rel=rel)
+
+
+@pytest.mark.parametrize("filters", FILTERS.values(), ids=FILTERS.keys())
+@pytest.mark.parametrize("home", HOMES)
+def test_triangles_match_brute_force(index, home, filters):
+    expected = triangles(AIRPORT_DATA, home, filters)
+    for chunk_size in (1, 3, 256):
+        assert_same_trips(as_trips(index.triangles(home, filters, chunk_size=chunk_size)), expected)
+
+
+def test_fixture_exercises_the_ellipse_bound(index):
+    # Some pool airports are within reach of home but outside every first leg's ellipse
+    filters = FILTERS["tight"]
+    trips = triangles(AIRPORT_DATA, "KHOM", filters)
+    assert trips
+    seconds = {second for _, second in trips}
+    pool, _ = index.ring("KHOM", 0, filters.total_leg_max - filters.first_leg_min)
+    assert set(index.codes[pool]) - seconds - {first for first, _ in trips}
+
+
+@pytest.mark.parametrize("sort_by", ["leg_distance", "total_distance", "alphabetical"])
+def test_second_leg_candidates_match_find_second_leg(index, sort_by):
+    filters = replace(FILTERS["wide"], sort_by=sort_by)
+    firsts = sorted({first for first, _ in triangles(AIRPORT_DATA, "KHOM", filters)})
+    assert firsts
+
+    key = {"alphabetical": lambda r: r[0], "total_distance": lambda r: r[3]}.get(sort_by, lambda r: r[1])
+    for first in firsts[:10]:
+        expected = sorted(second_leg(AIRPORT_DATA, "KHOM", first, filters), key=key)
+        results = index.second_leg_candidates("KHOM", first, filters)
+        assert [r["code"] for r in results] == [code for code, *_ in expected]
+        for result, (_, leg2, leg3, total) in zip(results, expected):
+            assert (result["leg2Distance"], result["leg3Distance"], result["totalDistance"]) == pytest.approx(
+                (leg2, leg3, total), rel=1e-9
+            )
+
+
+@pytest.mark.parametrize(
+    ("radius_nm", "uses_graph"),
+    [
+        (300, True),
+        # first_leg_max past the radius
+        (120, False),
+        # first legs fit, but the remaining budget does not
+        (160, False),
+    ],
+)
+@pytest.mark.parametrize("home", HOMES)
+def test_neighbor_graph_triangles_match_index(index, home, radius_nm, uses_graph):
+    filters = FILTERS["wide"]
+    graph = NeighborGraph.build(index, radius_nm)
+    if uses_graph:
+        assert filters.first_leg_max <= radius_nm and filters.total_leg_max - filters.first_leg_min <= radius_nm
+
+    expected = as_trips(index.triangles(home, filters))
+    assert expected
+    # The graph keeps distances as float32, so its totals agree to float32 precision
+    assert_same_trips(as_trips(graph.triangles(index, home, filters)), expected, rel=1e-6)
@@ -1,62 +1,211 @@
 #!/usr/bin/env python3
 
 import os
-import sys
 import ssl
+import time
+import re
+import argparse
+import multiprocessing
+import resource
 import shutil
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+import gzip
+import hashlib
+import inspect
+import io
 import zipfile
 import json
 import xml.etree.ElementTree as ET
-from io import BytesIO
 from pathlib import Path
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from urllib.request import urlopen
+from zoneinfo import ZoneInfo
 
+import numpy as np
 import pandas as pd
 import requests
 from bs4 import BeautifulSoup
-from psycopg import connect
+from psycopg import Connection, Cursor, OperationalError, pq
+
+from nasr_csv import (
+    CSV_PREPARERS,
+    NASR_CSV_COLUMNS,
+    prepare_csv_chunk_with_usage,
+    clean_text,
+    prepare_airport_base,
+    prepare_airspace,
+    prepare_runways,
+    read_nasr_csv,
+    split_csv_bytes,
+)
+from xc_candidates import GRAPH_ROOT, NEIGHBOR_GRAPH_RADIUS_NM, NeighborGraph, build_neighbor_graph_artifact
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet as parquet
+except ImportError:
+    pyarrow = None
 
 DATABASE_URL = os.environ["NEON_DATABASE_URL"]
 
 BASE_PATH = Path(__file__).resolve().parent
 TMP_ROOT = BASE_PATH / "json_data" / "tmp"
 TMP_ROOT.mkdir(parents=True, exist_ok=True)
+DOWNLOAD_CACHE_ROOT = BASE_PATH / "json_data" / "cache"
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+DOWNLOAD_CACHE_KEEP = 2
+# Stage-cache date directories kept besides those of the live and staged cycles
+CYCLE_ARTIFACT_KEEP = 2
+# Normalized stage outputs are cached as Parquet under TMP_ROOT/<effective_date>/
+PIPELINE_STAGES = ("parse", "build", "artifacts", "sync")
+# Process pool size for the NASR CSV parse, one worker per core up to 4 by default.
+# XC_CSV_WORKERS=1 keeps the sequential loaders, which win on a single core: every pool
+# worker first pays about a second in interpreter start-up and pandas/pyarrow imports
+CSV_WORKERS = int(os.environ.get("XC_CSV_WORKERS", min(4, os.cpu_count() or 1)))
+SNAPSHOT_ROOT = BASE_PATH / "json_data" / "snapshots"
+# Seconds a pooled connection may sit idle before it is pinged on reuse
+DB_IDLE_CHECK_S = 60
+
+# Optional: also load the neighbor graph (pairs within NEIGHBOR_GRAPH_DB_RADIUS_NM) into airport_neighbors_v2
+LOAD_NEIGHBOR_GRAPH_TABLE = os.environ.get("XC_LOAD_NEIGHBOR_GRAPH_TABLE", "") == "1"
+NEIGHBOR_GRAPH_DB_RADIUS_NM = float(os.environ.get("XC_NEIGHBOR_GRAPH_DB_RADIUS_NM", NEIGHBOR_GRAPH_RADIUS_NM))
+NEIGHBOR_COPY_CHUNK_EDGES = 1_000_000
+
+# Blue/green load: build *_next copies of the tables and swap them in by rename (previous kept as *_prev).
+# Opt-in, as is --full-refresh; other runs sync the live tables in place by fingerprint
+SHADOW_BUILD = os.environ.get("XC_SHADOW_BUILD", "") == "1"
+SHADOW_TABLES = ("airports_v2", "airport_runways_v2", "airport_approaches_v2")
+SHADOW_NEXT_SUFFIX = "_next"
+SHADOW_PREV_SUFFIX = "_prev"
+# Rows of other tables (airport_scrape_status_v2) whose airport a swap or in-place sync
+# removed are moved to <table>_parked rather than deleted, and moved back if the airport returns
+PARKED_SUFFIX = "_parked"
+# The Preview cycle is built ahead of its effective date into *_staged tables
+# and swapped in by a later run once that date arrives
+PRESTAGE_PREVIEW = os.environ.get("XC_PRESTAGE_PREVIEW", "1") == "1"
+STAGED_SUFFIX = "_staged"
+STAGED_MIN_AIRPORT_RATIO = float(os.environ.get("XC_STAGED_MIN_AIRPORT_RATIO", "0.9"))
+# Cycle effective dates are calendar dates at FAA headquarters, not UTC dates
+FAA_TIME_ZONE = ZoneInfo("America/New_York")
 
 NASR_SUB_URL = "https://www.faa.gov/air_traffic/flight_info/aeronav/aero_data/NASR_Subscription/"
 ZIP_BASE_URL = "https://nfdc.faa.gov/webContent/28DaySub/28DaySubscription_Effective_{}.zip"
 DTPP_BASE_URL = "https://aeronav.faa.gov/d-tpp/{}/"
 DTPP_XML_URL = "https://aeronav.faa.gov/d-tpp/{}/xml_data/d-TPP_Metafile.xml"
-
-
-def get_current_nasr_effective_date():
-    response = requests.get(NASR_SUB_URL, timeout=20)
-    response.raise_for_status()
-    soup = BeautifulSoup(response.text, "html.parser")
-
-    current_section = soup.find("h2", string="Current")
-    if not current_section:
-        raise RuntimeError("Could not find Current section on NASR subscription page")
-
-    ul = current_section.find_next("ul")
+# d-TPP charts follow the 28-day AIRAC cycle; AIRAC 2001 became effective on 2020-01-02
+AIRAC_EPOCH = date(2020, 1, 2)
+DTPP_DATASET_SUFFIX = "_dtpp"
+
+RUNWAY_SUMMARY_SURFACES = ("ASPH", "CONC", "TURF", "OTHER")
+AIRSPACE_CLASS_RANKS = ("G", "E", "D", "C", "B")
+
+AIRPORTS_V2_COLUMNS = (
+    "airport_code",
+    "site_no",
+    "airport_name",
+    "city",
+    "state",
+    "country",
+    "lat",
+    "lon",
+    "elevation",
+    "airspace_class",
+    "fuel_raw",
+    "remarks",
+    "raw_json",
+    "max_asph",
+    "max_conc",
+    "max_turf",
+    "max_other",
+    "approach_count",
+    "has_rnav",
+    "has_ilsloc",
+    "has_vorndb",
+    "fingerprint",
+)
+RUNWAY_V2_COLUMNS = ("airport_code", "rwy_id", "length_ft", "width_ft", "surface", "condition")
+APPROACH_V2_COLUMNS = ("airport_code", "approach_name", "pdf_name", "procuid", "amdt_num", "amdt_date")
+
+
+def _nasr_section_effective_date(soup, section: str) -> str:
+    heading = soup.find("h2", string=section)
+    if not heading:
+        raise RuntimeError(f"Could not find {section} section on NASR subscription page")
+
+    ul = heading.find_next("ul")
     if not ul:
-        raise RuntimeError("Could not find <ul> after Current section")
+        raise RuntimeError(f"Could not find <ul> after {section} section")
 
     li = ul.find("li")
     if not li:
-        raise RuntimeError("Could not find <li> in Current section")
+        raise RuntimeError(f"Could not find <li> in {section} section")
 
     a_tag = li.find("a", href=True)
     if not a_tag:
-        raise RuntimeError("Could not find current ZIP link")
+        raise RuntimeError(f"Could not find {section.lower()} ZIP link")
 
     href = a_tag["href"]
     return href.split("/")[-1]
 
 
+def get_nasr_effective_dates() -> tuple[str, str | None]:
+    """
+    (current, preview) effective dates from the NASR subscription page.
+    preview is None when the page lists no upcoming cycle (or anything that
+    is not a later date).
+    """
+    response = requests.get(NASR_SUB_URL, timeout=20)
+    response.raise_for_status()
+    soup = BeautifulSoup(response.text, "html.parser")
+
+    current = _nasr_section_effective_date(soup, "Current")
+
+    preview = None
+    if soup.find("h2", string="Preview"):
+        try:
+            preview = _nasr_section_effective_date(soup, "Preview")
+            datetime.strptime(preview, "%Y-%m-%d")
+        except (RuntimeError, ValueError) as e:
+            print(f"Ignoring Preview section on NASR subscription page: {e}")
+            preview = None
+        # find_next("ul") can run past an empty Preview section into the archive list
+        if preview is not None and preview <= current:
+            preview = None
+
+    return current, preview
+
+
+def get_current_nasr_effective_date():
+    return get_nasr_effective_dates()[0]
+
+
 def get_cycle_from_effective_date(effective_date: str) -> str:
-    cycle_date = datetime.strptime(effective_date, "%Y-%m-%d")
-    return f"{cycle_date.strftime('%y')}{cycle_date.month:02d}"
+    """
+    AIRAC cycle id of a NASR effective date. NASR and d-TPP share the 28-day
+    AIRAC schedule, so this is also the d-TPP cycle whose charts go with it.
+    """
+    return get_current_dtpp_cycle(date.fromisoformat(effective_date))
+
+
+def get_current_dtpp_cycle(today: date | None = None) -> str:
+    """AIRAC cycle id (yy + cycle number within that year) in effect on today."""
+    today = today or faa_today()
+    start = AIRAC_EPOCH + timedelta(days=(today - AIRAC_EPOCH).days // 28 * 28)
+    return f"{start.strftime('%y')}{(start.timetuple().tm_yday - 1) // 28 + 1:02d}"
+
+
+def get_dtpp_cycle_start(cycle: str) -> date:
+    """Effective date of an AIRAC cycle id such as 2611."""
+    year_start = date(2000 + int(cycle[:2]), 1, 1)
+    first = AIRAC_EPOCH + timedelta(days=-(-(year_start - AIRAC_EPOCH).days // 28) * 28)
+    return first + timedelta(days=(int(cycle[2:]) - 1) * 28)
 
 
 def ensure_metadata_table(cur):
@@ -82,6 +231,20 @@ def get_stored_effective_date(cur, dataset_name: str) -> str | None:
     return row[0] if row else None
 
 
+def get_stored_dtpp_cycle(cur, dataset_name: str) -> str | None:
+    """d-TPP cycle of the stored approaches: the later of the last approaches-only refresh and full update."""
+    cur.execute(
+        """
+        SELECT greatest(
+            (SELECT faa_cycle FROM dataset_versions WHERE dataset_name = %s),
+            (SELECT details ->> 'xml_cycle' FROM dataset_versions WHERE dataset_name = %s)
+        )
+        """,
+        (f"{dataset_name}{DTPP_DATASET_SUFFIX}", dataset_name),
+    )
+    return cur.fetchone()[0]
+
+
 def save_effective_date_with_stats(cur, dataset_name, effective_date, cycle, airport_count, approach_count):
     cur.execute(
         """
@@ -123,6 +286,191 @@ from datetime import datetime, timezone
 def now_utc():
     return datetime.now(timezone.utc)
 
+def faa_today() -> date:
+    return datetime.now(FAA_TIME_ZONE).date()
+
+class CountingCursor(Cursor):
+    """
+    Cursor that counts round trips to the server on its CountingConnection.
+    Outside pipeline mode every statement is one round trip; inside a pipeline
+    statements are queued and the single sync is counted by CountingConnection.pipeline
+    (so nothing that fetches results should run inside a pipeline block).
+    """
+
+    def _in_pipeline(self) -> bool:
+        return self.connection.pgconn.pipeline_status != pq.PipelineStatus.OFF
+
+    def execute(self, *args, **kwargs):
+        if not self._in_pipeline():
+            self.connection.round_trips += 1
+        return super().execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        if not self._in_pipeline():
+            self.connection.round_trips += 1
+        return super().executemany(*args, **kwargs)
+
+    def copy(self, *args, **kwargs):
+        self.connection.round_trips += 1
+        return super().copy(*args, **kwargs)
+
+
+class CountingConnection(Connection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.round_trips = 0
+
+    @contextmanager
+    def pipeline(self):
+        """psycopg pipeline mode: statements are sent without waiting and synced once on exit."""
+        with super().pipeline() as pipeline:
+            yield pipeline
+        self.round_trips += 1
+
+
+def db_connect():
+    return CountingConnection.connect(DATABASE_URL, cursor_factory=CountingCursor)
+
+
+class DbSession:
+    """
+    One connection for the whole update run.
+    - opened on first use and shared by the version check, the sync and the failure bookkeeping
+    - re-checked after DB_IDLE_CHECK_S of inactivity (e.g. the fetch/parse stages) and
+      reopened if the server dropped it meanwhile
+    - pipeline() batches statements that don't need each other's results
+    - round_trips adds up the counts of every connection it has opened
+    """
+
+    def __init__(self):
+        self._conn = None
+        self._last_used = 0.0
+        self._closed_round_trips = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def conn(self) -> Connection:
+        if (
+            self._conn is not None
+            and not self._conn.closed
+            and not self._conn.broken
+            and self._conn.info.transaction_status == pq.TransactionStatus.IDLE
+            and time.monotonic() - self._last_used > DB_IDLE_CHECK_S
+        ):
+            try:
+                self._conn.execute("SELECT 1")
+                self._conn.rollback()
+            except OperationalError:
+                print("Database connection was dropped while idle; reconnecting")
+                self._conn.close()
+
+        if self._conn is None or self._conn.closed or self._conn.broken:
+            if self._conn is not None:
+                self._closed_round_trips += self._conn.round_trips
+            self._conn = db_connect()
+        self._last_used = time.monotonic()
+        return self._conn
+
+    @property
+    def round_trips(self) -> int:
+        return self._closed_round_trips + (self._conn.round_trips if self._conn is not None else 0)
+
+    def cursor(self):
+        return self.conn.cursor()
+
+    def pipeline(self):
+        return self.conn.pipeline()
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        if self._conn is not None and not self._conn.closed and not self._conn.broken:
+            self._conn.rollback()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._closed_round_trips += self._conn.round_trips
+        self._conn = None
+
+
+class PipelineMetrics:
+    """
+    Per-stage wall time, CPU time, memory, row counts and DB round trips.
+    - cpu_s is this process only; children_cpu_s is the RUSAGE_CHILDREN delta,
+      i.e. child processes reaped during the stage. Forkserver pool workers are
+      not our children, so load_nasr_tables_parallel reports them itself
+      (worker_cpu_s, worker_peak_rss_mb).
+    - running_peak_rss_mb / children_running_peak_rss_mb are ru_maxrss
+      high-water marks since process start, not the stage's own peak: they only
+      move when a stage exceeds every earlier one. tracemalloc_peak_mb is the
+      stage's own Python-heap peak, only collected when XC_TRACEMALLOC=1
+      because tracing slows pandas down.
+    CPU time and memory are process-wide and round trips are those of the run's
+    DbSession, so stages that run concurrently (the fetch threads) also see each
+    other's work.
+    """
+
+    def __init__(self, db: DbSession, trace_memory: bool = False):
+        self.db = db
+        self.trace_memory = trace_memory
+        self.started = time.perf_counter()
+        self.stages: dict[str, dict] = {}
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name: str):
+        record: dict = {}
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        children_start = resource.getrusage(resource.RUSAGE_CHILDREN)
+        round_trips_start = self.db.round_trips
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+
+        try:
+            yield record
+        finally:
+            record["wall_s"] = round(time.perf_counter() - wall_start, 3)
+            record["cpu_s"] = round(time.process_time() - cpu_start, 3)
+            children = resource.getrusage(resource.RUSAGE_CHILDREN)
+            children_cpu_s = (children.ru_utime - children_start.ru_utime) + (
+                children.ru_stime - children_start.ru_stime
+            )
+            record["children_cpu_s"] = round(max(children_cpu_s, 0.0), 3)
+            record["running_peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+            record["children_running_peak_rss_mb"] = round(children.ru_maxrss / 1024, 1)
+            if self.trace_memory:
+                record["tracemalloc_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+            record["db_round_trips"] = self.db.round_trips - round_trips_start
+            self.stages[name] = record
+            rows = f", {record['rows']:,} rows" if "rows" in record else ""
+            child_cpu_s = record["children_cpu_s"] + record.get("worker_cpu_s", 0)
+            child_cpu = f" (+{child_cpu_s:.2f}s in child processes)" if child_cpu_s else ""
+            print(f"[stage] {name}: {record['wall_s']:.2f}s wall, {record['cpu_s']:.2f}s cpu{child_cpu}{rows}")
+
+    def as_dict(self) -> dict:
+        return {
+            "total_wall_s": round(time.perf_counter() - self.started, 3),
+            "db_round_trips": self.db.round_trips,
+            "stages": self.stages,
+        }
+
+    def write_report(self, path: Path, extra: dict | None = None):
+        report = dict(extra or {}, metrics=self.as_dict())
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(report, indent=2, default=str), encoding="utf-8")
+        print(f"Wrote metrics report: {path}")
+
+
 def insert_history_row(
     cur,
     dataset_name,
@@ -218,211 +566,523 @@ def upsert_dataset_version(
         ),
     )
 
-def download_and_extract_csv_data(url: str, extract_root: Path):
-    if extract_root.exists():
-        shutil.rmtree(extract_root)
-    extract_root.mkdir(parents=True, exist_ok=True)
+def _cache_index_path(cache_root: Path, url: str) -> Path:
+    return cache_root / "index" / f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.json"
 
-    response = requests.get(url, timeout=60)
-    response.raise_for_status()
 
-    with zipfile.ZipFile(BytesIO(response.content)) as z:
-        csv_data_files = [f for f in z.namelist() if f.startswith("CSV_Data/")]
+def _read_cache_entry(cache_root: Path, url: str) -> dict | None:
+    index_path = _cache_index_path(cache_root, url)
+    if not index_path.is_file():
+        return None
+    try:
+        return json.loads(index_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cache_entry(cache_root: Path, url: str, entry: dict):
+    index_path = _cache_index_path(cache_root, url)
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = index_path.with_suffix(".json.tmp")
+    tmp_path.write_text(json.dumps(entry, indent=2), encoding="utf-8")
+    tmp_path.replace(index_path)
+
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _finalize_download(
+    cache_root: Path, url: str, part_path: Path, sha256: str, etag: str | None, last_modified: str | None
+) -> Path:
+    """Move a complete .part file into blobs/<sha256> and record it in the index."""
+    size = part_path.stat().st_size
+    blob_path = cache_root / "blobs" / sha256
+    if blob_path.exists():
+        part_path.unlink()
+    else:
+        part_path.replace(blob_path)
+    part_path.with_suffix(".part.json").unlink(missing_ok=True)
+
+    _write_cache_entry(
+        cache_root,
+        url,
+        {
+            "url": url,
+            "sha256": sha256,
+            "size": size,
+            "etag": etag,
+            "last_modified": last_modified,
+            "downloaded_at": now_utc().isoformat(),
+        },
+    )
+    prune_download_cache(cache_root)
+
+    print(f"Downloaded {size:,} bytes (sha256 {sha256[:12]}): {url}")
+    return blob_path
+
+
+def download_to_cache(url: str, cache_root: Path = DOWNLOAD_CACHE_ROOT) -> Path:
+    """
+    Stream url into a content-addressed cache (blobs/<sha256>) and return the blob path.
+    - a cached blob is revalidated with If-None-Match / If-Modified-Since and reused on 304
+    - an interrupted download is resumed from its .part file with a Range request
+    - a .part file that is already complete (the run died before the rename) is
+      finalized; one the server rejects with 416 is dropped and fetched again
+    - every blob is checksum-verified against its name before it is handed out
+    """
+    blobs_dir = cache_root / "blobs"
+    partial_dir = cache_root / "partial"
+    blobs_dir.mkdir(parents=True, exist_ok=True)
+    partial_dir.mkdir(parents=True, exist_ok=True)
+
+    entry = _read_cache_entry(cache_root, url)
+    cached_blob = None
+    if entry:
+        candidate = blobs_dir / entry.get("sha256", "")
+        if candidate.is_file() and sha256_file(candidate) == entry["sha256"]:
+            cached_blob = candidate
+        else:
+            print(f"Cached blob for {url} is missing or corrupt; downloading again")
+            entry = None
+
+    part_path = partial_dir / _cache_index_path(cache_root, url).with_suffix(".part").name
+    part_meta_path = part_path.with_suffix(".part.json")
+    part_meta = {}
+    if part_path.is_file() and part_meta_path.is_file():
+        try:
+            part_meta = json.loads(part_meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            part_meta = {}
+    if not part_meta:
+        part_path.unlink(missing_ok=True)
+    elif cached_blob is None and part_meta.get("size") is not None:
+        part_size = part_path.stat().st_size
+        if part_size == part_meta["size"]:
+            print(f"Finishing a complete interrupted download: {url}")
+            return _finalize_download(
+                cache_root,
+                url,
+                part_path,
+                sha256_file(part_path),
+                part_meta.get("etag"),
+                part_meta.get("last_modified"),
+            )
+        if part_size > part_meta["size"]:
+            part_path.unlink()
+            part_meta_path.unlink(missing_ok=True)
+
+    headers = {}
+    if cached_blob is not None:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+    elif part_path.is_file():
+        validator = part_meta.get("etag") or part_meta.get("last_modified")
+        if validator:
+            headers["Range"] = f"bytes={part_path.stat().st_size}-"
+            headers["If-Range"] = validator
+
+    with requests.get(url, headers=headers, stream=True, timeout=(20, 120)) as response:
+        if response.status_code == 304 and cached_blob is not None:
+            print(f"Download cache hit (not modified): {url}")
+            return cached_blob
+
+        if response.status_code == 416 and "Range" in headers:
+            # Nothing left to send: either the .part is complete or it no longer matches the file
+            total = response.headers.get("Content-Range", "").rsplit("/", 1)[-1]
+            if total.isdigit() and part_path.stat().st_size == int(total):
+                print(f"Finishing a complete interrupted download: {url}")
+                return _finalize_download(
+                    cache_root,
+                    url,
+                    part_path,
+                    sha256_file(part_path),
+                    part_meta.get("etag"),
+                    part_meta.get("last_modified"),
+                )
+            print(f"Server rejected the resume range; downloading again: {url}")
+            part_path.unlink(missing_ok=True)
+            part_meta_path.unlink(missing_ok=True)
+            return download_to_cache(url, cache_root)
+
+        response.raise_for_status()
+
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+
+        if cached_blob is not None and etag and etag == entry.get("etag"):
+            print(f"Download cache hit (same ETag): {url}")
+            return cached_blob
+
+        digest = hashlib.sha256()
+        if response.status_code == 206 and part_path.is_file():
+            with part_path.open("rb") as f:
+                for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b""):
+                    digest.update(chunk)
+            mode = "ab"
+            print(f"Resuming download at byte {part_path.stat().st_size:,}: {url}")
+        else:
+            mode = "wb"
+            content_length = response.headers.get("Content-Length", "")
+            part_meta_path.write_text(
+                json.dumps(
+                    {
+                        "url": url,
+                        "etag": etag,
+                        "last_modified": last_modified,
+                        "size": int(content_length) if content_length.isdigit() else None,
+                    }
+                ),
+                encoding="utf-8",
+            )
+
+        with part_path.open(mode) as f:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                if chunk:
+                    f.write(chunk)
+                    digest.update(chunk)
+
+        expected_size = None
+        content_range = response.headers.get("Content-Range", "")
+        if response.status_code == 206 and "/" in content_range:
+            total = content_range.rsplit("/", 1)[-1]
+            expected_size = int(total) if total.isdigit() else None
+        elif response.headers.get("Content-Length", "").isdigit():
+            expected_size = int(response.headers["Content-Length"])
+
+    size = part_path.stat().st_size
+    if expected_size is not None and size != expected_size:
+        raise RuntimeError(f"Incomplete download for {url}: got {size:,} of {expected_size:,} bytes")
+
+    return _finalize_download(cache_root, url, part_path, digest.hexdigest(), etag, last_modified)
+
+
+def prune_download_cache(cache_root: Path = DOWNLOAD_CACHE_ROOT, keep: int = DOWNLOAD_CACHE_KEEP):
+    index_dir = cache_root / "index"
+    if not index_dir.is_dir():
+        return
+
+    index_paths = sorted(index_dir.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+    referenced = set()
+    for index_path in index_paths[:keep]:
+        try:
+            referenced.add(json.loads(index_path.read_text(encoding="utf-8")).get("sha256"))
+        except (OSError, ValueError):
+            continue
+    for index_path in index_paths[keep:]:
+        index_path.unlink(missing_ok=True)
+
+    for blob_path in (cache_root / "blobs").glob("*"):
+        if blob_path.name not in referenced:
+            blob_path.unlink(missing_ok=True)
+
+
+class NasrCsvSource:
+    """
+    Read NASR CSV members straight out of the subscription ZIP.
+    The CSV_Data/ secondary ZIP is inflated once into memory and opened from
+    there: a member of the outer archive only seeks by inflating, and every
+    backward seek the inner ZipFile made on it would restart from the beginning.
+    Nothing is extracted to disk and only the requested CSV members are inflated.
+    A directory that already holds the CSV files is accepted as well.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._outer = None
+        self._inner = None
+        self._members: dict[str, tuple[zipfile.ZipFile, str]] = {}
+
+    def __enter__(self):
+        if self.path.is_dir():
+            return self
+
+        self._outer = zipfile.ZipFile(self.path)
+        csv_data_files = [f for f in self._outer.namelist() if f.startswith("CSV_Data/")]
         if not csv_data_files:
             raise RuntimeError("No CSV_Data directory found in main NASR ZIP")
-        z.extractall(extract_root, members=csv_data_files)
 
-    csv_data_path = extract_root / "CSV_Data"
-    if not csv_data_path.is_dir():
-        raise RuntimeError(f"CSV_Data folder missing after extraction: {csv_data_path}")
+        for name in csv_data_files:
+            if name.lower().endswith(".csv"):
+                self._members.setdefault(name.rsplit("/", 1)[-1].upper(), (self._outer, name))
 
-    secondary_zip = None
-    for file in csv_data_path.iterdir():
-        if file.suffix.lower() == ".zip":
-            secondary_zip = file
-            break
+        secondary_zip = next((f for f in csv_data_files if f.lower().endswith(".zip")), None)
+        if secondary_zip is None:
+            raise RuntimeError("No secondary ZIP found inside CSV_Data")
 
-    if secondary_zip is None:
-        raise RuntimeError("No secondary ZIP found inside CSV_Data")
+        self._inner = zipfile.ZipFile(io.BytesIO(self._outer.read(secondary_zip)))
+        for name in self._inner.namelist():
+            if name.lower().endswith(".csv"):
+                self._members[name.rsplit("/", 1)[-1].upper()] = (self._inner, name)
 
-    with zipfile.ZipFile(secondary_zip, "r") as z:
-        z.extractall(csv_data_path)
+        return self
 
-    secondary_zip.unlink()
+    def __exit__(self, exc_type, exc, tb):
+        for handle in (self._inner, self._outer):
+            if handle is not None:
+                handle.close()
+        self._inner = self._outer = None
+        self._members = {}
 
+    def open(self, member_name: str):
+        if self.path.is_dir():
+            return (self.path / member_name).open("rb")
 
-def load_airport_base(path: Path) -> pd.DataFrame:
-    df = pd.read_csv(path / "APT_BASE.csv", dtype=str)
-    df = df[df["SITE_TYPE_CODE"].fillna("").str.upper() == "A"].copy()
+        member = self._members.get(member_name.upper())
+        if member is None:
+            raise RuntimeError(f"{member_name} not found in NASR CSV_Data archive")
+        archive, name = member
+        return archive.open(name)
 
-    df["ICAO_ID"] = df["ICAO_ID"].fillna("").str.strip().str.upper()
-    df["ARPT_ID"] = df["ARPT_ID"].fillna("").str.strip().str.upper()
-    df["AirportCode"] = df["ICAO_ID"]
-    df.loc[df["AirportCode"] == "", "AirportCode"] = df["ARPT_ID"]
+    def read_csv(self, member_name: str, **kwargs) -> pd.DataFrame:
+        with self.open(member_name) as f:
+            return pd.read_csv(f, **kwargs)
 
-    df["FUEL_TYPES"] = df["FUEL_TYPES"].fillna("").str.strip().str.upper()
-    df["LAT_DECIMAL"] = pd.to_numeric(df["LAT_DECIMAL"], errors="coerce")
-    df["LONG_DECIMAL"] = pd.to_numeric(df["LONG_DECIMAL"], errors="coerce")
-    df["ELEV"] = pd.to_numeric(df["ELEV"], errors="coerce")
 
-    df = df.dropna(subset=["AirportCode", "LAT_DECIMAL", "LONG_DECIMAL", "SITE_NO", "ELEV"])
-    return df
+def load_nasr_csv(source: NasrCsvSource, member_name: str) -> pd.DataFrame:
+    with source.open(member_name) as f:
+        return read_nasr_csv(f.read(), member_name)
 
 
-def load_runways(path: Path) -> dict[str, list[dict]]:
-    df = pd.read_csv(path / "APT_RWY.csv", dtype=str)
-    df = df[["SITE_NO", "RWY_ID", "RWY_LEN", "RWY_WIDTH", "SURFACE_TYPE_CODE", "COND"]].copy()
-    df["COND"] = df["COND"].fillna("").str.strip().str.upper()
-    df["SURFACE_TYPE_CODE"] = df["SURFACE_TYPE_CODE"].fillna("").str.strip().str.upper()
+def load_airport_base(source: NasrCsvSource) -> pd.DataFrame:
+    return prepare_airport_base(load_nasr_csv(source, "APT_BASE.csv"))
 
-    rwy_dict: dict[str, list[dict]] = {}
 
-    for _, row in df.iterrows():
-        rwy_id = str(row["RWY_ID"] or "").strip()
-        rwy_len = str(row["RWY_LEN"] or "").strip()
-        if "X" in rwy_id or "H" in rwy_id:
-            continue
-        if not rwy_len or rwy_len == "0":
-            continue
+def group_runways(df: pd.DataFrame) -> tuple[dict[str, list[dict]], dict[str, dict]]:
+    records = df.rename(
+        columns={
+            "RWY_ID": "rwy_id",
+            "RWY_LEN": "length",
+            "RWY_WIDTH": "width",
+            "SURFACE_TYPE_CODE": "surface",
+            "COND": "condition",
+        }
+    )[["rwy_id", "length", "width", "surface", "condition"]].to_dict("records")
 
-        cond = str(row["COND"] or "").strip().upper() or "Unknown Condition"
+    groups = df.groupby("SITE_NO", sort=False).indices
+    rwy_dict = {site_no: [records[i] for i in positions] for site_no, positions in groups.items()}
 
-        rwy_info = {
-            "rwy_id": rwy_id,
-            "length": rwy_len,
-            "width": str(row["RWY_WIDTH"] or "").strip(),
-            "surface": str(row["SURFACE_TYPE_CODE"] or "").strip().upper(),
-            "condition": cond,
-        }
-        rwy_dict.setdefault(str(row["SITE_NO"]), []).append(rwy_info)
+    return rwy_dict, summarize_runways(df)
 
-    return rwy_dict
 
+def load_runways(source: NasrCsvSource) -> tuple[dict[str, list[dict]], dict[str, dict]]:
+    return group_runways(prepare_runways(load_nasr_csv(source, "APT_RWY.csv")))
 
-def determine_airspace(row) -> str:
-    if row["CLASS_B_AIRSPACE"] == "Y":
-        return "B"
-    if row["CLASS_C_AIRSPACE"] == "Y":
-        return "C"
-    if row["CLASS_D_AIRSPACE"] == "Y":
-        return "D"
-    if row["CLASS_E_AIRSPACE"] == "Y":
-        return "E"
-    return "G"
 
+def summarize_runways(df: pd.DataFrame) -> dict[str, dict]:
+    """
+    Max runway length per surface bucket for each SITE_NO.
+    Mirrors deriveRunwaySummaryFromRunways in src/utils/filtering.js.
+    """
+    surface = df["SURFACE_TYPE_CODE"].str.split("-", n=1).str[0]
+    bucket = surface.where(surface.isin(RUNWAY_SUMMARY_SURFACES[:-1]), "OTHER")
+    length = (
+        pd.to_numeric(df["RWY_LEN"].str.extract(r"^(\d+)", expand=False), errors="coerce")
+        .fillna(0)
+        .astype(int)
+    )
 
-def load_airspace(path: Path) -> dict[str, dict]:
-    df = pd.read_csv(path / "CLS_ARSP.csv", dtype=str)
-    df["REMARK"] = df["REMARK"].fillna("").str.strip()
+    summary = (
+        pd.DataFrame({"SITE_NO": df["SITE_NO"], "bucket": bucket, "length": length})
+        .pivot_table(index="SITE_NO", columns="bucket", values="length", aggfunc="max", fill_value=0)
+        .reindex(columns=list(RUNWAY_SUMMARY_SURFACES), fill_value=0)
+        .astype(int)
+    )
+    return summary.to_dict("index")
 
-    airspace_info: dict[str, dict] = {}
 
-    for site_no, group in df.groupby("SITE_NO"):
-        highest = "G"
-        remark = ""
+def group_airspace(df: pd.DataFrame) -> dict[str, dict]:
+    grouped = df.groupby("SITE_NO", sort=False).agg(rank=("rank", "max"), remark=("remark", "last"))
 
-        for _, row in group.iterrows():
-            classification = determine_airspace(row)
+    classes = np.array(AIRSPACE_CLASS_RANKS)[grouped["rank"].to_numpy()]
+    return {
+        site_no: {"airspace": airspace, "remarks": remark}
+        for site_no, airspace, remark in zip(grouped.index, classes.tolist(), grouped["remark"].tolist())
+    }
 
-            if classification == "B":
-                highest = "B"
-            elif classification == "C" and highest not in ["B"]:
-                highest = "C"
-            elif classification == "D" and highest not in ["B", "C"]:
-                highest = "D"
-            elif classification == "E" and highest not in ["B", "C", "D"]:
-                highest = "E"
 
-            remark = row.get("REMARK", remark)
+def load_airspace(source: NasrCsvSource) -> dict[str, dict]:
+    return group_airspace(prepare_airspace(load_nasr_csv(source, "CLS_ARSP.csv")))
 
-        airspace_info[str(site_no)] = {"airspace": highest, "remarks": remark}
 
-    return airspace_info
+def _csv_pool_context():
+    """
+    This runs next to the d-TPP thread, and forking a threaded process is unsafe.
+    forkserver workers fork from a single-threaded server that has imported the
+    main script and nasr_csv once; spawn (where forkserver is unavailable) makes
+    every worker import them itself.
+    """
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload(["__main__", "nasr_csv"])
+    return context
 
 
-def parse_d_tpp_xml(xml_url: str, base_pdf_url: str, current_cycle: str):
+def load_nasr_tables_parallel(source: NasrCsvSource, workers: int, usage: dict | None = None):
+    """
+    Parse APT_BASE, APT_RWY and CLS_ARSP in a process pool.
+    - members are inflated once in the parent and shipped to workers as raw bytes
+    - with more cores than files, each file is cut into line-aligned chunks
+    - workers return the prepared (row-wise) frames pickled; the per-site
+      grouping runs in the parent over the concatenated frames
+    usage, when given, receives the workers' summed CPU time (worker_cpu_s) and
+    the largest worker's running peak RSS (worker_peak_rss_mb).
+    """
+    members = list(CSV_PREPARERS)
+    chunks_per_member = max(1, workers // len(members))
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_csv_pool_context()) as pool:
+        futures = {}
+        for member_name in members:
+            with source.open(member_name) as f:
+                data = f.read()
+            futures[member_name] = [
+                pool.submit(prepare_csv_chunk_with_usage, member_name, chunk)
+                for chunk in split_csv_bytes(data, chunks_per_member)
+            ]
+            del data
+
+        results = {
+            member_name: [future.result() for future in member_futures]
+            for member_name, member_futures in futures.items()
+        }
+
+    frames = {
+        member_name: pd.concat([frame for frame, _, _ in member_results], ignore_index=True)
+        for member_name, member_results in results.items()
+    }
+    if usage is not None:
+        chunk_usage = [(cpu_s, rss_mb) for member_results in results.values() for _, cpu_s, rss_mb in member_results]
+        usage["worker_cpu_s"] = round(sum(cpu_s for cpu_s, _ in chunk_usage), 3)
+        usage["worker_peak_rss_mb"] = round(max(rss_mb for _, rss_mb in chunk_usage), 1)
+    del results
+
+    rwy_dict, rwy_summary = group_runways(frames["APT_RWY.csv"])
+    return frames["APT_BASE.csv"], rwy_dict, rwy_summary, group_airspace(frames["CLS_ARSP.csv"])
+
+
+def parse_d_tpp_xml(xml_url: str, current_cycle: str):
     context = ssl._create_unverified_context()
     with urlopen(xml_url, context=context) as response:
-        xml_content = response.read().decode("utf-8")
-        tree = ET.ElementTree(ET.fromstring(xml_content))
+        return parse_d_tpp_stream(response, current_cycle)
 
-    root = tree.getroot()
-    cycle = root.get("cycle", current_cycle)
 
+def parse_d_tpp_stream(stream, current_cycle: str):
+    """
+    Walk the d-TPP metafile incrementally, keeping only IAP records.
+    Elements are cleared as soon as they are consumed, so memory stays bounded
+    and parsing proceeds while the response is still being read.
+    Records keep the chart's pdf_name only; the cycle's directory is joined
+    on at read time (see record_dtpp_version), so unchanged charts hash the
+    same from one cycle to the next.
+    """
+    cycle = current_cycle
     approach_dict: dict[str, list[dict]] = {}
 
-    for airport in root.findall(".//airport_name"):
-        apt_ident = airport.get("apt_ident")
-        icao_ident = airport.get("icao_ident", "")
-        key = icao_ident if icao_ident else apt_ident
-        if not key:
-            continue
-
-        approaches = []
-
-        for record in airport.findall("record"):
-            chart_code = record.findtext("chart_code")
-            if chart_code != "IAP":
-                continue
-
-            pdf_name = record.findtext("pdf_name") or ""
-            approaches.append(
-                {
-                    "name": record.findtext("chart_name") or "",
-                    "pdf_url": f"{base_pdf_url}{pdf_name}",
-                    "procuid": record.findtext("procuid") or "",
-                    "amdt_num": record.findtext("amdtnum") or "",
-                    "amdt_date": record.findtext("amdtdate") or "",
-                }
-            )
+    root = None
+    key = None
+    approaches: list[dict] = []
 
-        if approaches:
-            approach_dict[key] = approaches
-
-    return approach_dict, cycle
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        tag = elem.tag
 
+        if event == "start":
+            if root is None:
+                root = elem
+                cycle = root.get("cycle", current_cycle)
+            elif tag == "airport_name":
+                key = elem.get("icao_ident", "") or elem.get("apt_ident")
+                approaches = []
+            continue
 
-def build_airport_data(df_base, rwy_dict, airspace_info, approach_dict):
-    airport_data: dict[str, dict] = {}
+        if tag == "record":
+            if key and elem.findtext("chart_code") == "IAP":
+                approaches.append(
+                    {
+                        "name": elem.findtext("chart_name") or "",
+                        "pdf_name": elem.findtext("pdf_name") or "",
+                        "procuid": elem.findtext("procuid") or "",
+                        "amdt_num": elem.findtext("amdtnum") or "",
+                        "amdt_date": elem.findtext("amdtdate") or "",
+                    }
+                )
+            elem.clear()
+        elif tag == "airport_name":
+            if key and approaches:
+                approach_dict[key] = approaches
+            key = None
+            approaches = []
+            elem.clear()
+        elif tag in ("city_name", "state_code"):
+            elem.clear()
 
-    for _, row in df_base.iterrows():
-        code = str(row["AirportCode"]).strip().upper()
-        site_no = str(row["SITE_NO"]).strip()
+    return approach_dict, cycle
 
-        airspace = airspace_info.get(site_no, {"airspace": "G", "remarks": ""})
-        approaches = approach_dict.get(code, [])
 
-        country_code = str(row.get("COUNTRY_CODE", "")).strip()
-        state_name = str(row.get("STATE_NAME", "")).strip()
-        county_name = str(row.get("COUNTY_NAME", "")).strip()
-        fuel_types = str(row.get("FUEL_TYPES", "")).strip()
+def _text_column(df: pd.DataFrame, column: str) -> pd.Series:
+    if column not in df.columns:
+        return pd.Series("", index=df.index, dtype=object)
+    return clean_text(df[column])
 
-        if state_name.lower() == "nan":
-            state_name = ""
-        if county_name.lower() == "nan":
-            county_name = ""
-        if fuel_types == "":
-            fuel_types = "None"
 
-        state = state_name if state_name else (county_name if county_name else "unknown")
+def build_airport_data(df_base, rwy_dict, rwy_summary, airspace_info, approach_dict):
+    state_name = _text_column(df_base, "STATE_NAME")
+    county_name = _text_column(df_base, "COUNTY_NAME")
+    state = state_name.where(state_name != "", county_name).replace("", "unknown")
 
-        airport_data[code] = {
-            "site_no": site_no,
-            "lat": float(row["LAT_DECIMAL"]),
-            "lon": float(row["LONG_DECIMAL"]),
-            "elevation": float(row["ELEV"]),
-            "city": str(row.get("CITY", "")).strip(),
+    frame = pd.DataFrame(
+        {
+            "code": df_base["AirportCode"].astype(str).str.strip().str.upper(),
+            "site_no": df_base["SITE_NO"].astype(str).str.strip(),
+            "lat": df_base["LAT_DECIMAL"].astype(float),
+            "lon": df_base["LONG_DECIMAL"].astype(float),
+            "elevation": df_base["ELEV"].astype(float),
+            "city": _text_column(df_base, "CITY"),
             "state": state,
-            "country": country_code,
-            "airport_name": str(row.get("ARPT_NAME", "")).strip(),
-            "runways": rwy_dict.get(site_no, []),
-            "airspace": airspace["airspace"],
-            "fuel": fuel_types,
-            "remarks": airspace["remarks"],
-            "approaches": approaches,
+            "country": _text_column(df_base, "COUNTRY_CODE"),
+            "airport_name": _text_column(df_base, "ARPT_NAME"),
+            "fuel": _text_column(df_base, "FUEL_TYPES").replace("", "None"),
         }
+    )
 
-    return airport_data
+    airspace = pd.DataFrame.from_dict(airspace_info, orient="index", columns=["airspace", "remarks"])
+    frame = frame.merge(airspace, how="left", left_on="site_no", right_index=True)
+    frame["airspace"] = frame["airspace"].fillna("G")
+    frame["remarks"] = frame["remarks"].fillna("")
+
+    frame["runways"] = frame["site_no"].map(lambda site_no: rwy_dict.get(site_no, []))
+    frame["runway_summary"] = frame["site_no"].map(
+        lambda site_no: rwy_summary.get(site_no, dict.fromkeys(RUNWAY_SUMMARY_SURFACES, 0))
+    )
+    frame["approaches"] = frame["code"].map(lambda code: approach_dict.get(code, []))
+
+    columns = [
+        "site_no",
+        "lat",
+        "lon",
+        "elevation",
+        "city",
+        "state",
+        "country",
+        "airport_name",
+        "runways",
+        "runway_summary",
+        "airspace",
+        "fuel",
+        "remarks",
+        "approaches",
+    ]
+    records = frame[columns].to_dict("records")
+
+    # Later duplicates of an airport code replace earlier ones, as before
+    return dict(zip(frame["code"].tolist(), records))
 
 
 def ensure_v2_tables_exist(cur):
@@ -440,9 +1100,34 @@ def ensure_v2_tables_exist(cur):
             airspace_class text,
             fuel_raw text,
             remarks text,
-            raw_json jsonb
+            raw_json jsonb,
+            max_asph integer NOT NULL DEFAULT 0,
+            max_conc integer NOT NULL DEFAULT 0,
+            max_turf integer NOT NULL DEFAULT 0,
+            max_other integer NOT NULL DEFAULT 0,
+            approach_count integer NOT NULL DEFAULT 0,
+            has_rnav boolean NOT NULL DEFAULT false,
+            has_ilsloc boolean NOT NULL DEFAULT false,
+            has_vorndb boolean NOT NULL DEFAULT false,
+            fingerprint text,
+            runways_hash text,
+            approaches_hash text
         )
     """)
+    cur.execute("""
+        ALTER TABLE airports_v2
+            ADD COLUMN IF NOT EXISTS max_asph integer NOT NULL DEFAULT 0,
+            ADD COLUMN IF NOT EXISTS max_conc integer NOT NULL DEFAULT 0,
+            ADD COLUMN IF NOT EXISTS max_turf integer NOT NULL DEFAULT 0,
+            ADD COLUMN IF NOT EXISTS max_other integer NOT NULL DEFAULT 0,
+            ADD COLUMN IF NOT EXISTS approach_count integer NOT NULL DEFAULT 0,
+            ADD COLUMN IF NOT EXISTS has_rnav boolean NOT NULL DEFAULT false,
+            ADD COLUMN IF NOT EXISTS has_ilsloc boolean NOT NULL DEFAULT false,
+            ADD COLUMN IF NOT EXISTS has_vorndb boolean NOT NULL DEFAULT false,
+            ADD COLUMN IF NOT EXISTS fingerprint text,
+            ADD COLUMN IF NOT EXISTS runways_hash text,
+            ADD COLUMN IF NOT EXISTS approaches_hash text
+    """)
     cur.execute("CREATE INDEX IF NOT EXISTS idx_airports_v2_state ON airports_v2 (state)")
     cur.execute("CREATE INDEX IF NOT EXISTS idx_airports_v2_site_no ON airports_v2 (site_no)")
     cur.execute("CREATE INDEX IF NOT EXISTS idx_airports_v2_airspace ON airports_v2 (airspace_class)")
@@ -475,6 +1160,7 @@ def ensure_v2_tables_exist(cur):
             airport_code text NOT NULL,
             approach_name text NOT NULL,
             pdf_url text,
+            pdf_name text,
             procuid text,
             amdt_num text,
             amdt_date text,
@@ -485,6 +1171,8 @@ def ensure_v2_tables_exist(cur):
                 ON DELETE CASCADE
         )
     """)
+    # pdf_url is only filled by older imports; the API prefers pdf_name joined onto the d-TPP base URL
+    cur.execute("ALTER TABLE airport_approaches_v2 ADD COLUMN IF NOT EXISTS pdf_name text")
     cur.execute("CREATE INDEX IF NOT EXISTS idx_airport_approaches_v2_airport ON airport_approaches_v2 (airport_code)")
     cur.execute("CREATE INDEX IF NOT EXISTS idx_airport_approaches_v2_procuid ON airport_approaches_v2 (procuid)")
     cur.execute("""
@@ -493,254 +1181,2104 @@ def ensure_v2_tables_exist(cur):
     """)
 
 
-def sync_airports_v2(cur, airport_data: dict[str, dict]):
+def content_hash(value) -> str:
+    payload = json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def summarize_approaches(approaches: list[dict]) -> dict:
+    """Mirrors deriveApproachSummaryFromApproaches in src/utils/filtering.js."""
+    names = [str(ap.get("name") or "").upper() for ap in approaches]
+    return {
+        "count": len(names),
+        "has_rnav": any("RNAV" in name for name in names),
+        "has_ilsloc": any("ILS" in name or "LOC" in name for name in names),
+        "has_vorndb": any("VOR" in name or "NDB" in name for name in names),
+    }
+
+
+def airport_row(airport_code: str, rec: dict) -> tuple:
+    runway_summary = rec.get("runway_summary") or {}
+    approach_summary = summarize_approaches(rec.get("approaches", []))
+    row = (
+        airport_code,
+        rec.get("site_no"),
+        rec.get("airport_name"),
+        rec.get("city"),
+        rec.get("state"),
+        rec.get("country") or "US",
+        rec.get("lat"),
+        rec.get("lon"),
+        rec.get("elevation"),
+        rec.get("airspace"),
+        rec.get("fuel"),
+        rec.get("remarks"),
+        # Canonical key order so raw_json read back from jsonb re-serializes to the same fingerprint
+        json.dumps(rec, sort_keys=True, ensure_ascii=False),
+        *(int(runway_summary.get(surface, 0)) for surface in RUNWAY_SUMMARY_SURFACES),
+        approach_summary["count"],
+        approach_summary["has_rnav"],
+        approach_summary["has_ilsloc"],
+        approach_summary["has_vorndb"],
+    )
+    # Fingerprint the full column tuple so a schema change also refreshes existing rows
+    return (*row, content_hash(row))
+
+
+def stage_airports(cur, airport_data: dict[str, dict]):
     """
-    Preserve schedule-state FK integrity when airport_code changes but site_no stays same:
-    - if an existing airports_v2 row has same site_no and different airport_code,
-      update PK airport_code first (ON UPDATE CASCADE propagates to child FKs)
-    - then perform normal UPSERT by airport_code
+    COPY the incoming dataset into a transaction-scoped temp table
+    (airports_v2_stage) so the sync can run as set-based statements.
+    """
+    column_list = ", ".join(AIRPORTS_V2_COLUMNS)
+    with cur.connection.pipeline():
+        cur.execute("DROP TABLE IF EXISTS airports_v2_stage")
+        cur.execute(f"""
+            CREATE TEMP TABLE airports_v2_stage
+            ON COMMIT DROP
+            AS SELECT {column_list} FROM airports_v2 WITH NO DATA
+        """)
+    with cur.copy(f"COPY airports_v2_stage ({column_list}) FROM STDIN") as copy:
+        for airport_code, rec in airport_data.items():
+            copy.write_row(airport_row(airport_code, rec))
+    with cur.connection.pipeline():
+        cur.execute("CREATE INDEX ON airports_v2_stage (airport_code)")
+        cur.execute("CREATE INDEX ON airports_v2_stage (site_no)")
+        cur.execute("ANALYZE airports_v2_stage")
+
+
+def _create_rename_map(cur, incoming_table: str):
+    """
+    Temp table airports_v2_renames (old_code -> new_code): live airports_v2 rows
+    whose site_no now appears under a different airport_code in incoming_table.
+    """
+    cur.execute("DROP TABLE IF EXISTS airports_v2_renames")
+    cur.execute(f"""
+        CREATE TEMP TABLE airports_v2_renames
+        ON COMMIT DROP
+        AS
+        SELECT DISTINCT ON (new_code) old_code, new_code
+        FROM (
+            SELECT DISTINCT ON (a.airport_code)
+                a.airport_code AS old_code,
+                s.airport_code AS new_code
+            FROM airports_v2 a
+            JOIN {incoming_table} s
+              ON s.site_no = a.site_no
+            WHERE a.site_no <> ''
+              AND a.airport_code <> s.airport_code
+              AND NOT EXISTS (
+                  SELECT 1 FROM {incoming_table} k
+                  WHERE k.airport_code = a.airport_code
+                    AND k.site_no = a.site_no
+              )
+            ORDER BY a.airport_code, s.airport_code
+        ) candidates
+        ORDER BY new_code, old_code
+    """)
+
+
+def migrate_renamed_airports(cur) -> int:
+    """
+    Carry airport_code changes onto existing rows matched by site_no, in bulk.
+    Renames go through a temporary '~rename~' code first so swaps (A<->B) and
+    chains (A->B, B->C) never collide on the primary key; ON UPDATE CASCADE
+    propagates each step to the child tables.
+    Expects airports_v2_stage to be loaded.
     """
-    existing_by_site: dict[str, str] = {}
-    cur.execute("SELECT airport_code, site_no FROM airports_v2 WHERE site_no IS NOT NULL")
-    for airport_code, site_no in cur.fetchall():
-        existing_by_site[str(site_no)] = str(airport_code)
+    _create_rename_map(cur, "airports_v2_stage")
+
+    # Drop renames whose target code is held by a row that is not itself moving away
+    while True:
+        cur.execute("""
+            DELETE FROM airports_v2_renames r
+            WHERE EXISTS (
+                SELECT 1 FROM airports_v2 a
+                WHERE a.airport_code = r.new_code
+                  AND NOT EXISTS (
+                      SELECT 1 FROM airports_v2_renames o
+                      WHERE o.old_code = a.airport_code
+                  )
+            )
+        """)
+        if cur.rowcount == 0:
+            break
 
-    seen_codes = set(airport_data.keys())
-    seen_site_nos = {rec["site_no"] for rec in airport_data.values() if rec.get("site_no")}
+    cur.execute("""
+        UPDATE airports_v2 a
+        SET airport_code = '~rename~' || r.old_code
+        FROM airports_v2_renames r
+        WHERE a.airport_code = r.old_code
+    """)
+    renamed = cur.rowcount
+    if renamed:
+        cur.execute("""
+            UPDATE airports_v2 a
+            SET airport_code = r.new_code
+            FROM airports_v2_renames r
+            WHERE a.airport_code = '~rename~' || r.old_code
+        """)
+    return renamed
+
+
+def sync_airports_v2(cur, airport_data: dict[str, dict]) -> dict[str, int]:
+    """
+    Preserve schedule-state FK integrity when airport_code changes but site_no stays same:
+    - stage the incoming dataset with COPY
+    - rename existing rows whose site_no now maps to a different airport_code
+      (ON UPDATE CASCADE propagates to child FKs)
+    - then perform one set-based UPSERT by airport_code from the stage,
+      skipping airports whose record fingerprint is unchanged
+    Returns added / changed / unchanged / removed / renamed counts.
+    """
+    stage_airports(cur, airport_data)
 
     # Step 1: migrate code changes by site_no
-    for new_code, rec in airport_data.items():
-        site_no = rec.get("site_no")
-        if not site_no:
-            continue
+    renamed = migrate_renamed_airports(cur)
+    if renamed:
+        print(f"Migrated {renamed} airport code changes by site_no")
 
-        old_code = existing_by_site.get(site_no)
-        if old_code and old_code != new_code:
-            cur.execute(
-                """
-                UPDATE airports_v2
-                SET airport_code = %s
-                WHERE airport_code = %s
-                """,
-                (new_code, old_code),
-            )
+    cur.execute("""
+        SELECT
+            count(*) FILTER (WHERE a.airport_code IS NULL),
+            count(*) FILTER (WHERE a.airport_code IS NOT NULL AND a.fingerprint IS DISTINCT FROM s.fingerprint),
+            count(*) FILTER (WHERE a.fingerprint = s.fingerprint)
+        FROM airports_v2_stage s
+        LEFT JOIN airports_v2 a ON a.airport_code = s.airport_code
+    """)
+    added, changed, unchanged = cur.fetchone()
+
+    # Step 2: upsert fresh airport metadata for new or changed airports only
+    column_list = ", ".join(AIRPORTS_V2_COLUMNS)
+    update_list = ",\n                ".join(
+        f"{column} = EXCLUDED.{column}" for column in AIRPORTS_V2_COLUMNS if column != "airport_code"
+    )
+    cur.execute(f"""
+        INSERT INTO airports_v2 ({column_list})
+        SELECT {column_list}
+        FROM airports_v2_stage
+        ON CONFLICT (airport_code) DO UPDATE SET
+                {update_list}
+        WHERE airports_v2.fingerprint IS DISTINCT FROM EXCLUDED.fingerprint
+    """)
+
+    # Remove airports no longer present in current import (neither by code nor by site_no).
+    # This cascades to runways/approaches. Rows of other tables that reference them
+    # (airport_scrape_status_v2) are parked first, as a shadow swap does, and parked
+    # rows come back once their airport is present again.
+    cur.execute("DROP TABLE IF EXISTS airports_v2_removed")
+    cur.execute("""
+        CREATE TEMP TABLE airports_v2_removed
+        ON COMMIT DROP
+        AS
+        SELECT a.airport_code
+        FROM airports_v2 a
+        WHERE NOT EXISTS (
+            SELECT 1 FROM airports_v2_stage s
+            WHERE s.airport_code = a.airport_code
+        )
+        AND NOT EXISTS (
+            SELECT 1 FROM airports_v2_stage s
+            WHERE s.site_no = a.site_no
+              AND s.site_no <> ''
+        )
+    """)
+    for table, _, _, column in _external_foreign_keys(cur):
+        _restore_parked_rows(cur, table, column)
+        _park_rows(cur, table, column, f"t.{column} IN (SELECT airport_code FROM airports_v2_removed)")
+    cur.execute("""
+        DELETE FROM airports_v2 a
+        USING airports_v2_removed r
+        WHERE a.airport_code = r.airport_code
+    """)
+    removed = cur.rowcount
+
+    print(f"airports_v2: {added} added, {changed} changed, {unchanged} unchanged, {removed} removed")
+    return {
+        "added": added,
+        "changed": changed,
+        "unchanged": unchanged,
+        "removed": removed,
+        "renamed": renamed,
+    }
+
+
+def runway_row(airport_code: str, rwy: dict) -> tuple:
+    length_ft = int(rwy["length"]) if str(rwy.get("length", "")).strip().isdigit() else None
+    width_ft = int(rwy["width"]) if str(rwy.get("width", "")).strip().isdigit() else None
+    return (
+        airport_code,
+        rwy.get("rwy_id"),
+        length_ft,
+        width_ft,
+        rwy.get("surface"),
+        rwy.get("condition"),
+    )
+
+
+def approach_row(airport_code: str, ap: dict) -> tuple:
+    return (
+        airport_code,
+        ap.get("name"),
+        ap.get("pdf_name"),
+        ap.get("procuid"),
+        ap.get("amdt_num"),
+        ap.get("amdt_date"),
+    )
+
+
+def children_hash(rows: list[tuple]) -> str:
+    # airport_code is excluded so a rename alone does not count as a change
+    return content_hash(sorted([list(row[1:]) for row in rows], key=lambda row: json.dumps(row, default=str)))
+
+
+def _apply_child_diff(cur, table: str, columns: tuple, key_column: str, changed_codes: list[str], rows: list[tuple]):
+    column_list = ", ".join(columns)
+    update_list = ", ".join(
+        f"{column} = EXCLUDED.{column}" for column in columns if column not in ("airport_code", key_column)
+    )
+    distinct_list = ", ".join(
+        f"{table}.{column}" for column in columns if column not in ("airport_code", key_column)
+    )
+    excluded_list = ", ".join(
+        f"EXCLUDED.{column}" for column in columns if column not in ("airport_code", key_column)
+    )
+
+    # ordinal keeps the incoming order, so the first of several rows with the same key wins
+    with cur.connection.pipeline():
+        cur.execute(f"DROP TABLE IF EXISTS {table}_stage")
+        cur.execute(f"""
+            CREATE TEMP TABLE {table}_stage
+            ON COMMIT DROP
+            AS SELECT {column_list}, 0::bigint AS ordinal FROM {table} WITH NO DATA
+        """)
+    with cur.copy(f"COPY {table}_stage ({column_list}, ordinal) FROM STDIN") as copy:
+        for ordinal, row in enumerate(rows):
+            copy.write_row((*row, ordinal))
+
+    cur.execute(
+        f"""
+        DELETE FROM {table} t
+        WHERE t.airport_code = ANY(%s)
+          AND NOT EXISTS (
+              SELECT 1 FROM {table}_stage s
+              WHERE s.airport_code = t.airport_code
+                AND s.{key_column} = t.{key_column}
+          )
+        """,
+        (changed_codes,),
+    )
+    deleted = cur.rowcount
+
+    cur.execute(f"""
+        INSERT INTO {table} ({column_list})
+        SELECT DISTINCT ON (airport_code, {key_column}) {column_list}
+        FROM {table}_stage
+        ORDER BY airport_code, {key_column}, ordinal
+        ON CONFLICT (airport_code, {key_column}) DO UPDATE SET
+            {update_list}
+        WHERE ({distinct_list}) IS DISTINCT FROM ({excluded_list})
+    """)
+    return deleted, cur.rowcount
+
+
+def refresh_runways_and_approaches(cur, airport_data: dict[str, dict], full_refresh: bool = False) -> dict[str, dict]:
+    """
+    Diff-based refresh of airport_runways_v2 / airport_approaches_v2.
+    Each airport's child rows are hashed and compared with the hashes stored on
+    airports_v2; only airports whose runways or approaches changed are rewritten.
+    full_refresh=True ignores the stored hashes and rewrites every airport.
+    """
+    stored_hashes: dict[str, tuple] = {}
+    if not full_refresh:
+        cur.execute("SELECT airport_code, runways_hash, approaches_hash FROM airports_v2")
+        stored_hashes = {code: (rwy_hash, ap_hash) for code, rwy_hash, ap_hash in cur.fetchall()}
+
+    changed_runway_codes: list[str] = []
+    changed_approach_codes: list[str] = []
+    runway_rows: list[tuple] = []
+    approach_rows: list[tuple] = []
+    new_hashes: list[tuple] = []
 
-    # Step 2: upsert fresh airport metadata
     for airport_code, rec in airport_data.items():
+        stored_rwy_hash, stored_ap_hash = stored_hashes.get(airport_code, (None, None))
+
+        rwy_rows = [runway_row(airport_code, rwy) for rwy in rec.get("runways", [])]
+        ap_rows = [approach_row(airport_code, ap) for ap in rec.get("approaches", [])]
+        rwy_hash = children_hash(rwy_rows)
+        ap_hash = children_hash(ap_rows)
+
+        if rwy_hash != stored_rwy_hash:
+            changed_runway_codes.append(airport_code)
+            runway_rows.extend(rwy_rows)
+        if ap_hash != stored_ap_hash:
+            changed_approach_codes.append(airport_code)
+            approach_rows.extend(ap_rows)
+        if (rwy_hash, ap_hash) != (stored_rwy_hash, stored_ap_hash):
+            new_hashes.append((airport_code, rwy_hash, ap_hash))
+
+    runway_stats = (0, 0)
+    if changed_runway_codes:
+        runway_stats = _apply_child_diff(
+            cur,
+            "airport_runways_v2",
+            RUNWAY_V2_COLUMNS,
+            "rwy_id",
+            changed_runway_codes,
+            runway_rows,
+        )
+
+    approach_stats = (0, 0)
+    if changed_approach_codes:
+        approach_stats = _apply_child_diff(
+            cur,
+            "airport_approaches_v2",
+            APPROACH_V2_COLUMNS,
+            "approach_name",
+            changed_approach_codes,
+            approach_rows,
+        )
+
+    if new_hashes:
+        cur.execute("DROP TABLE IF EXISTS airports_v2_hash_stage")
+        cur.execute("""
+            CREATE TEMP TABLE airports_v2_hash_stage (
+                airport_code text PRIMARY KEY,
+                runways_hash text,
+                approaches_hash text
+            ) ON COMMIT DROP
+        """)
+        with cur.copy("COPY airports_v2_hash_stage (airport_code, runways_hash, approaches_hash) FROM STDIN") as copy:
+            for row in new_hashes:
+                copy.write_row(row)
+        cur.execute("""
+            UPDATE airports_v2 a
+            SET runways_hash = h.runways_hash,
+                approaches_hash = h.approaches_hash
+            FROM airports_v2_hash_stage h
+            WHERE a.airport_code = h.airport_code
+        """)
+
+    print(
+        f"Runways: {len(changed_runway_codes)} airports changed "
+        f"({runway_stats[1]} upserted, {runway_stats[0]} deleted); "
+        f"approaches: {len(changed_approach_codes)} airports changed "
+        f"({approach_stats[1]} upserted, {approach_stats[0]} deleted)"
+    )
+    return {
+        "runways": {
+            "changed_airports": len(changed_runway_codes),
+            "upserted": runway_stats[1],
+            "deleted": runway_stats[0],
+        },
+        "approaches": {
+            "changed_airports": len(changed_approach_codes),
+            "upserted": approach_stats[1],
+            "deleted": approach_stats[0],
+        },
+    }
+
+
+def procedure_key(row: tuple) -> str:
+    """procuid of an APPROACH_V2_COLUMNS row; charts without one are keyed by name."""
+    return row[3] or f"name:{row[1]}"
+
+
+def diff_approach_procedures(
+    stored_rows: list[tuple], incoming_rows: list[tuple]
+) -> tuple[dict[str, list], list[tuple], list[tuple]]:
+    """
+    Compare stored and incoming approach rows (APPROACH_V2_COLUMNS) by procedure.
+    A procedure is one (airport_code, procuid); it counts as amended when its
+    (amdt_num, amdt_date) changes, or when its chart name or PDF change without
+    a new amendment. Returns the added / amended / removed (airport_code, key)
+    pairs, the (airport_code, key) pairs whose stored rows must be deleted and
+    the incoming rows that must be written.
+    """
+    def group(rows):
+        grouped: dict[tuple, list] = {}
+        for row in rows:
+            grouped.setdefault((row[0], procedure_key(row)), []).append(row)
+        return {
+            key: sorted(group_rows, key=lambda row: json.dumps(row, default=str))
+            for key, group_rows in grouped.items()
+        }
+
+    stored = group(stored_rows)
+    incoming = group(incoming_rows)
+    changes = {
+        "added": [key for key in incoming if key not in stored],
+        "amended": [key for key in incoming if key in stored and incoming[key] != stored[key]],
+        "removed": [key for key in stored if key not in incoming],
+    }
+    delete_keys = changes["amended"] + changes["removed"]
+    write_rows = [row for key in changes["added"] + changes["amended"] for row in incoming[key]]
+    return changes, delete_keys, write_rows
+
+
+def _apply_procedure_delta(cur, delete_keys: list[tuple], rows: list[tuple]) -> tuple[int, int]:
+    table = "airport_approaches_v2"
+    column_list = ", ".join(APPROACH_V2_COLUMNS)
+    value_columns = [column for column in APPROACH_V2_COLUMNS if column not in ("airport_code", "approach_name")]
+    update_list = ", ".join(f"{column} = EXCLUDED.{column}" for column in value_columns)
+
+    deleted = 0
+    if delete_keys:
         cur.execute(
-            """
-            INSERT INTO airports_v2 (
-                airport_code,
-                site_no,
-                airport_name,
-                city,
-                state,
-                country,
-                lat,
-                lon,
-                elevation,
-                airspace_class,
-                fuel_raw,
-                remarks,
-                raw_json
-            )
-            VALUES (
-                %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s::jsonb
+            f"""
+            DELETE FROM {table} t
+            USING unnest(%s::text[], %s::text[]) AS d(airport_code, proc_key)
+            WHERE t.airport_code = d.airport_code
+              AND coalesce(nullif(t.procuid, ''), 'name:' || t.approach_name) = d.proc_key
+            """,
+            ([code for code, _ in delete_keys], [key for _, key in delete_keys]),
+        )
+        deleted = cur.rowcount
+    if not rows:
+        return deleted, 0
+
+    with cur.connection.pipeline():
+        cur.execute(f"DROP TABLE IF EXISTS {table}_stage")
+        cur.execute(f"""
+            CREATE TEMP TABLE {table}_stage
+            ON COMMIT DROP
+            AS SELECT {column_list}, 0::bigint AS ordinal FROM {table} WITH NO DATA
+        """)
+    with cur.copy(f"COPY {table}_stage ({column_list}, ordinal) FROM STDIN") as copy:
+        for ordinal, row in enumerate(rows):
+            copy.write_row((*row, ordinal))
+
+    # Chart names stay unique per airport, so a new procedure may still take over an existing name
+    cur.execute(f"""
+        INSERT INTO {table} ({column_list})
+        SELECT DISTINCT ON (airport_code, approach_name) {column_list}
+        FROM {table}_stage
+        ORDER BY airport_code, approach_name, ordinal
+        ON CONFLICT (airport_code, approach_name) DO UPDATE SET
+            {update_list}
+    """)
+    return deleted, cur.rowcount
+
+
+def apply_approach_delta(cur, approach_dict: dict[str, list[dict]]) -> dict[str, int]:
+    """
+    Bring approaches in line with a full d-TPP approach set without a NASR build.
+    Incoming procedures are compared with the stored airport_approaches_v2 rows by
+    procuid and (amdt_num, amdt_date) (diff_approach_procedures); only added,
+    amended and removed procedures are written. Airports with a procedure change,
+    or whose approaches_hash is stale, then get:
+    - the new approaches in raw_json, and the summary columns, fingerprint and
+      approaches_hash recomputed by airport_row
+    A row without raw_json only gets its summary columns, and a NULL fingerprint
+    so the next full update rewrites it. d-TPP airports missing from airports_v2 are ignored.
+    """
+    cur.execute("SELECT airport_code, approaches_hash FROM airports_v2")
+    stored_hashes = dict(cur.fetchall())
+    cur.execute(f"SELECT {', '.join(APPROACH_V2_COLUMNS)} FROM airport_approaches_v2")
+    stored_rows = [tuple(row) for row in cur.fetchall()]
+
+    incoming_rows: list[tuple] = []
+    new_hashes: dict[str, str] = {}
+    changed_codes: set[str] = set()
+    for airport_code, stored_hash in stored_hashes.items():
+        ap_rows = [approach_row(airport_code, ap) for ap in approach_dict.get(airport_code, [])]
+        incoming_rows.extend(ap_rows)
+        new_hashes[airport_code] = children_hash(ap_rows)
+        if new_hashes[airport_code] != stored_hash:
+            changed_codes.add(airport_code)
+
+    changes, delete_keys, write_rows = diff_approach_procedures(stored_rows, incoming_rows)
+    changed_codes.update(code for code, _ in (*changes["added"], *changes["amended"], *changes["removed"]))
+    changed_codes = sorted(changed_codes)
+
+    deleted, upserted = 0, 0
+    if delete_keys or write_rows:
+        deleted, upserted = _apply_procedure_delta(cur, delete_keys, write_rows)
+
+    if changed_codes:
+        cur.execute("SELECT airport_code, raw_json FROM airports_v2 WHERE airport_code = ANY(%s)", (changed_codes,))
+        stored_records = cur.fetchall()
+
+        summary_columns = ("raw_json", "approach_count", "has_rnav", "has_ilsloc", "has_vorndb", "fingerprint")
+        summary_index = [AIRPORTS_V2_COLUMNS.index(column) for column in summary_columns]
+        with cur.connection.pipeline():
+            cur.execute("DROP TABLE IF EXISTS airports_v2_approach_stage")
+            cur.execute("""
+                CREATE TEMP TABLE airports_v2_approach_stage (
+                    airport_code text PRIMARY KEY,
+                    raw_json jsonb,
+                    approach_count integer,
+                    has_rnav boolean,
+                    has_ilsloc boolean,
+                    has_vorndb boolean,
+                    fingerprint text,
+                    approaches_hash text
+                ) ON COMMIT DROP
+            """)
+        with cur.copy(
+            f"COPY airports_v2_approach_stage (airport_code, {', '.join(summary_columns)}, approaches_hash) FROM STDIN"
+        ) as copy:
+            for airport_code, rec in stored_records:
+                approaches = approach_dict.get(airport_code, [])
+                if rec is None:
+                    summary = summarize_approaches(approaches)
+                    values = (
+                        None,
+                        summary["count"],
+                        summary["has_rnav"],
+                        summary["has_ilsloc"],
+                        summary["has_vorndb"],
+                        None,
+                    )
+                else:
+                    row = airport_row(airport_code, {**rec, "approaches": approaches})
+                    values = tuple(row[index] for index in summary_index)
+                copy.write_row((airport_code, *values, new_hashes[airport_code]))
+
+        cur.execute("""
+            UPDATE airports_v2 a
+            SET raw_json = coalesce(s.raw_json, a.raw_json),
+                approach_count = s.approach_count,
+                has_rnav = s.has_rnav,
+                has_ilsloc = s.has_ilsloc,
+                has_vorndb = s.has_vorndb,
+                fingerprint = s.fingerprint,
+                approaches_hash = s.approaches_hash
+            FROM airports_v2_approach_stage s
+            WHERE a.airport_code = s.airport_code
+        """)
+
+    print(
+        f"Approaches: {len(changes['added'])} added, {len(changes['amended'])} amended, "
+        f"{len(changes['removed'])} removed across {len(changed_codes)} airports "
+        f"({upserted} upserted, {deleted} deleted)"
+    )
+    return {
+        "changed_airports": len(changed_codes),
+        "added": len(changes["added"]),
+        "amended": len(changes["amended"]),
+        "removed": len(changes["removed"]),
+        "upserted": upserted,
+        "deleted": deleted,
+    }
+
+
+def _table_object_names(cur, table: str) -> tuple[list[str], list[str]]:
+    """Index and foreign-key names on table; both have to be renamed along with it."""
+    cur.execute(
+        """
+        SELECT c.relname
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = %s::regclass
+        """,
+        (table,),
+    )
+    indexes = [row[0] for row in cur.fetchall()]
+    cur.execute(
+        "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+        (table,),
+    )
+    foreign_keys = [row[0] for row in cur.fetchall()]
+    return indexes, foreign_keys
+
+
+def _copy_table_definition(cur, table: str, suffix: str):
+    """
+    Recreate table's keys, indexes and foreign keys on table+suffix with every
+    name suffixed; foreign keys into SHADOW_TABLES point at the shadow copies.
+    Runs after the bulk load so each index is built once instead of row by row.
+    """
+    shadow = f"{table}{suffix}"
+
+    cur.execute(
+        """
+        SELECT conname, contype, pg_get_constraintdef(oid)
+        FROM pg_constraint
+        WHERE conrelid = %s::regclass AND contype IN ('p', 'u', 'f')
+        ORDER BY contype = 'f', conname
+        """,
+        (table,),
+    )
+    constraints = cur.fetchall()
+
+    cur.execute(
+        """
+        SELECT c.relname, pg_get_indexdef(i.indexrelid)
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = %s::regclass
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint k WHERE k.conindid = i.indexrelid)
+        ORDER BY c.relname
+        """,
+        (table,),
+    )
+    indexes = cur.fetchall()
+
+    managed = "|".join(SHADOW_TABLES)
+    with cur.connection.pipeline():
+        for name, contype, definition in constraints:
+            if contype == "f":
+                definition = re.sub(rf"REFERENCES (?:\w+\.)?({managed})\(", rf"REFERENCES \g<1>{suffix}(", definition)
+            cur.execute(f"ALTER TABLE {shadow} ADD CONSTRAINT {name}{suffix} {definition}")
+
+        for name, definition in indexes:
+            definition = definition.replace(f" INDEX {name} ON ", f" INDEX {name}{suffix} ON ", 1)
+            definition = re.sub(rf" ON (?:\w+\.)?{table} USING ", f" ON {shadow} USING ", definition, count=1)
+            cur.execute(definition)
+
+
+def shadow_build_airports_v2(
+    cur, airport_data: dict[str, dict], suffix: str = SHADOW_NEXT_SUFFIX
+) -> dict[str, dict]:
+    """
+    Blue/green build: bulk-load the whole dataset into airports_v2_next,
+    airport_runways_v2_next and airport_approaches_v2_next (or the tables named
+    with suffix), then add keys and indexes. The live tables are only read here,
+    so API queries are never blocked; activate_shadow_generation swaps the shadow
+    copies in.
+    Returns the same change summary shape as the in-place sync.
+    """
+    shadow = f"airports_v2{suffix}"
+    with cur.connection.pipeline():
+        for table in reversed(SHADOW_TABLES):
+            cur.execute(f"DROP TABLE IF EXISTS {table}{suffix} CASCADE")
+        for table in SHADOW_TABLES:
+            cur.execute(f"""
+                CREATE TABLE {table}{suffix}
+                (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING GENERATED)
+            """)
+
+    airport_columns = (*AIRPORTS_V2_COLUMNS, "runways_hash", "approaches_hash")
+    runway_count = approach_count = 0
+    with cur.copy(f"COPY {shadow} ({', '.join(airport_columns)}) FROM STDIN") as copy:
+        for airport_code, rec in airport_data.items():
+            rwy_rows = [runway_row(airport_code, rwy) for rwy in rec.get("runways", [])]
+            ap_rows = [approach_row(airport_code, ap) for ap in rec.get("approaches", [])]
+            copy.write_row((*airport_row(airport_code, rec), children_hash(rwy_rows), children_hash(ap_rows)))
+
+    # Children are de-duplicated on their natural key like the in-place upsert (first row wins)
+    for table, columns, key_column, field, row_builder in (
+        ("airport_runways_v2", RUNWAY_V2_COLUMNS, "rwy_id", "runways", runway_row),
+        ("airport_approaches_v2", APPROACH_V2_COLUMNS, "approach_name", "approaches", approach_row),
+    ):
+        key_index = columns.index(key_column)
+        rows_written = 0
+        with cur.copy(f"COPY {table}{suffix} ({', '.join(columns)}) FROM STDIN") as copy:
+            for airport_code, rec in airport_data.items():
+                seen = set()
+                for item in rec.get(field, []):
+                    row = row_builder(airport_code, item)
+                    if row[key_index] in seen:
+                        continue
+                    seen.add(row[key_index])
+                    copy.write_row(row)
+                    rows_written += 1
+        if table == "airport_runways_v2":
+            runway_count = rows_written
+        else:
+            approach_count = rows_written
+
+    for table in SHADOW_TABLES:
+        _copy_table_definition(cur, table, suffix)
+        cur.execute(f"ANALYZE {table}{suffix}")
+
+    # Code changes matter for tables outside the swap (airport_scrape_status_v2);
+    # counting through the rename map keeps the summary comparable with the in-place sync
+    _create_rename_map(cur, shadow)
+    cur.execute("SELECT count(*) FROM airports_v2_renames")
+    renamed = cur.fetchone()[0]
+
+    cur.execute(f"""
+        SELECT
+            count(*) FILTER (WHERE a.airport_code IS NULL),
+            count(*) FILTER (WHERE a.airport_code IS NOT NULL AND a.fingerprint IS DISTINCT FROM n.fingerprint),
+            count(*) FILTER (WHERE a.fingerprint = n.fingerprint)
+        FROM {shadow} n
+        LEFT JOIN airports_v2_renames r ON r.new_code = n.airport_code
+        LEFT JOIN airports_v2 a ON a.airport_code = coalesce(r.old_code, n.airport_code)
+    """)
+    added, changed, unchanged = cur.fetchone()
+    cur.execute(f"""
+        SELECT count(*)
+        FROM airports_v2 a
+        WHERE NOT EXISTS (SELECT 1 FROM {shadow} n WHERE n.airport_code = a.airport_code)
+          AND NOT EXISTS (SELECT 1 FROM airports_v2_renames r WHERE r.old_code = a.airport_code)
+    """)
+    removed = cur.fetchone()[0]
+
+    print(
+        f"{shadow}: {added} added, {changed} changed, {unchanged} unchanged, "
+        f"{removed} removed, {renamed} renamed; {runway_count} runways, {approach_count} approaches"
+    )
+    return {
+        "mode": "shadow",
+        "airports": {
+            "added": added,
+            "changed": changed,
+            "unchanged": unchanged,
+            "removed": removed,
+            "renamed": renamed,
+        },
+        "runways": {"rows": runway_count},
+        "approaches": {"rows": approach_count},
+    }
+
+
+def _external_foreign_keys(cur) -> list[tuple]:
+    """(table, constraint, definition, column) for FKs into airports_v2 from outside SHADOW_TABLES."""
+    managed = [
+        f"{table}{suffix}"
+        for table in SHADOW_TABLES
+        for suffix in ("", SHADOW_NEXT_SUFFIX, SHADOW_PREV_SUFFIX, STAGED_SUFFIX)
+    ]
+    cur.execute(
+        """
+        SELECT c.conrelid::regclass::text, c.conname, pg_get_constraintdef(c.oid), a.attname
+        FROM pg_constraint c
+        JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = c.conkey[1]
+        WHERE c.contype = 'f'
+          AND c.confrelid = 'airports_v2'::regclass
+          AND c.conrelid::regclass::text <> ALL(%s)
+        """,
+        (managed,),
+    )
+    return cur.fetchall()
+
+
+def _park_rows(cur, table: str, column: str, condition: str):
+    """
+    Move the rows of table (aliased t) matching condition to <table>_parked,
+    replacing any parked rows for the same airport.
+    """
+    parked = f"{table}{PARKED_SUFFIX}"
+    cur.execute(f"CREATE TABLE IF NOT EXISTS {parked} (LIKE {table} INCLUDING DEFAULTS)")
+    cur.execute(f"""
+        WITH orphaned AS (
+            DELETE FROM {table} t
+            WHERE t.{column} IS NOT NULL
+              AND {condition}
+            RETURNING t.*
+        ),
+        replaced AS (
+            DELETE FROM {parked} p
+            WHERE p.{column} IN (SELECT {column} FROM orphaned)
+        )
+        INSERT INTO {parked}
+        SELECT * FROM orphaned
+    """)
+
+
+def _restore_parked_rows(cur, table: str, column: str):
+    """Move parked rows whose airport is in airports_v2 again back into table (live rows win)."""
+    parked = f"{table}{PARKED_SUFFIX}"
+    cur.execute(f"CREATE TABLE IF NOT EXISTS {parked} (LIKE {table} INCLUDING DEFAULTS)")
+    cur.execute(f"""
+        WITH restored AS (
+            DELETE FROM {parked} p
+            WHERE EXISTS (SELECT 1 FROM airports_v2 a WHERE a.airport_code = p.{column})
+            RETURNING p.*
+        )
+        INSERT INTO {table}
+        SELECT * FROM restored r
+        WHERE NOT EXISTS (SELECT 1 FROM {table} t WHERE t.{column} = r.{column})
+    """)
+
+
+def _swap_table_statements(cur, table: str, incoming_suffix: str, outgoing_suffix: str) -> list[str]:
+    """DDL that renames table (and its indexes/FKs) out and table+incoming_suffix in."""
+    incoming = f"{table}{incoming_suffix}"
+    outgoing = f"{table}{outgoing_suffix}"
+
+    live_indexes, live_foreign_keys = _table_object_names(cur, table)
+    incoming_indexes, incoming_foreign_keys = _table_object_names(cur, incoming)
+    cur.execute(
+        """
+        SELECT attname, pg_get_serial_sequence(%s, attname)
+        FROM pg_attribute
+        WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped
+        """,
+        (table, table),
+    )
+    sequences = [(column, sequence) for column, sequence in cur.fetchall() if sequence]
+
+    # Renaming a key's index renames the constraint with it
+    statements = [f"ALTER INDEX {name} RENAME TO {name}{outgoing_suffix}" for name in live_indexes]
+    statements += [
+        f"ALTER TABLE {table} RENAME CONSTRAINT {name} TO {name}{outgoing_suffix}" for name in live_foreign_keys
+    ]
+    statements.append(f"ALTER TABLE {table} RENAME TO {outgoing}")
+
+    statements += [f"ALTER INDEX {name} RENAME TO {name.removesuffix(incoming_suffix)}" for name in incoming_indexes]
+    statements += [
+        f"ALTER TABLE {incoming} RENAME CONSTRAINT {name} TO {name.removesuffix(incoming_suffix)}"
+        for name in incoming_foreign_keys
+    ]
+    statements.append(f"ALTER TABLE {incoming} RENAME TO {table}")
+
+    # Serial sequences are shared by all generations; keep them owned by the live table
+    # so dropping an old generation never drops the sequence
+    statements += [f"ALTER SEQUENCE {sequence} OWNED BY {table}.{column}" for column, sequence in sequences]
+    return statements
+
+
+def _swap_generations(cur, incoming_suffix: str, outgoing_suffix: str):
+    """
+    Rename the incoming generation into place and the live one out of the way.
+    Catalog lookups run first; the renames are then sent as one pipelined batch.
+    All of it is catalog-only, so the ACCESS EXCLUSIVE lock is held for
+    milliseconds (until the surrounding transaction commits).
+    FKs from other tables into airports_v2 are re-pointed at the new live table.
+    Their rows follow code changes between the two generations (in either
+    direction, so a rollback undoes them); rows for airports the incoming
+    generation lacks are parked in <table>_parked, and parked rows whose airport
+    is back are restored.
+    """
+    with cur.connection.pipeline():
+        for table in reversed(SHADOW_TABLES):
+            cur.execute(f"DROP TABLE IF EXISTS {table}{outgoing_suffix} CASCADE")
+        cur.execute(f"LOCK TABLE {', '.join(SHADOW_TABLES)} IN ACCESS EXCLUSIVE MODE")
+
+    _create_rename_map(cur, f"airports_v2{incoming_suffix}")
+    external_foreign_keys = _external_foreign_keys(cur)
+    statements = []
+    for table in SHADOW_TABLES:
+        statements += _swap_table_statements(cur, table, incoming_suffix, outgoing_suffix)
+
+    with cur.connection.pipeline():
+        for statement in statements:
+            cur.execute(statement)
+
+        for table, name, definition, column in external_foreign_keys:
+            cur.execute(f"ALTER TABLE {table} DROP CONSTRAINT {name}")
+            cur.execute(f"""
+                UPDATE {table} t
+                SET {column} = '~rename~' || r.old_code
+                FROM airports_v2_renames r
+                WHERE t.{column} = r.old_code
+                  AND NOT EXISTS (
+                      SELECT 1 FROM {table} k
+                      WHERE k.{column} = r.new_code
+                        AND NOT EXISTS (SELECT 1 FROM airports_v2_renames o WHERE o.old_code = k.{column})
+                  )
+            """)
+            cur.execute(f"""
+                UPDATE {table} t
+                SET {column} = r.new_code
+                FROM airports_v2_renames r
+                WHERE t.{column} = '~rename~' || r.old_code
+            """)
+
+            _restore_parked_rows(cur, table, column)
+            _park_rows(
+                cur,
+                table,
+                column,
+                f"NOT EXISTS (SELECT 1 FROM airports_v2 a WHERE a.airport_code = t.{column})",
             )
-            ON CONFLICT (airport_code) DO UPDATE SET
-                site_no = EXCLUDED.site_no,
-                airport_name = EXCLUDED.airport_name,
-                city = EXCLUDED.city,
-                state = EXCLUDED.state,
-                country = EXCLUDED.country,
-                lat = EXCLUDED.lat,
-                lon = EXCLUDED.lon,
-                elevation = EXCLUDED.elevation,
-                airspace_class = EXCLUDED.airspace_class,
-                fuel_raw = EXCLUDED.fuel_raw,
-                remarks = EXCLUDED.remarks,
-                raw_json = EXCLUDED.raw_json
+            cur.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}")
+
+
+def activate_shadow_generation(cur):
+    """Validate the *_next tables and swap them in; the replaced tables are kept as *_prev for rollback."""
+    validate_generation(cur, SHADOW_NEXT_SUFFIX)
+    _swap_generations(cur, SHADOW_NEXT_SUFFIX, SHADOW_PREV_SUFFIX)
+
+
+def rollback_airports_v2_generation(cur):
+    """Swap the *_prev tables back in; the rolled-back tables are kept as *_next."""
+    for table in SHADOW_TABLES:
+        cur.execute("SELECT to_regclass(%s)", (f"{table}{SHADOW_PREV_SUFFIX}",))
+        if cur.fetchone()[0] is None:
+            raise RuntimeError(f"No previous generation to roll back to ({table}{SHADOW_PREV_SUFFIX} is missing)")
+    _swap_generations(cur, SHADOW_PREV_SUFFIX, SHADOW_NEXT_SUFFIX)
+
+
+def validate_generation(cur, suffix: str):
+    """
+    Checks a built generation must pass before it may go live:
+    - it has airports, and at least STAGED_MIN_AIRPORT_RATIO of the live count
+    - no runway or approach row points at a missing airport
+    Raises RuntimeError on failure.
+    """
+    shadow = f"airports_v2{suffix}"
+    cur.execute(f"""
+        SELECT
+            (SELECT count(*) FROM {shadow}),
+            (SELECT count(*) FROM airports_v2),
+            (SELECT count(*) FROM airport_runways_v2{suffix} c
+             WHERE NOT EXISTS (SELECT 1 FROM {shadow} a WHERE a.airport_code = c.airport_code)),
+            (SELECT count(*) FROM airport_approaches_v2{suffix} c
+             WHERE NOT EXISTS (SELECT 1 FROM {shadow} a WHERE a.airport_code = c.airport_code))
+    """)
+    airport_count, live_count, orphan_runways, orphan_approaches = cur.fetchone()
+    if airport_count == 0:
+        raise RuntimeError(f"{shadow} is empty")
+    if airport_count < live_count * STAGED_MIN_AIRPORT_RATIO:
+        raise RuntimeError(
+            f"{shadow} has {airport_count} airports, fewer than {STAGED_MIN_AIRPORT_RATIO:.0%} "
+            f"of the {live_count} live ones"
+        )
+    if orphan_runways or orphan_approaches:
+        raise RuntimeError(
+            f"{shadow} generation has {orphan_runways} runways and {orphan_approaches} approaches without an airport"
+        )
+
+
+def staged_generation_ready(cur) -> bool:
+    """True when every *_staged table exists with the live table's columns."""
+    for table in SHADOW_TABLES:
+        cur.execute(
+            """
+            SELECT
+                ARRAY(SELECT attname::text FROM pg_attribute
+                      WHERE attrelid = to_regclass(%s) AND attnum > 0 AND NOT attisdropped
+                      ORDER BY attname)
+              = ARRAY(SELECT attname::text FROM pg_attribute
+                      WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped
+                      ORDER BY attname)
             """,
-            (
-                airport_code,
-                rec.get("site_no"),
-                rec.get("airport_name"),
-                rec.get("city"),
-                rec.get("state"),
-                rec.get("country") or "US",
-                rec.get("lat"),
-                rec.get("lon"),
-                rec.get("elevation"),
-                rec.get("airspace"),
-                rec.get("fuel"),
-                rec.get("remarks"),
-                json.dumps(rec, ensure_ascii=False),
+            (f"{table}{STAGED_SUFFIX}", table),
+        )
+        if not cur.fetchone()[0]:
+            return False
+    return True
+
+
+def get_staged_cycle(cur, dataset_name: str) -> dict | None:
+    """The dataset_versions row of the pre-staged cycle (dataset_name + STAGED_SUFFIX), if any."""
+    cur.execute(
+        """
+        SELECT effective_date, faa_cycle, airport_count, runway_count,
+               approach_airport_count, approach_count, details
+        FROM dataset_versions
+        WHERE dataset_name = %s
+        """,
+        (f"{dataset_name}{STAGED_SUFFIX}",),
+    )
+    row = cur.fetchone()
+    if not row:
+        return None
+    keys = (
+        "effective_date",
+        "faa_cycle",
+        "airport_count",
+        "runway_count",
+        "approach_airport_count",
+        "approach_count",
+        "details",
+    )
+    return dict(zip(keys, row))
+
+
+def get_referenced_cycle_artifacts(cur, dataset_name: str) -> tuple[set[str], set[str]]:
+    """Effective dates and snapshot/graph file names of the live and staged dataset_versions rows."""
+    cur.execute(
+        "SELECT effective_date, details FROM dataset_versions WHERE dataset_name = ANY(%s)",
+        ([dataset_name, f"{dataset_name}{STAGED_SUFFIX}"],),
+    )
+    dates: set[str] = set()
+    files: set[str] = set()
+    for effective_date, details in cur.fetchall():
+        dates.add(effective_date)
+        details = details or {}
+        files.update((details.get("snapshot") or {}).get("files", {}).values())
+        graph_file = (details.get("neighbor_graph") or {}).get("file")
+        if graph_file:
+            files.add(graph_file)
+    return dates, files
+
+
+def record_dtpp_version(
+    cur, dataset_name: str, effective_date: str, xml_cycle: str, approach_airport_count, approach_count, details
+):
+    """
+    Record the d-TPP cycle now behind airport_approaches_v2 as dataset_name +
+    DTPP_DATASET_SUFFIX. Its details carry pdf_base_url, the cycle's chart
+    directory, which the API joins onto each approach's pdf_name.
+    """
+    upsert_dataset_version(
+        cur,
+        dataset_name=f"{dataset_name}{DTPP_DATASET_SUFFIX}",
+        effective_date=effective_date,
+        faa_cycle=xml_cycle,
+        airport_count=None,
+        runway_count=None,
+        approach_airport_count=approach_airport_count,
+        approach_count=approach_count,
+        details=details,
+    )
+
+
+def activate_staged_cycle(cur, dataset_name: str, staged: dict, started_at):
+    """
+    Cutover for a pre-staged cycle: swap the *_staged tables in (the replaced
+    tables are kept as *_prev for rollback) and move the staged dataset_versions
+    row over the live one. Catalog renames and a few metadata writes only.
+    """
+    _swap_generations(cur, STAGED_SUFFIX, SHADOW_PREV_SUFFIX)
+
+    details = dict(staged["details"] or {}, activated_at=now_utc().isoformat())
+    with cur.connection.pipeline():
+        upsert_dataset_version(
+            cur,
+            dataset_name=dataset_name,
+            effective_date=staged["effective_date"],
+            faa_cycle=staged["faa_cycle"],
+            airport_count=staged["airport_count"],
+            runway_count=staged["runway_count"],
+            approach_airport_count=staged["approach_airport_count"],
+            approach_count=staged["approach_count"],
+            details=details,
+        )
+        record_dtpp_version(
+            cur,
+            dataset_name,
+            effective_date=staged["effective_date"],
+            xml_cycle=details["xml_cycle"],
+            approach_airport_count=staged["approach_airport_count"],
+            approach_count=staged["approach_count"],
+            details={"xml_cycle": details["xml_cycle"], "pdf_base_url": details["pdf_base_url"]},
+        )
+        cur.execute("DELETE FROM dataset_versions WHERE dataset_name = %s", (f"{dataset_name}{STAGED_SUFFIX}",))
+        insert_history_row(
+            cur,
+            dataset_name=dataset_name,
+            effective_date=staged["effective_date"],
+            faa_cycle=staged["faa_cycle"],
+            airport_count=staged["airport_count"],
+            runway_count=staged["runway_count"],
+            approach_airport_count=staged["approach_airport_count"],
+            approach_count=staged["approach_count"],
+            started_at=started_at,
+            status="activated",
+            message="Pre-staged cycle activated",
+            details=details,
+        )
+
+
+def load_neighbor_graph_table(cur, graph, max_nm: float = NEIGHBOR_GRAPH_DB_RADIUS_NM) -> int:
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS airport_neighbors_v2 (
+            airport_code text NOT NULL,
+            neighbor_code text NOT NULL,
+            distance_nm real NOT NULL,
+            PRIMARY KEY (airport_code, neighbor_code)
+        )
+    """)
+    cur.execute("TRUNCATE TABLE airport_neighbors_v2")
+
+    # The edge arrays go out as binary COPY rows built in one numpy pass (positions and
+    # distances); positions are mapped to codes server-side instead of per edge in Python
+    sources = np.repeat(np.arange(len(graph), dtype=np.int32), np.diff(graph.indptr))
+    edges = np.flatnonzero(graph.distances <= max_nm)
+    with cur.connection.pipeline():
+        cur.execute("DROP TABLE IF EXISTS airport_neighbors_v2_stage")
+        cur.execute("""
+            CREATE TEMP TABLE airport_neighbors_v2_stage (
+                airport_pos integer,
+                neighbor_pos integer,
+                distance_nm real
+            ) ON COMMIT DROP
+        """)
+        cur.execute("DROP TABLE IF EXISTS airport_neighbors_v2_codes")
+        cur.execute("""
+            CREATE TEMP TABLE airport_neighbors_v2_codes (
+                pos integer PRIMARY KEY,
+                airport_code text
+            ) ON COMMIT DROP
+        """)
+    with cur.copy("COPY airport_neighbors_v2_codes (pos, airport_code) FROM STDIN") as copy:
+        for pos, airport_code in enumerate(graph.codes.tolist()):
+            copy.write_row((pos, airport_code))
+
+    row_type = np.dtype(
+        [("fields", ">i2"), ("len1", ">i4"), ("airport_pos", ">i4"), ("len2", ">i4"), ("neighbor_pos", ">i4"),
+         ("len3", ">i4"), ("distance_nm", ">f4")]
+    )
+    with cur.copy("COPY airport_neighbors_v2_stage FROM STDIN (FORMAT BINARY)") as copy:
+        copy.write(b"PGCOPY\n\xff\r\n\x00" + bytes(8))
+        for start in range(0, len(edges), NEIGHBOR_COPY_CHUNK_EDGES):
+            chunk = edges[start:start + NEIGHBOR_COPY_CHUNK_EDGES]
+            rows = np.empty(len(chunk), dtype=row_type)
+            rows["fields"] = 3
+            rows["len1"] = rows["len2"] = rows["len3"] = 4
+            rows["airport_pos"] = sources[chunk]
+            rows["neighbor_pos"] = graph.indices[chunk]
+            rows["distance_nm"] = graph.distances[chunk]
+            copy.write(rows.tobytes())
+        copy.write(b"\xff\xff")
+
+    cur.execute("""
+        INSERT INTO airport_neighbors_v2 (airport_code, neighbor_code, distance_nm)
+        SELECT a.airport_code, n.airport_code, s.distance_nm
+        FROM airport_neighbors_v2_stage s
+        JOIN airport_neighbors_v2_codes a ON a.pos = s.airport_pos
+        JOIN airport_neighbors_v2_codes n ON n.pos = s.neighbor_pos
+    """)
+    return len(edges)
+
+
+def compact_base_airport(airport_code: str, rec: dict) -> dict:
+    """Same short-key shape as compactBaseAirport in netlify/functions/airport-data.js."""
+    runway_summary = rec.get("runway_summary") or {}
+    approach_summary = summarize_approaches(rec.get("approaches", []))
+    return {
+        "c": str(airport_code or "").strip().upper(),
+        "n": rec.get("airport_name") or "",
+        "ci": rec.get("city") or "",
+        "s": rec.get("state") or "unknown",
+        "co": rec.get("country") or "US",
+        "la": float(rec["lat"]),
+        "lo": float(rec["lon"]),
+        "e": float(rec.get("elevation") or 0),
+        "a": rec.get("airspace") or "G",
+        "f": rec.get("fuel") or "None",
+        "rm": [int(runway_summary.get(surface, 0)) for surface in RUNWAY_SUMMARY_SURFACES],
+        "ac": approach_summary["count"],
+        "ab": (
+            (1 if approach_summary["has_rnav"] else 0)
+            + (2 if approach_summary["has_ilsloc"] else 0)
+            + (4 if approach_summary["has_vorndb"] else 0)
+        ),
+    }
+
+
+def _write_atomic(path: Path, payload: bytes):
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.write_bytes(payload)
+    tmp_path.replace(path)
+
+
+def write_base_snapshot(airport_data: dict[str, dict], effective_date: str, out_dir: Path = SNAPSHOT_ROOT) -> dict:
+    """
+    Emit the base airport list for one cycle as an immutable, content-hashed
+    JSON file plus precompressed .gz / .br variants, shaped like the
+    airport-data.js base response.
+    """
+    airports = [
+        compact_base_airport(code, airport_data[code])
+        for code in sorted(airport_data)
+        if str(code or "").strip()
+    ]
+    payload = json.dumps(
+        {
+            "databaseVersion": effective_date,
+            "airportCount": len(airports),
+            "airports": airports,
+        },
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+    sha256 = hashlib.sha256(payload).hexdigest()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    base_name = f"airports_base_{effective_date}.{sha256[:12]}.json"
+
+    files = {"json": (base_name, payload)}
+    files["gzip"] = (f"{base_name}.gz", gzip.compress(payload, compresslevel=9, mtime=0))
+    if brotli is not None:
+        files["brotli"] = (f"{base_name}.br", brotli.compress(payload, quality=11))
+    else:
+        print("brotli not installed; skipping .br snapshot")
+
+    for name, data in files.values():
+        _write_atomic(out_dir / name, data)
+
+    snapshot = {
+        "effective_date": effective_date,
+        "airport_count": len(airports),
+        "sha256": sha256,
+        "files": {kind: name for kind, (name, _) in files.items()},
+        "bytes": {kind: len(data) for kind, (_, data) in files.items()},
+    }
+    print(f"Wrote base snapshot {base_name} ({', '.join(f'{k} {v:,} B' for k, v in snapshot['bytes'].items())})")
+    return snapshot
+
+
+def publish_snapshot_manifest(snapshot: dict, out_dir: Path = SNAPSHOT_ROOT):
+    manifest = dict(snapshot, published_at=now_utc().isoformat())
+    _write_atomic(out_dir / "latest.json", json.dumps(manifest, indent=2).encode("utf-8"))
+    _write_atomic(
+        out_dir / f"airports_base_{snapshot['effective_date']}.manifest.json",
+        json.dumps(manifest, indent=2).encode("utf-8"),
+    )
+
+
+def stage_code_version(*parts) -> str:
+    """
+    Short hash of the functions and constants behind a cached stage output,
+    so editing a loader invalidates its cache entries without manual cleanup.
+    """
+    digest = hashlib.sha1()
+    for part in parts:
+        text = inspect.getsource(part) if callable(part) else json.dumps(part, sort_keys=True, default=str)
+        digest.update(text.encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+
+class StageCache:
+    """
+    Parquet copies of normalized stage outputs under json_data/tmp/<effective_date>/.
+    - entries are named <name>.<code version>.parquet; a version mismatch is a miss
+    - airport_data's version covers the versions of its inputs as well
+    - writes are atomic and drop older versions of the same entry
+    Disabled (every load misses) when pyarrow is not installed.
+    """
+
+    def __init__(self, effective_date: str, root: Path = TMP_ROOT):
+        self.dir = root / effective_date
+        self.enabled = pyarrow is not None
+
+        csv_reader = (NasrCsvSource, read_nasr_csv, clean_text)
+        self.versions = {
+            "base": stage_code_version(
+                *csv_reader, prepare_airport_base, NASR_CSV_COLUMNS["APT_BASE.csv"]
             ),
+            "runways": stage_code_version(
+                *csv_reader,
+                prepare_runways,
+                group_runways,
+                summarize_runways,
+                NASR_CSV_COLUMNS["APT_RWY.csv"],
+                RUNWAY_SUMMARY_SURFACES,
+            ),
+            "airspace": stage_code_version(
+                *csv_reader, prepare_airspace, group_airspace, NASR_CSV_COLUMNS["CLS_ARSP.csv"], AIRSPACE_CLASS_RANKS
+            ),
+            "approaches": stage_code_version(parse_d_tpp_xml, parse_d_tpp_stream),
+        }
+        self.versions["runway_summary"] = self.versions["runways"]
+        self.versions["airport_data"] = stage_code_version(build_airport_data, _text_column, dict(self.versions))
+        self.versions["artifacts"] = stage_code_version(
+            write_base_snapshot,
+            compact_base_airport,
+            build_neighbor_graph_artifact,
+            NeighborGraph.build,
+            NEIGHBOR_GRAPH_RADIUS_NM,
+            self.versions["airport_data"],
         )
 
-    # Optional cleanup: remove airports no longer present in current import
-    # This will cascade to runways/approaches only.
-    # It will also fail safely if airport_scrape_status_v2 or any other FK blocks it.
-    cur.execute("SELECT airport_code, site_no FROM airports_v2")
-    existing_rows = cur.fetchall()
+    def _path(self, name: str) -> Path:
+        return self.dir / f"{name}.{self.versions[name]}.parquet"
+
+    def _load(self, name: str):
+        path = self._path(name)
+        if not self.enabled or not path.exists():
+            return None
+        try:
+            table = parquet.read_table(path)
+        except (OSError, pyarrow.ArrowInvalid) as e:
+            print(f"Ignoring unreadable stage cache {path.name}: {e}")
+            return None
+        meta = json.loads((table.schema.metadata or {}).get(b"xc_meta", b"{}"))
+        return table, meta
+
+    def _save(self, name: str, table, meta: dict | None = None):
+        if not self.enabled:
+            return
+        self.dir.mkdir(parents=True, exist_ok=True)
+        table = table.replace_schema_metadata(
+            {**(table.schema.metadata or {}), b"xc_meta": json.dumps(meta or {}).encode("utf-8")}
+        )
+        path = self._path(name)
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        parquet.write_table(table, tmp_path)
+        tmp_path.replace(path)
+        for stale in self.dir.glob(f"{name}.*.parquet"):
+            if stale != path:
+                stale.unlink(missing_ok=True)
+
+    def _load_keyed(self, name: str, key: str) -> tuple[list[tuple[str, dict]], dict] | None:
+        cached = self._load(name)
+        if cached is None:
+            return None
+        table, meta = cached
+        return [(row.pop(key), row) for row in table.to_pylist()], meta
+
+    def _save_keyed(self, name: str, key: str, rows, meta: dict | None = None):
+        self._save(name, pyarrow.Table.from_pylist([{key: k, **v} for k, v in rows]), meta)
+
+    def load_nasr(self):
+        """(df_base, rwy_dict, rwy_summary, airspace_info) if all four entries are cached, else None."""
+        base = self._load("base")
+        runways = self._load_keyed("runways", "SITE_NO")
+        runway_summary = self._load_keyed("runway_summary", "SITE_NO")
+        airspace = self._load_keyed("airspace", "SITE_NO")
+        if base is None or runways is None or runway_summary is None or airspace is None:
+            return None
+
+        rwy_dict: dict[str, list[dict]] = {}
+        for site_no, rwy in runways[0]:
+            rwy_dict.setdefault(site_no, []).append(rwy)
+        return base[0].to_pandas(), rwy_dict, dict(runway_summary[0]), dict(airspace[0])
+
+    def save_nasr(self, df_base, rwy_dict, rwy_summary, airspace_info):
+        if not self.enabled:
+            return
+        self._save("base", pyarrow.Table.from_pandas(df_base, preserve_index=False))
+        self._save_keyed(
+            "runways", "SITE_NO", ((site_no, rwy) for site_no, rwys in rwy_dict.items() for rwy in rwys)
+        )
+        self._save_keyed("runway_summary", "SITE_NO", rwy_summary.items())
+        self._save_keyed("airspace", "SITE_NO", airspace_info.items())
+
+    def load_approaches(self, cycle: str):
+        """(approach_dict, xml_cycle) or None; entries fetched for another d-TPP cycle are a miss."""
+        cached = self._load_keyed("approaches", "airport_code")
+        if cached is None:
+            return None
+        rows, meta = cached
+        if meta.get("dtpp_cycle") != cycle:
+            return None
+        approach_dict: dict[str, list[dict]] = {}
+        for airport_code, ap in rows:
+            approach_dict.setdefault(airport_code, []).append(ap)
+        return approach_dict, meta["xml_cycle"]
+
+    def save_approaches(self, approach_dict, cycle: str, xml_cycle):
+        if not self.enabled:
+            return
+        self._save_keyed(
+            "approaches",
+            "airport_code",
+            ((airport_code, ap) for airport_code, aps in approach_dict.items() for ap in aps),
+            {"dtpp_cycle": cycle, "xml_cycle": xml_cycle},
+        )
 
-    codes_to_delete = []
-    for airport_code, site_no in existing_rows:
-        airport_code = str(airport_code)
-        site_no = str(site_no) if site_no is not None else None
+    def load_airport_data(self, cycle: str):
+        """(airport_data, meta) or None; meta carries the d-TPP counts and cycle, which must be this one."""
+        cached = self._load_keyed("airport_data", "airport_code")
+        if cached is None:
+            return None
+        rows, meta = cached
+        if meta.get("dtpp_cycle") != cycle:
+            return None
+        return dict(rows), meta
+
+    def save_airport_data(self, airport_data, meta: dict):
+        if not self.enabled:
+            return
+        self._save_keyed("airport_data", "airport_code", airport_data.items(), meta)
 
-        if airport_code in seen_codes:
-            continue
-        if site_no and site_no in seen_site_nos:
+    def load_artifacts(self):
+        """
+        Snapshot and neighbor graph details written from the cached airport_data, or None
+        if they are not cached or their files under json_data/ have since been removed.
+        """
+        path = self.dir / f"artifacts.{self.versions['artifacts']}.json"
+        if not self.enabled or not path.is_file():
+            return None
+        try:
+            artifacts = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable stage cache {path.name}: {e}")
+            return None
+        files = [SNAPSHOT_ROOT / name for name in artifacts["snapshot"]["files"].values()]
+        files.append(GRAPH_ROOT / artifacts["neighbor_graph"]["file"])
+        if not all(f.is_file() for f in files):
+            return None
+        return artifacts
+
+    def save_artifacts(self, snapshot: dict, neighbor_graph: dict):
+        if not self.enabled:
+            return
+        self.dir.mkdir(parents=True, exist_ok=True)
+        path = self.dir / f"artifacts.{self.versions['artifacts']}.json"
+        _write_atomic(path, json.dumps({"snapshot": snapshot, "neighbor_graph": neighbor_graph}).encode("utf-8"))
+        for stale in self.dir.glob("artifacts.*.json"):
+            if stale != path:
+                stale.unlink(missing_ok=True)
+
+
+def prune_cycle_artifacts(
+    referenced_dates: set[str],
+    referenced_files: set[str],
+    keep: int = CYCLE_ARTIFACT_KEEP,
+    tmp_root: Path = TMP_ROOT,
+    snapshot_root: Path = SNAPSHOT_ROOT,
+    graph_root: Path = GRAPH_ROOT,
+):
+    """
+    Drop per-cycle outputs nothing points at any more, like prune_download_cache.
+    - stage-cache directories (tmp_root/<effective_date>/) are kept for the
+      referenced dates plus the newest `keep` others
+    - snapshot and neighbor graph files are kept when the referenced rows,
+      latest.json or a kept stage cache's artifacts entry name them; a
+      cycle's snapshot manifest is kept along with its stage cache
+    """
+    date_dirs = sorted(
+        (d for d in tmp_root.glob("*") if d.is_dir() and re.fullmatch(r"\d{4}-\d{2}-\d{2}", d.name)),
+        key=lambda d: d.name,
+        reverse=True,
+    )
+    kept_dates = set(referenced_dates)
+    kept_dates.update([d.name for d in date_dirs if d.name not in referenced_dates][:keep])
+    for date_dir in date_dirs:
+        if date_dir.name not in kept_dates:
+            shutil.rmtree(date_dir, ignore_errors=True)
+
+    referenced = set(referenced_files)
+    manifest_paths = [snapshot_root / "latest.json"]
+    for date in kept_dates:
+        manifest_paths.extend((tmp_root / date).glob("artifacts.*.json"))
+    for manifest_path in manifest_paths:
+        try:
+            manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
             continue
+        snapshot = manifest.get("snapshot", manifest)
+        referenced.update((snapshot.get("files") or {}).values())
+        graph_file = (manifest.get("neighbor_graph") or {}).get("file")
+        if graph_file:
+            referenced.add(graph_file)
+    referenced.update(f"airports_base_{date}.manifest.json" for date in kept_dates)
 
-        codes_to_delete.append(airport_code)
+    for path in [*snapshot_root.glob("airports_base_*"), *graph_root.glob("airport_neighbors_*.npz")]:
+        if path.name not in referenced:
+            path.unlink(missing_ok=True)
 
-    for airport_code in codes_to_delete:
-        cur.execute("DELETE FROM airports_v2 WHERE airport_code = %s", (airport_code,))
 
+def load_nasr_csv_data(
+    zip_url: str, metrics: PipelineMetrics, cache: StageCache, reuse: bool = True, required: bool = False
+):
+    if reuse:
+        with metrics.stage("load_cached_nasr") as stage:
+            cached = cache.load_nasr()
+        if cached is not None:
+            stage["rows"] = len(cached[0])
+            print(f"Using cached NASR tables from {cache.dir}")
+            return cached
+        if required:
+            raise RuntimeError(f"No valid cached NASR tables in {cache.dir}; run without --start-from first")
+
+    with metrics.stage("download") as stage:
+        zip_path = download_to_cache(zip_url)
+        stage["bytes"] = zip_path.stat().st_size
+
+    with ExitStack() as stack:
+        with metrics.stage("extract"):
+            csv_source = stack.enter_context(NasrCsvSource(zip_path))
+
+        if CSV_WORKERS > 1:
+            with metrics.stage("load_nasr_tables_parallel") as stage:
+                df_base, rwy_dict, rwy_summary, airspace_info = load_nasr_tables_parallel(csv_source, CSV_WORKERS, stage)
+                stage["workers"] = CSV_WORKERS
+                stage["rows"] = len(df_base) + sum(len(v) for v in rwy_dict.values()) + len(airspace_info)
+        else:
+            with metrics.stage("load_airport_base") as stage:
+                df_base = load_airport_base(csv_source)
+                stage["rows"] = len(df_base)
+
+            with metrics.stage("load_runways") as stage:
+                rwy_dict, rwy_summary = load_runways(csv_source)
+                stage["rows"] = sum(len(v) for v in rwy_dict.values())
+
+            with metrics.stage("load_airspace") as stage:
+                airspace_info = load_airspace(csv_source)
+                stage["rows"] = len(airspace_info)
+
+    cache.save_nasr(df_base, rwy_dict, rwy_summary, airspace_info)
+    return df_base, rwy_dict, rwy_summary, airspace_info
+
+
+def load_d_tpp_data(
+    xml_url: str,
+    cycle: str,
+    metrics: PipelineMetrics,
+    cache: StageCache,
+    reuse: bool = True,
+    required: bool = False,
+):
+    if reuse:
+        cached = cache.load_approaches(cycle)
+        if cached is not None:
+            print(f"Using cached d-TPP approaches from {cache.dir}")
+            return cached
+        if required:
+            raise RuntimeError(f"No valid cached d-TPP approaches in {cache.dir}; run without --start-from first")
+
+    with metrics.stage("parse_d_tpp_xml") as stage:
+        approach_dict, xml_cycle = parse_d_tpp_xml(xml_url, cycle)
+        stage["rows"] = sum(len(v) for v in approach_dict.values())
+    cache.save_approaches(approach_dict, cycle, xml_cycle)
+    return approach_dict, xml_cycle
+
+
+def fetch_and_parse_cycle(
+    effective_date: str,
+    cycle: str,
+    metrics: PipelineMetrics,
+    cache: StageCache,
+    reuse: bool = True,
+    required: bool = False,
+):
+    """(df_base, rwy_dict, rwy_summary, airspace_info, approach_dict, xml_cycle) for one NASR cycle and d-TPP cycle."""
+    zip_url = ZIP_BASE_URL.format(effective_date)
+    dtpp_xml_url = DTPP_XML_URL.format(cycle)
 
-def refresh_runways_and_approaches(cur, airport_data: dict[str, dict]):
-    cur.execute("TRUNCATE TABLE airport_approaches_v2 RESTART IDENTITY CASCADE")
-    cur.execute("TRUNCATE TABLE airport_runways_v2 RESTART IDENTITY CASCADE")
+    # The NASR archive and the d-TPP metafile are independent; fetch and parse them side by side
+    with metrics.stage("fetch_and_parse"), ThreadPoolExecutor(max_workers=2, thread_name_prefix="fetch") as pool:
+        nasr_future = pool.submit(load_nasr_csv_data, zip_url, metrics, cache, reuse, required)
+        dtpp_future = pool.submit(load_d_tpp_data, dtpp_xml_url, cycle, metrics, cache, reuse, required)
+        df_base, rwy_dict, rwy_summary, airspace_info = nasr_future.result()
+        approach_dict, xml_cycle = dtpp_future.result()
+    return df_base, rwy_dict, rwy_summary, airspace_info, approach_dict, xml_cycle
+
+
+def build_and_cache_airport_data(parsed, cycle: str, metrics: PipelineMetrics, cache: StageCache) -> tuple[dict, dict]:
+    """(airport_data, meta) from fetch_and_parse_cycle output; meta carries the d-TPP counts and cycle."""
+    df_base, rwy_dict, rwy_summary, airspace_info, approach_dict, xml_cycle = parsed
+    with metrics.stage("build_airport_data") as stage:
+        airport_data = build_airport_data(df_base, rwy_dict, rwy_summary, airspace_info, approach_dict)
+        stage["rows"] = len(airport_data)
+
+    meta = {
+        "dtpp_cycle": cycle,
+        "xml_cycle": xml_cycle,
+        "approach_airport_count": len(approach_dict),
+        "approach_count": sum(len(v) for v in approach_dict.values()),
+    }
+    cache.save_airport_data(airport_data, meta)
+    return airport_data, meta
+
+
+def stage_preview_cycle(db: DbSession, dataset_name: str, preview_date: str, started_at):
+    """
+    Build the upcoming (Preview) cycle into the *_staged tables ahead of its
+    effective date, validate it and record it as dataset_name + STAGED_SUFFIX in
+    dataset_versions. Artifacts are written but the snapshot manifest is only
+    published at activation. A later run swaps the generation in once the
+    effective date arrives (activate_staged_cycle).
+    A failure is logged and recorded in history but never fails the run: the
+    live cycle is untouched and the next run tries again.
+    """
+    staged_dataset_name = f"{dataset_name}{STAGED_SUFFIX}"
+    cycle = get_cycle_from_effective_date(preview_date)
+    metrics = PipelineMetrics(db, trace_memory=os.environ.get("XC_TRACEMALLOC", "") == "1")
+    print(f"Pre-staging preview NASR cycle {preview_date} (FAA cycle {cycle})")
 
-    for airport_code, rec in airport_data.items():
-        for rwy in rec.get("runways", []):
-            length_ft = int(rwy["length"]) if str(rwy.get("length", "")).strip().isdigit() else None
-            width_ft = int(rwy["width"]) if str(rwy.get("width", "")).strip().isdigit() else None
-
-            cur.execute(
-                """
-                INSERT INTO airport_runways_v2 (
-                    airport_code,
-                    rwy_id,
-                    length_ft,
-                    width_ft,
-                    surface,
-                    condition
+    airport_count = runway_count = approach_airport_count = approach_count = None
+    try:
+        cache = StageCache(preview_date)
+        with metrics.stage("load_cached_airport_data"):
+            cached_build = cache.load_airport_data(cycle)
+        if cached_build is None:
+            parsed = fetch_and_parse_cycle(preview_date, cycle, metrics, cache)
+            cached_build = build_and_cache_airport_data(parsed, cycle, metrics, cache)
+        airport_data, build_meta = cached_build
+
+        airport_count = len(airport_data)
+        runway_count = sum(len(v.get("runways", [])) for v in airport_data.values())
+        approach_airport_count = build_meta["approach_airport_count"]
+        approach_count = build_meta["approach_count"]
+        details = {
+            "effective_date": preview_date,
+            "faa_cycle": cycle,
+            "xml_cycle": build_meta["xml_cycle"],
+            "pdf_base_url": DTPP_BASE_URL.format(cycle),
+            "airport_count": airport_count,
+            "runway_count": runway_count,
+            "approach_airport_count": approach_airport_count,
+            "approach_count": approach_count,
+        }
+
+        with metrics.stage("write_base_snapshot") as stage:
+            snapshot = write_base_snapshot(airport_data, preview_date)
+            stage["rows"] = snapshot["airport_count"]
+        details["snapshot"] = {k: snapshot[k] for k in ("sha256", "files", "bytes")}
+
+        with metrics.stage("build_neighbor_graph") as stage:
+            neighbor_graph, neighbor_graph_path = build_neighbor_graph_artifact(airport_data, preview_date)
+            stage["rows"] = neighbor_graph.edge_count
+        details["neighbor_graph"] = {
+            "file": neighbor_graph_path.name,
+            "radius_nm": neighbor_graph.radius_nm,
+            "edge_count": neighbor_graph.edge_count,
+        }
+
+        with db.cursor() as cur:
+            with metrics.stage("stage_preview_generation") as stage:
+                details["changes"] = shadow_build_airports_v2(cur, airport_data, STAGED_SUFFIX)
+                validate_generation(cur, STAGED_SUFFIX)
+                stage["rows"] = airport_count + runway_count + approach_count
+
+            details["metrics"] = metrics.as_dict()
+            with db.pipeline():
+                upsert_dataset_version(
+                    cur,
+                    dataset_name=staged_dataset_name,
+                    effective_date=preview_date,
+                    faa_cycle=cycle,
+                    airport_count=airport_count,
+                    runway_count=runway_count,
+                    approach_airport_count=approach_airport_count,
+                    approach_count=approach_count,
+                    details=details,
                 )
-                VALUES (%s, %s, %s, %s, %s, %s)
-                """,
-                (
-                    airport_code,
-                    rwy.get("rwy_id"),
-                    length_ft,
-                    width_ft,
-                    rwy.get("surface"),
-                    rwy.get("condition"),
-                ),
+                insert_history_row(
+                    cur,
+                    dataset_name=staged_dataset_name,
+                    effective_date=preview_date,
+                    faa_cycle=cycle,
+                    airport_count=airport_count,
+                    runway_count=runway_count,
+                    approach_airport_count=approach_airport_count,
+                    approach_count=approach_count,
+                    started_at=started_at,
+                    status="staged",
+                    message="Preview cycle staged",
+                    details=details,
+                )
+        db.commit()
+        print(f"Staged preview cycle {preview_date}; it goes live on the first run on or after that date")
+
+    except Exception as e:
+        print(f"Pre-staging preview cycle {preview_date} failed: {e}")
+        try:
+            db.rollback()
+            with db.cursor() as cur:
+                insert_history_row(
+                    cur,
+                    dataset_name=staged_dataset_name,
+                    effective_date=preview_date,
+                    faa_cycle=cycle,
+                    airport_count=airport_count,
+                    runway_count=runway_count,
+                    approach_airport_count=approach_airport_count,
+                    approach_count=approach_count,
+                    started_at=started_at,
+                    status="failed",
+                    message=str(e),
+                    details={"error": str(e), "metrics": metrics.as_dict()},
+                )
+            db.commit()
+        except OperationalError as record_error:
+            print(f"Could not record the failed pre-staging: {record_error}")
+
+
+def run_approach_refresh(args, db: DbSession, dataset_name: str, started_at):
+    """
+    Refresh airport_approaches_v2 on the d-TPP cycle alone: fetch the metafile
+    for the current AIRAC cycle and apply it with apply_approach_delta.
+    Airports and runways are left to the NASR update. The applied cycle is
+    recorded as dataset_name + DTPP_DATASET_SUFFIX in dataset_versions.
+    """
+    dtpp_dataset_name = f"{dataset_name}{DTPP_DATASET_SUFFIX}"
+    metrics = PipelineMetrics(db, trace_memory=os.environ.get("XC_TRACEMALLOC", "") == "1")
+    cycle = args.dtpp_cycle or get_current_dtpp_cycle()
+    cycle_start = get_dtpp_cycle_start(cycle).isoformat()
+    print(f"Current d-TPP cycle: {cycle} (effective {cycle_start})")
+
+    with metrics.stage("version_check"), db.cursor() as cur:
+        with db.pipeline():
+            ensure_metadata_table(cur)
+            ensure_v2_tables_exist(cur)
+        stored_cycle = get_stored_dtpp_cycle(cur, dataset_name)
+        db.commit()
+
+    if stored_cycle is not None and stored_cycle >= cycle:
+        with db.cursor() as cur:
+            insert_history_row(
+                cur,
+                dataset_name=dtpp_dataset_name,
+                effective_date=cycle_start,
+                faa_cycle=cycle,
+                airport_count=None,
+                runway_count=None,
+                approach_airport_count=None,
+                approach_count=None,
+                started_at=started_at,
+                status="skipped",
+                message="Approaches already up to date",
+                details={"stored_cycle": stored_cycle, "metrics": metrics.as_dict()},
             )
+        db.commit()
+        print(f"Approaches already up to date: d-TPP cycle {stored_cycle}")
+        if args.metrics_report:
+            metrics.write_report(args.metrics_report, {"status": "skipped", "dtpp_cycle": cycle})
+        return
+
+    approach_airport_count = None
+    approach_count = None
+    try:
+        with metrics.stage("parse_d_tpp_xml") as stage:
+            approach_dict, xml_cycle = parse_d_tpp_xml(DTPP_XML_URL.format(cycle), cycle)
+            approach_airport_count = len(approach_dict)
+            approach_count = sum(len(v) for v in approach_dict.values())
+            stage["rows"] = approach_count
+        print(f"Loaded {approach_airport_count} airports with approach plates from d-TPP XML (cycle {xml_cycle})")
 
-        for ap in rec.get("approaches", []):
-            cur.execute(
-                """
-                INSERT INTO airport_approaches_v2 (
-                    airport_code,
-                    approach_name,
-                    pdf_url,
-                    procuid,
-                    amdt_num,
-                    amdt_date
+        with db.cursor() as cur:
+            with metrics.stage("apply_approach_delta") as stage:
+                changes = apply_approach_delta(cur, approach_dict)
+                stage["rows"] = approach_count
+
+            details = {
+                "dtpp_cycle": cycle,
+                "xml_cycle": xml_cycle,
+                "pdf_base_url": DTPP_BASE_URL.format(cycle),
+                "approach_airport_count": approach_airport_count,
+                "approach_count": approach_count,
+                "changes": {"approaches": changes},
+                "metrics": metrics.as_dict(),
+            }
+            with db.pipeline():
+                record_dtpp_version(
+                    cur,
+                    dataset_name,
+                    effective_date=cycle_start,
+                    xml_cycle=xml_cycle,
+                    approach_airport_count=approach_airport_count,
+                    approach_count=approach_count,
+                    details=details,
                 )
-                VALUES (%s, %s, %s, %s, %s, %s)
-                """,
-                (
-                    airport_code,
-                    ap.get("name"),
-                    ap.get("pdf_url"),
-                    ap.get("procuid"),
-                    ap.get("amdt_num"),
-                    ap.get("amdt_date"),
-                ),
+                insert_history_row(
+                    cur,
+                    dataset_name=dtpp_dataset_name,
+                    effective_date=cycle_start,
+                    faa_cycle=xml_cycle,
+                    airport_count=None,
+                    runway_count=None,
+                    approach_airport_count=approach_airport_count,
+                    approach_count=approach_count,
+                    started_at=started_at,
+                    status="success",
+                    message="Approaches refreshed",
+                    details=details,
+                )
+        db.commit()
+        print(f"Approaches updated to d-TPP cycle {xml_cycle}")
+        if args.metrics_report:
+            metrics.write_report(args.metrics_report, {"status": "success", **details})
+
+    except Exception as e:
+        db.rollback()
+        with db.cursor() as cur:
+            insert_history_row(
+                cur,
+                dataset_name=dtpp_dataset_name,
+                effective_date=cycle_start,
+                faa_cycle=cycle,
+                airport_count=None,
+                runway_count=None,
+                approach_airport_count=approach_airport_count,
+                approach_count=approach_count,
+                started_at=started_at,
+                status="failed",
+                message=str(e),
+                details={"error": str(e), "metrics": metrics.as_dict()},
             )
+        db.commit()
+        if args.metrics_report:
+            metrics.write_report(args.metrics_report, {"status": "failed", "error": str(e)})
+        raise
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Update the airports_v2 tables from the current FAA NASR/d-TPP cycle.")
+    parser.add_argument("--metrics-report", help="Write a JSON report of per-stage metrics to this path")
+    parser.add_argument(
+        "--rollback",
+        action="store_true",
+        help="Swap the previous airports_v2 generation (kept by shadow builds) back in and exit",
+    )
+    parser.add_argument(
+        "--start-from",
+        choices=PIPELINE_STAGES,
+        help="Load every earlier stage from the Parquet stage cache (it must be present) and recompute from this one",
+    )
+    parser.add_argument(
+        "--stop-after",
+        # Stopping after sync is a normal run, so only the earlier stages are offered
+        choices=PIPELINE_STAGES[:-1],
+        help="Stop once this stage has finished, leaving the database untouched",
+    )
+    parser.add_argument(
+        "--full-refresh",
+        action="store_true",
+        help="Run even if the database is up to date and rebuild the tables as a shadow generation swapped in whole",
+    )
+    parser.add_argument(
+        "--approaches-only",
+        action="store_true",
+        help="Apply the current d-TPP cycle to airport_approaches_v2 as a delta (no NASR update) and exit",
+    )
+    parser.add_argument(
+        "--dtpp-cycle",
+        help="d-TPP cycle for --approaches-only, e.g. 2611 (default: the AIRAC cycle in effect today)",
+    )
+    args = parser.parse_args()
+
+    with DbSession() as db:
+        run_update(args, db)
+
+
+def run_update(args, db: DbSession):
+    """
+    One update run. Every database step goes through the same DbSession
+    connection: version check, sync, history rows and the failure handler.
+    """
     started_at = now_utc()
+    dataset_name = "airports_v2_source"
 
-    effective_date = get_current_nasr_effective_date()
+    if args.rollback:
+        with db.cursor() as cur:
+            stored_version = get_stored_effective_date(cur, dataset_name)
+            rollback_airports_v2_generation(cur)
+            insert_history_row(
+                cur,
+                dataset_name=dataset_name,
+                effective_date=stored_version,
+                faa_cycle=None,
+                airport_count=None,
+                runway_count=None,
+                approach_airport_count=None,
+                approach_count=None,
+                started_at=started_at,
+                status="rolled_back",
+                message="Previous airports_v2 generation restored",
+            )
+        db.commit()
+        print("Restored the previous airports_v2 generation")
+        return
+
+    if args.approaches_only:
+        run_approach_refresh(args, db, dataset_name, started_at)
+        return
+
+    metrics = PipelineMetrics(db, trace_memory=os.environ.get("XC_TRACEMALLOC", "") == "1")
+
+    with metrics.stage("get_nasr_effective_dates"):
+        effective_date, preview_date = get_nasr_effective_dates()
     print(f"Current NASR effective date: {effective_date}")
+    if preview_date:
+        print(f"Preview NASR effective date: {preview_date}")
 
     cycle = get_cycle_from_effective_date(effective_date)
     print(f"Current FAA cycle: {cycle}")
 
-    zip_url = ZIP_BASE_URL.format(effective_date)
-    dtpp_base_pdf_url = DTPP_BASE_URL.format(cycle)
-    dtpp_xml_url = DTPP_XML_URL.format(cycle)
-
-    dataset_name = "airports_v2_source"
-
     # Make sure metadata tables exist and check current applied version
-    with connect(DATABASE_URL) as conn:
-        with conn.cursor() as cur:
+    with metrics.stage("version_check"), db.cursor() as cur:
+        with db.pipeline():
             ensure_metadata_table(cur)
             ensure_v2_tables_exist(cur)
-            stored_version = get_stored_effective_date(cur, dataset_name)
-
-        if stored_version == effective_date:
-            with conn.cursor() as cur:
-                insert_history_row(
-                    cur,
-                    dataset_name=dataset_name,
-                    effective_date=effective_date,
-                    faa_cycle=cycle,
-                    airport_count=None,
-                    runway_count=None,
-                    approach_airport_count=None,
-                    approach_count=None,
-                    started_at=started_at,
-                    status="skipped",
-                    message="Database already up to date",
-                    details={"stored_version": stored_version},
-                )
-            conn.commit()
-            print(f"Database already up to date: {effective_date}")
+        stored_version = get_stored_effective_date(cur, dataset_name)
+        staged = get_staged_cycle(cur, dataset_name)
+        # Commit the DDL now so no locks are held while the data is fetched and parsed
+        db.commit()
+
+    # A staged cycle goes live on its effective date even if the page has not flipped yet
+    activated = False
+    if staged and staged["effective_date"] <= max(effective_date, faa_today().isoformat()):
+        with metrics.stage("activate_staged_cycle"), db.cursor() as cur:
+            if staged_generation_ready(cur):
+                activate_staged_cycle(cur, dataset_name, staged, started_at)
+                activated = True
+            else:
+                print(f"Discarding staged cycle {staged['effective_date']}: *_staged tables are missing or outdated")
+                cur.execute("DELETE FROM dataset_versions WHERE dataset_name = %s", (f"{dataset_name}{STAGED_SUFFIX}",))
+            # Commit the swap now: it holds ACCESS EXCLUSIVE locks on the live tables until then
+            db.commit()
+
+        graph_file = (staged["details"] or {}).get("neighbor_graph", {}).get("file")
+        if activated and LOAD_NEIGHBOR_GRAPH_TABLE and graph_file and (GRAPH_ROOT / graph_file).is_file():
+            with metrics.stage("load_neighbor_graph_table") as stage, db.cursor() as cur:
+                stage["rows"] = load_neighbor_graph_table(cur, NeighborGraph.load(GRAPH_ROOT / graph_file))
+                db.commit()
+
+        if activated:
+            stored_version = staged["effective_date"]
+            snapshot = dict(
+                (staged["details"] or {}).get("snapshot", {}),
+                effective_date=staged["effective_date"],
+                airport_count=staged["airport_count"],
+            )
+            if (SNAPSHOT_ROOT / snapshot.get("files", {}).get("json", "")).is_file():
+                publish_snapshot_manifest(snapshot)
+            print(f"Activated staged cycle {stored_version}")
+            with db.cursor() as cur:
+                prune_cycle_artifacts(*get_referenced_cycle_artifacts(cur, dataset_name))
+        staged = None
+
+    def stage_preview():
+        if not PRESTAGE_PREVIEW or not preview_date or (stored_version and preview_date <= stored_version):
+            return
+        if staged and staged["effective_date"] == preview_date:
+            with db.cursor() as cur:
+                ready = staged_generation_ready(cur)
+            if ready:
+                print(f"Preview cycle {preview_date} is already staged")
+                return
+        stage_preview_cycle(db, dataset_name, preview_date, started_at)
+
+    # stored_version can be ahead of the page right after a date-based activation
+    if stored_version is not None and stored_version >= effective_date and not args.full_refresh:
+        if activated:
+            # The "activated" history row already records the cycle now live
+            print(f"Database up to date with activated cycle {stored_version}")
+            if args.metrics_report:
+                metrics.write_report(args.metrics_report, {"status": "activated", "effective_date": stored_version})
+            stage_preview()
             return
 
+        # Log the live version, which can be ahead of the page's effective_date
+        with db.cursor() as cur:
+            insert_history_row(
+                cur,
+                dataset_name=dataset_name,
+                effective_date=stored_version,
+                faa_cycle=get_cycle_from_effective_date(stored_version),
+                airport_count=None,
+                runway_count=None,
+                approach_airport_count=None,
+                approach_count=None,
+                started_at=started_at,
+                status="skipped",
+                message="Database already up to date",
+                details={"page_effective_date": effective_date, "metrics": metrics.as_dict()},
+            )
+        db.commit()
+        print(f"Database already up to date: {stored_version}")
+        if args.metrics_report:
+            metrics.write_report(args.metrics_report, {"status": "skipped", "effective_date": stored_version})
+        stage_preview()
+        return
+
     airport_count = None
     runway_count = None
     approach_airport_count = None
     approach_count = None
 
-    try:
-        extract_root = TMP_ROOT / f"28DaySubscription_Effective_{effective_date}"
-        download_and_extract_csv_data(zip_url, extract_root)
-        csv_path = extract_root / "CSV_Data"
-
-        df_base = load_airport_base(csv_path)
-        rwy_dict = load_runways(csv_path)
-        airspace_info = load_airspace(csv_path)
-        approach_dict, xml_cycle = parse_d_tpp_xml(
-            dtpp_xml_url,
-            dtpp_base_pdf_url,
-            cycle,
-        )
+    cache = StageCache(effective_date)
+    start_index = PIPELINE_STAGES.index(args.start_from) if args.start_from else None
 
-        airport_data = build_airport_data(df_base, rwy_dict, airspace_info, approach_dict)
+    def reuse(stage_name: str) -> bool:
+        # Without --start-from any valid cache entry is reused; with it, only earlier stages are
+        return start_index is None or PIPELINE_STAGES.index(stage_name) < start_index
+
+    def required(stage_name: str) -> bool:
+        return start_index is not None and PIPELINE_STAGES.index(stage_name) < start_index
+
+    def stop_after(stage_name: str) -> bool:
+        if args.stop_after != stage_name:
+            return False
+        print(f"Stopping after the {stage_name} stage (stage cache: {cache.dir})")
+        if args.metrics_report:
+            metrics.write_report(args.metrics_report, {"status": "stopped", "stage": stage_name})
+        return True
+
+    try:
+        cached_build = None
+        if reuse("build"):
+            with metrics.stage("load_cached_airport_data") as stage:
+                cached_build = cache.load_airport_data(cycle)
+                if cached_build is not None:
+                    stage["rows"] = len(cached_build[0])
+            if cached_build is None and required("build"):
+                raise RuntimeError(f"No valid cached airport_data in {cache.dir}; run without --start-from first")
+
+        if cached_build is not None:
+            airport_data, build_meta = cached_build
+            xml_cycle = build_meta["xml_cycle"]
+            approach_airport_count = build_meta["approach_airport_count"]
+            approach_count = build_meta["approach_count"]
+            print(f"Using cached airport_data from {cache.dir}")
+            if stop_after("parse"):
+                return
+        else:
+            parsed = fetch_and_parse_cycle(effective_date, cycle, metrics, cache, reuse("parse"), required("parse"))
+            if stop_after("parse"):
+                return
+
+            airport_data, build_meta = build_and_cache_airport_data(parsed, cycle, metrics, cache)
+            xml_cycle = build_meta["xml_cycle"]
+            approach_airport_count = build_meta["approach_airport_count"]
+            approach_count = build_meta["approach_count"]
 
         airport_count = len(airport_data)
         runway_count = sum(len(v.get("runways", [])) for v in airport_data.values())
-        approach_airport_count = len(approach_dict)
-        approach_count = sum(len(v) for v in approach_dict.values())
 
         print(f"Loaded {approach_airport_count} airports with approach plates from d-TPP XML (cycle {xml_cycle})")
         print(f"Built airport dataset: {airport_count} airports")
+        if stop_after("build"):
+            return
 
         details = {
             "effective_date": effective_date,
             "faa_cycle": cycle,
             "xml_cycle": xml_cycle,
+            "pdf_base_url": DTPP_BASE_URL.format(cycle),
             "airport_count": airport_count,
             "runway_count": runway_count,
             "approach_airport_count": approach_airport_count,
             "approach_count": approach_count,
         }
 
-        with connect(DATABASE_URL) as conn:
-            with conn.cursor() as cur:
-                sync_airports_v2(cur, airport_data)
-                refresh_runways_and_approaches(cur, airport_data)
+        artifacts = None
+        if reuse("artifacts"):
+            artifacts = cache.load_artifacts()
+            if artifacts is None and required("artifacts"):
+                raise RuntimeError(f"No valid cached artifacts in {cache.dir}; run without --start-from first")
+
+        if artifacts is not None:
+            with metrics.stage("load_cached_artifacts") as stage:
+                snapshot = artifacts["snapshot"]
+                neighbor_graph = NeighborGraph.load(
+                    GRAPH_ROOT / artifacts["neighbor_graph"]["file"], NEIGHBOR_GRAPH_RADIUS_NM
+                )
+                stage["rows"] = neighbor_graph.edge_count
+            details["neighbor_graph"] = dict(artifacts["neighbor_graph"])
+            print(f"Using cached base snapshot {snapshot['files']['json']} and neighbor graph from {cache.dir}")
+        else:
+            with metrics.stage("write_base_snapshot") as stage:
+                snapshot = write_base_snapshot(airport_data, effective_date)
+                stage["rows"] = snapshot["airport_count"]
+
+            with metrics.stage("build_neighbor_graph") as stage:
+                neighbor_graph, neighbor_graph_path = build_neighbor_graph_artifact(airport_data, effective_date)
+                stage["rows"] = neighbor_graph.edge_count
+            details["neighbor_graph"] = {
+                "file": neighbor_graph_path.name,
+                "radius_nm": neighbor_graph.radius_nm,
+                "edge_count": neighbor_graph.edge_count,
+            }
+            print(f"Built neighbor graph: {neighbor_graph.edge_count:,} edges within {neighbor_graph.radius_nm:g} nm")
+            cache.save_artifacts(snapshot, details["neighbor_graph"])
+        details["snapshot"] = {k: snapshot[k] for k in ("sha256", "files", "bytes")}
+        if stop_after("artifacts"):
+            return
+
+        shadow_build = SHADOW_BUILD or args.full_refresh
+        with db.cursor() as cur:
+            if shadow_build:
+                with metrics.stage("shadow_build_airports_v2") as stage:
+                    details["changes"] = shadow_build_airports_v2(cur, airport_data)
+                    stage["rows"] = airport_count + runway_count + approach_count
+            else:
+                with metrics.stage("sync_airports_v2") as stage:
+                    airport_changes = sync_airports_v2(cur, airport_data)
+                    stage["rows"] = airport_count
+
+                with metrics.stage("refresh_runways_and_approaches") as stage:
+                    child_changes = refresh_runways_and_approaches(cur, airport_data)
+                    stage["rows"] = runway_count + approach_count
+
+                details["changes"] = {"airports": airport_changes, **child_changes}
+
+            if LOAD_NEIGHBOR_GRAPH_TABLE:
+                with metrics.stage("load_neighbor_graph_table") as stage:
+                    stage["rows"] = load_neighbor_graph_table(cur, neighbor_graph)
+                details["neighbor_graph"]["db_edge_count"] = stage["rows"]
 
+            # Swap last so the live tables are locked only for the rest of this transaction
+            if shadow_build:
+                with metrics.stage("activate_shadow_generation"):
+                    activate_shadow_generation(cur)
+
+            details["metrics"] = metrics.as_dict()
+
+            with db.pipeline():
                 upsert_dataset_version(
                     cur,
                     dataset_name=dataset_name,
@@ -752,6 +3290,15 @@ def main():
                     approach_count=approach_count,
                     details=details,
                 )
+                record_dtpp_version(
+                    cur,
+                    dataset_name,
+                    effective_date=effective_date,
+                    xml_cycle=xml_cycle,
+                    approach_airport_count=approach_airport_count,
+                    approach_count=approach_count,
+                    details={"xml_cycle": xml_cycle, "pdf_base_url": details["pdf_base_url"]},
+                )
 
                 insert_history_row(
                     cur,
@@ -768,31 +3315,40 @@ def main():
                     details=details,
                 )
 
-            conn.commit()
+        db.commit()
 
+        publish_snapshot_manifest(snapshot)
         print(f"Database updated successfully to {effective_date}")
-        sys.exit(1)
+        with db.cursor() as cur:
+            prune_cycle_artifacts(*get_referenced_cycle_artifacts(cur, dataset_name))
+        if args.metrics_report:
+            metrics.write_report(args.metrics_report, {"status": "success", **details})
 
     except Exception as e:
-        with connect(DATABASE_URL) as conn:
-            with conn.cursor() as cur:
-                insert_history_row(
-                    cur,
-                    dataset_name=dataset_name,
-                    effective_date=effective_date,
-                    faa_cycle=cycle,
-                    airport_count=airport_count,
-                    runway_count=runway_count,
-                    approach_airport_count=approach_airport_count,
-                    approach_count=approach_count,
-                    started_at=started_at,
-                    status="failed",
-                    message=str(e),
-                    details={"error": str(e)},
-                )
-            conn.commit()
+        # Discard the failed transaction; the history row goes out on the same connection
+        db.rollback()
+        with db.cursor() as cur:
+            insert_history_row(
+                cur,
+                dataset_name=dataset_name,
+                effective_date=effective_date,
+                faa_cycle=cycle,
+                airport_count=airport_count,
+                runway_count=runway_count,
+                approach_airport_count=approach_airport_count,
+                approach_count=approach_count,
+                started_at=started_at,
+                status="failed",
+                message=str(e),
+                details={"error": str(e), "metrics": metrics.as_dict()},
+            )
+        db.commit()
+        if args.metrics_report:
+            metrics.write_report(args.metrics_report, {"status": "failed", "error": str(e)})
         raise
 
+    stage_preview()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,644 @@
+#!/usr/bin/env python3
+
+import argparse
+import gzip
+import json
+import os
+import time
+from dataclasses import dataclass, fields, replace
+from pathlib import Path
+
+import numpy as np
+
+BASE_PATH = Path(__file__).resolve().parent
+SNAPSHOT_ROOT = BASE_PATH / "json_data" / "snapshots"
+GRAPH_ROOT = BASE_PATH / "json_data" / "graphs"
+
+EARTH_RADIUS_NM = 3440.065
+NM_PER_DEG_LAT = EARTH_RADIUS_NM * np.pi / 180.0
+# Neighbor graph reach; queries past it are answered by AirportIndex instead.
+# Saved with each graph (radius_nm) so a load can insist on a minimum
+NEIGHBOR_GRAPH_RADIUS_NM = float(os.environ.get("XC_NEIGHBOR_GRAPH_RADIUS_NM", "250"))
+
+RUNWAY_SUMMARY_SURFACES = ("ASPH", "CONC", "TURF", "OTHER")
+APPROACH_BITS = {"RNAV": 1, "ILS/LOC": 2, "VOR/NDB": 4}
+
+
+def haversine_nm(lat1, lon1, lat2, lon2):
+    """Vectorized great-circle distance in nm; same formula as haversine in src/utils/geo.js."""
+    lat1 = np.radians(lat1)
+    lat2 = np.radians(lat2)
+    d_lat = lat2 - lat1
+    d_lon = np.radians(lon2) - np.radians(lon1)
+    a = np.sin(d_lat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(d_lon / 2) ** 2
+    return EARTH_RADIUS_NM * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def _empty_triangles() -> dict:
+    return {
+        "first": np.empty(0, dtype=object),
+        "second": np.empty(0, dtype=object),
+        "leg1": np.empty(0),
+        "leg2": np.empty(0),
+        "leg3": np.empty(0),
+        "total": np.empty(0),
+    }
+
+
+@dataclass
+class CandidateFilters:
+    """Python mirror of the planner's filter state; defaults match defaultFilters in src/App.jsx."""
+
+    airspaces: tuple = ("D", "E", "G")
+    max_airport_elev: float = 6000
+    must_have_fuel: bool = True
+    surfaces: tuple = ("ASPH", "CONC")
+    min_runway_length: int = 3000
+    approaches: tuple = ("RNAV", "ILS/LOC", "VOR/NDB")
+    first_leg_min: float = 50
+    first_leg_max: float = 100
+    total_leg_min: float = 150
+    total_leg_max: float = 200
+    trip_type: str = "one"
+    sort_by: str = "leg_distance"
+
+    @classmethod
+    def from_dict(cls, filters: dict) -> "CandidateFilters":
+        """Accept the camelCase filter object used by the web client."""
+        keys = {
+            "airspaces": "airspaces",
+            "maxAirportElev": "max_airport_elev",
+            "mustHaveFuel": "must_have_fuel",
+            "surfaces": "surfaces",
+            "minRunwayLength": "min_runway_length",
+            "approaches": "approaches",
+            "firstLegMin": "first_leg_min",
+            "firstLegMax": "first_leg_max",
+            "totalLegMin": "total_leg_min",
+            "totalLegMax": "total_leg_max",
+            "tripType": "trip_type",
+            "sortBy": "sort_by",
+        }
+        names = {f.name for f in fields(cls)}
+        kwargs = {}
+        for key, value in filters.items():
+            name = keys.get(key, key)
+            if name in names:
+                kwargs[name] = tuple(value) if isinstance(value, list) else value
+        return cls(**kwargs)
+
+
+class AirportIndex:
+    """
+    Contiguous column arrays for the whole airport set, sorted by latitude
+    (ties by code, so every source of the same airports yields the same order).
+    Ring queries slice the latitude band that can contain hits (searchsorted),
+    apply filters as boolean masks and compute distances in one batched call.
+    """
+
+    def __init__(self, codes, lat, lon, elevation, airspace, fuel, names, cities, states,
+                 runway_max, approach_count, approach_bits):
+        order = np.lexsort((np.asarray(codes, dtype=str), np.asarray(lat, dtype=np.float64)))
+
+        self.codes = np.asarray(codes, dtype=object)[order]
+        self.lat = np.ascontiguousarray(np.asarray(lat, dtype=np.float64)[order])
+        self.lon = np.ascontiguousarray(np.asarray(lon, dtype=np.float64)[order])
+        self.elevation = np.asarray(elevation, dtype=np.float64)[order]
+        self.airspace = np.asarray(airspace, dtype="U1")[order]
+        self.fuel = np.asarray(fuel, dtype=object)[order]
+        self.has_fuel = self.fuel != "None"
+        self.names = np.asarray(names, dtype=object)[order]
+        self.cities = np.asarray(cities, dtype=object)[order]
+        self.states = np.asarray(states, dtype=object)[order]
+        self.runway_max = np.asarray(runway_max, dtype=np.int32).reshape(-1, len(RUNWAY_SUMMARY_SURFACES))[order]
+        self.approach_count = np.asarray(approach_count, dtype=np.int32)[order]
+        self.approach_bits = np.asarray(approach_bits, dtype=np.int8)[order]
+
+        self.position = {code: i for i, code in enumerate(self.codes.tolist())}
+
+    def __len__(self):
+        return len(self.codes)
+
+    @classmethod
+    def from_airport_data(cls, airport_data: dict[str, dict]) -> "AirportIndex":
+        """Build from the airport_data dict produced by xc_airport_db.build_airport_data."""
+        columns = {key: [] for key in (
+            "codes", "lat", "lon", "elevation", "airspace", "fuel", "names", "cities", "states",
+            "runway_max", "approach_count", "approach_bits",
+        )}
+        for code, rec in airport_data.items():
+            summary = rec.get("runway_summary") or {}
+            names = [str(ap.get("name") or "").upper() for ap in rec.get("approaches", [])]
+            bits = (
+                (1 if any("RNAV" in n for n in names) else 0)
+                + (2 if any("ILS" in n or "LOC" in n for n in names) else 0)
+                + (4 if any("VOR" in n or "NDB" in n for n in names) else 0)
+            )
+            columns["codes"].append(code)
+            columns["lat"].append(rec["lat"])
+            columns["lon"].append(rec["lon"])
+            columns["elevation"].append(rec.get("elevation") or 0)
+            columns["airspace"].append(rec.get("airspace") or "G")
+            columns["fuel"].append(rec.get("fuel") or "None")
+            columns["names"].append(rec.get("airport_name") or "")
+            columns["cities"].append(rec.get("city") or "")
+            columns["states"].append(rec.get("state") or "unknown")
+            columns["runway_max"].append([int(summary.get(s, 0)) for s in RUNWAY_SUMMARY_SURFACES])
+            columns["approach_count"].append(len(names))
+            columns["approach_bits"].append(bits)
+        return cls(**columns)
+
+    @classmethod
+    def from_snapshot(cls, path: Path) -> "AirportIndex":
+        """Build from a compact base snapshot written by xc_airport_db.write_base_snapshot."""
+        path = Path(path)
+        raw = path.read_bytes()
+        if path.suffix == ".gz":
+            raw = gzip.decompress(raw)
+        airports = json.loads(raw)["airports"]
+        return cls(
+            codes=[a["c"] for a in airports],
+            lat=[a["la"] for a in airports],
+            lon=[a["lo"] for a in airports],
+            elevation=[a["e"] for a in airports],
+            airspace=[a["a"] for a in airports],
+            fuel=[a["f"] for a in airports],
+            names=[a["n"] for a in airports],
+            cities=[a["ci"] for a in airports],
+            states=[a["s"] for a in airports],
+            runway_max=[a["rm"] for a in airports],
+            approach_count=[a["ac"] for a in airports],
+            approach_bits=[a["ab"] for a in airports],
+        )
+
+    def band(self, lat: float, radius_nm: float) -> slice:
+        """Index slice of airports whose latitude is within radius_nm of lat."""
+        delta = radius_nm / NM_PER_DEG_LAT + 1e-9
+        start = np.searchsorted(self.lat, lat - delta, side="left")
+        stop = np.searchsorted(self.lat, lat + delta, side="right")
+        return slice(int(start), int(stop))
+
+    def filter_mask(self, filters: CandidateFilters, where: slice = slice(None)) -> np.ndarray:
+        """Vectorized airportMatchesFilters over the airports in `where`."""
+        mask = np.isin(self.airspace[where], list(filters.airspaces))
+        mask &= ~(self.elevation[where] > filters.max_airport_elev)
+        if filters.must_have_fuel:
+            mask &= self.has_fuel[where]
+
+        surface_columns = [RUNWAY_SUMMARY_SURFACES.index(s) for s in filters.surfaces if s in RUNWAY_SUMMARY_SURFACES]
+        mask &= (self.runway_max[where][:, surface_columns] >= filters.min_runway_length).any(axis=1)
+
+        if filters.approaches:
+            wanted_bits = 0
+            for approach in filters.approaches:
+                wanted_bits |= APPROACH_BITS.get(approach, 0)
+            matches = (self.approach_bits[where] & wanted_bits) != 0
+            if "None" in filters.approaches:
+                matches |= self.approach_count[where] == 0
+            mask &= matches
+
+        return mask
+
+    def ring(self, home_code: str, min_nm: float, max_nm: float, exclude=()):
+        """(positions, distances) of airports with min_nm <= distance <= max_nm from home."""
+        home = self.position.get(home_code)
+        if home is None:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        window = self.band(self.lat[home], max_nm)
+        positions = np.arange(window.start, window.stop)
+        distances = haversine_nm(self.lat[home], self.lon[home], self.lat[window], self.lon[window])
+
+        keep = (distances >= min_nm) & (distances <= max_nm) & (positions != home)
+        for code in exclude:
+            excluded = self.position.get(code)
+            if excluded is not None:
+                keep &= positions != excluded
+        return positions[keep], distances[keep]
+
+    def _first_leg_window(self, home_code: str, filters: CandidateFilters):
+        positions, distances = self.ring(home_code, filters.first_leg_min, filters.first_leg_max)
+        if filters.trip_type == "two":
+            keep = distances * 2 <= filters.total_leg_max
+            positions, distances = positions[keep], distances[keep]
+        return positions, distances
+
+    def first_leg_candidates(self, home_code: str, filters: CandidateFilters) -> list[dict]:
+        """Python counterpart of findFirstLegDestinations."""
+        positions, distances = self._first_leg_window(home_code, filters)
+        keep = self._mask_at(filters, positions)
+        return self._results(positions[keep], distances[keep], filters.sort_by)
+
+    def filtered_in_range_candidates(self, home_code: str, filters: CandidateFilters) -> list[dict]:
+        """Python counterpart of findFilteredInRangeFirstLegDestinations."""
+        positions, distances = self._first_leg_window(home_code, filters)
+        keep = ~self._mask_at(filters, positions)
+        return self._results(positions[keep], distances[keep], filters.sort_by, with_airspace=True)
+
+    def nearby_outer_candidates(self, home_code: str, filters: CandidateFilters, outer_buffer_nm: float = 100) -> list[dict]:
+        """Python counterpart of findNearbyOuterFirstLegDestinations."""
+        positions, distances = self.ring(home_code, 0, filters.first_leg_max + outer_buffer_nm)
+        keep = (distances > filters.first_leg_max) & self._mask_at(filters, positions)
+        return self._results(positions[keep], distances[keep], filters.sort_by)
+
+    def second_leg_candidates(self, home_code: str, first_code: str, filters: CandidateFilters) -> list[dict]:
+        """Python counterpart of findSecondLegDestinations for one chosen first leg."""
+        trips = self.triangles(home_code, filters, first_codes=[first_code])
+        if filters.sort_by == "alphabetical":
+            order = np.argsort(trips["second"].astype(str), kind="stable")
+        elif filters.sort_by == "total_distance":
+            order = np.argsort(trips["total"], kind="stable")
+        else:
+            order = np.argsort(trips["leg2"], kind="stable")
+
+        results = []
+        for i in order:
+            pos = self.position[trips["second"][i]]
+            results.append({
+                "code": self.codes[pos],
+                "name": self.names[pos],
+                "city": self.cities[pos],
+                "state": self.states[pos],
+                "airspace": str(self.airspace[pos]),
+                "elevation": float(self.elevation[pos]),
+                "fuel": self.fuel[pos],
+                "totalDistance": float(trips["total"][i]),
+                "leg2Distance": float(trips["leg2"][i]),
+                "leg3Distance": float(trips["leg3"][i]),
+                "fromCode": first_code,
+                "homeCode": home_code,
+            })
+        return results
+
+    def triangles(self, home_code: str, filters: CandidateFilters, first_codes=None, chunk_size: int = 256) -> dict:
+        """
+        Every valid (first, second) triangle from home, as column arrays
+        (first, second, leg1, leg2, leg3, total).
+
+        For a first leg of length d1 the second airport must satisfy
+        leg2 + leg3 <= total_leg_max - d1, i.e. lie inside the ellipse with foci at
+        home and the first airport (computeEllipsePoints). That ellipse sits inside
+        the disk of the same radius around home, so candidates are pruned by their
+        precomputed home distance before any first-to-second distance is computed.
+        """
+        home = self.position.get(home_code)
+        if home is None:
+            return _empty_triangles()
+
+        if first_codes is None:
+            first_positions, first_distances = self.ring(home_code, filters.first_leg_min, filters.first_leg_max)
+            keep = self._mask_at(filters, first_positions)
+            first_positions, first_distances = first_positions[keep], first_distances[keep]
+        else:
+            first_positions = np.array([self.position[c] for c in first_codes if c in self.position], dtype=np.int64)
+            first_distances = haversine_nm(
+                self.lat[home], self.lon[home], self.lat[first_positions], self.lon[first_positions]
+            )
+        if len(first_positions) == 0:
+            return _empty_triangles()
+
+        # No second airport can be further from home than the largest remaining budget
+        max_budget = filters.total_leg_max - float(first_distances.min())
+        pool, pool_home = self.ring(home_code, 0, max_budget)
+        keep = self._mask_at(filters, pool)
+        pool, pool_home = pool[keep], pool_home[keep]
+        order = np.argsort(pool_home, kind="stable")
+        pool, pool_home = pool[order], pool_home[order]
+        pool_lat, pool_lon = self.lat[pool], self.lon[pool]
+
+        parts = []
+        for start in range(0, len(first_positions), chunk_size):
+            chunk = first_positions[start:start + chunk_size]
+            chunk_leg1 = first_distances[start:start + chunk_size]
+
+            # Ellipse bound: only pool airports within the chunk's largest budget of home
+            budget = filters.total_leg_max - float(chunk_leg1.min())
+            reach = int(np.searchsorted(pool_home, budget, side="right"))
+            if reach == 0:
+                continue
+
+            leg2 = haversine_nm(
+                self.lat[chunk][:, None], self.lon[chunk][:, None], pool_lat[None, :reach], pool_lon[None, :reach]
+            )
+            leg3 = pool_home[None, :reach]
+            total = chunk_leg1[:, None] + leg2 + leg3
+
+            valid = (total >= filters.total_leg_min) & (total <= filters.total_leg_max)
+            valid &= pool[None, :reach] != chunk[:, None]
+            rows, cols = np.nonzero(valid)
+            parts.append((chunk[rows], pool[cols], chunk_leg1[rows], leg2[rows, cols], pool_home[cols], total[rows, cols]))
+
+        if not parts:
+            return _empty_triangles()
+
+        first, second, leg1, leg2, leg3, total = (np.concatenate(column) for column in zip(*parts))
+        return {
+            "first": self.codes[first],
+            "second": self.codes[second],
+            "leg1": leg1,
+            "leg2": leg2,
+            "leg3": leg3,
+            "total": total,
+        }
+
+    def _mask_at(self, filters: CandidateFilters, positions: np.ndarray) -> np.ndarray:
+        if len(positions) == 0:
+            return np.zeros(0, dtype=bool)
+        window = slice(int(positions.min()), int(positions.max()) + 1)
+        return self.filter_mask(filters, window)[positions - window.start]
+
+    def _results(self, positions, distances, sort_by: str, with_airspace: bool = False) -> list[dict]:
+        if sort_by == "alphabetical":
+            order = np.argsort(self.codes[positions].astype(str), kind="stable")
+        else:
+            order = np.argsort(distances, kind="stable")
+
+        results = []
+        for i in order:
+            pos = positions[i]
+            result = {
+                "code": self.codes[pos],
+                "name": self.names[pos],
+                "city": self.cities[pos],
+                "state": self.states[pos],
+                "distance": float(distances[i]),
+                "lat": float(self.lat[pos]),
+                "lon": float(self.lon[pos]),
+                "elevation": float(self.elevation[pos]),
+                "fuel": self.fuel[pos],
+            }
+            if with_airspace:
+                result["airspace"] = str(self.airspace[pos])
+            results.append(result)
+        return results
+
+
+class NeighborGraph:
+    """
+    Sparse airport neighbor graph in CSR form: the neighbors of airport i are
+    indices[indptr[i]:indptr[i + 1]] (ascending, int32) with great-circle
+    distances in distances[...] (float32, nm). Positions follow AirportIndex order.
+    """
+
+    def __init__(self, codes, indptr, indices, distances, radius_nm: float):
+        self.codes = np.asarray(codes, dtype=object)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.distances = np.asarray(distances, dtype=np.float32)
+        self.radius_nm = float(radius_nm)
+        self.position = {code: i for i, code in enumerate(self.codes.tolist())}
+
+    def __len__(self):
+        return len(self.codes)
+
+    @property
+    def edge_count(self) -> int:
+        return int(self.indptr[-1])
+
+    @classmethod
+    def build(cls, index: AirportIndex, radius_nm: float = NEIGHBOR_GRAPH_RADIUS_NM,
+              block_size: int = 256) -> "NeighborGraph":
+        """
+        All pairs within radius_nm. Airports are taken block_size at a time; being
+        sorted by latitude, a block is compared only with the union of its members'
+        latitude bands. Candidates are found with one matrix product of unit
+        vectors (cos of the central angle, with a hair of slack), and haversine_nm
+        then decides and measures only those, so distances match the per-airport scan.
+        np.nonzero on the row-major mask yields the CSR layout directly.
+        """
+        lat = np.radians(index.lat)
+        lon = np.radians(index.lon)
+        unit = np.column_stack((np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)))
+        min_cos = np.cos(radius_nm / EARTH_RADIUS_NM + 1e-9)
+
+        counts = np.zeros(len(index), dtype=np.int64)
+        all_indices = []
+        all_distances = []
+
+        for start in range(0, len(index), block_size):
+            stop = min(start + block_size, len(index))
+            window = slice(
+                index.band(index.lat[start], radius_nm).start,
+                index.band(index.lat[stop - 1], radius_nm).stop,
+            )
+            rows, cols = np.nonzero(unit[start:stop] @ unit[window].T >= min_cos)
+            rows += start
+            cols += window.start
+
+            distances = haversine_nm(index.lat[rows], index.lon[rows], index.lat[cols], index.lon[cols])
+            keep = (distances <= radius_nm) & (rows != cols)
+            rows, cols = rows[keep], cols[keep]
+            counts[start:stop] = np.bincount(rows - start, minlength=stop - start)
+            all_indices.append(cols.astype(np.int32))
+            all_distances.append(distances[keep].astype(np.float32))
+
+        indptr = np.zeros(len(index) + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        return cls(
+            index.codes,
+            indptr,
+            np.concatenate(all_indices) if all_indices else np.empty(0, dtype=np.int32),
+            np.concatenate(all_distances) if all_distances else np.empty(0, dtype=np.float32),
+            radius_nm,
+        )
+
+    def save(self, path: Path, effective_date: str = ""):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.stem}.tmp.npz")
+        np.savez_compressed(
+            tmp_path,
+            codes=self.codes.astype(str),
+            indptr=self.indptr,
+            indices=self.indices,
+            distances=self.distances,
+            radius_nm=np.float64(self.radius_nm),
+            effective_date=np.str_(effective_date),
+        )
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path, min_radius_nm: float | None = None) -> "NeighborGraph":
+        """Load a saved graph; raises ValueError if it was built for less than min_radius_nm."""
+        with np.load(path, allow_pickle=False) as data:
+            graph = cls(
+                data["codes"].astype(object),
+                data["indptr"],
+                data["indices"],
+                data["distances"],
+                float(data["radius_nm"]),
+            )
+        if min_radius_nm is not None and graph.radius_nm < min_radius_nm:
+            raise ValueError(f"{path} was built for {graph.radius_nm:g} nm, less than the {min_radius_nm:g} nm required")
+        return graph
+
+    def neighbors(self, pos: int):
+        start, stop = self.indptr[pos], self.indptr[pos + 1]
+        return self.indices[start:stop], self.distances[start:stop]
+
+    def round_trips(self, index: AirportIndex, home_code: str, filters: CandidateFilters):
+        """
+        (positions, distances) of first-leg candidates, read from the home's neighbor
+        list; a first_leg_max beyond the graph radius is answered by AirportIndex.
+        """
+        self._check_index(index)
+        home = self.position.get(home_code)
+        if home is None:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+        if filters.first_leg_max > self.radius_nm:
+            positions, distances = index._first_leg_window(home_code, filters)
+            keep = index._mask_at(filters, positions)
+            return positions[keep], distances[keep]
+
+        positions, distances = self.neighbors(home)
+        keep = (distances >= filters.first_leg_min) & (distances <= filters.first_leg_max)
+        if filters.trip_type == "two":
+            keep &= distances * 2 <= filters.total_leg_max
+        positions, distances = positions[keep], distances[keep]
+        keep = index._mask_at(filters, positions)
+        return positions[keep], distances[keep]
+
+    def triangles(self, index: AirportIndex, home_code: str, filters: CandidateFilters) -> dict:
+        """
+        Same result as AirportIndex.triangles, computed by intersecting each first
+        leg's neighbor list with the home's filtered neighbor list instead of
+        computing distances. Falls back to AirportIndex.triangles when a leg could
+        reach past the graph radius (first_leg_max or total_leg_max - shortest first leg).
+        """
+        if filters.first_leg_max > self.radius_nm:
+            self._check_index(index)
+            return index.triangles(home_code, filters)
+
+        first_positions, first_distances = self.round_trips(index, home_code, replace(filters, trip_type="one"))
+        if len(first_positions) == 0:
+            return _empty_triangles()
+
+        budget = filters.total_leg_max - float(first_distances.min())
+        if budget > self.radius_nm:
+            return index.triangles(home_code, filters)
+
+        pool, pool_home = self.neighbors(self.position[home_code])
+        keep = index._mask_at(filters, pool)
+        pool, pool_home = pool[keep], pool_home[keep]
+
+        parts = []
+        for first, leg1 in zip(first_positions.tolist(), first_distances.tolist()):
+            first_neighbors, first_neighbor_distances = self.neighbors(first)
+            _, in_first, in_pool = np.intersect1d(first_neighbors, pool, assume_unique=True, return_indices=True)
+            leg2 = first_neighbor_distances[in_first]
+            leg3 = pool_home[in_pool]
+            total = leg1 + leg2 + leg3
+            valid = (total >= filters.total_leg_min) & (total <= filters.total_leg_max)
+            count = int(valid.sum())
+            if count:
+                parts.append((
+                    np.full(count, first, dtype=np.int32),
+                    pool[in_pool][valid],
+                    np.full(count, leg1, dtype=np.float32),
+                    leg2[valid],
+                    leg3[valid],
+                    total[valid],
+                ))
+
+        if not parts:
+            return _empty_triangles()
+
+        first, second, leg1, leg2, leg3, total = (np.concatenate(column) for column in zip(*parts))
+        return {
+            "first": self.codes[first],
+            "second": self.codes[second],
+            "leg1": leg1,
+            "leg2": leg2,
+            "leg3": leg3,
+            "total": total,
+        }
+
+    def _check_index(self, index: AirportIndex):
+        if len(index) != len(self) or not np.array_equal(index.codes, self.codes):
+            raise ValueError("NeighborGraph was built for a different AirportIndex")
+
+
+def build_neighbor_graph_artifact(airport_data: dict[str, dict], effective_date: str,
+                                  radius_nm: float = NEIGHBOR_GRAPH_RADIUS_NM,
+                                  out_dir: Path = GRAPH_ROOT) -> tuple[NeighborGraph, Path]:
+    """Build the per-cycle neighbor graph and save it as airport_neighbors_<effective_date>.npz."""
+    graph = NeighborGraph.build(AirportIndex.from_airport_data(airport_data), radius_nm)
+    path = out_dir / f"airport_neighbors_{effective_date}.npz"
+    graph.save(path, effective_date)
+    return graph, path
+
+
+def load_latest_snapshot_path(snapshot_root: Path = SNAPSHOT_ROOT) -> Path:
+    manifest_path = snapshot_root / "latest.json"
+    if not manifest_path.is_file():
+        raise SystemExit(f"No snapshot manifest found: {manifest_path}")
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    return snapshot_root / manifest["files"]["json"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark candidate and triangle queries against a base snapshot.")
+    parser.add_argument("--snapshot", help="Compact base snapshot (.json or .json.gz); defaults to latest.json")
+    parser.add_argument("--home", default="KOSU")
+    parser.add_argument("--min-nm", type=float, default=30)
+    parser.add_argument("--max-nm", type=float, default=150)
+    parser.add_argument("--total-min-nm", type=float, default=150)
+    parser.add_argument("--total-max-nm", type=float, default=300)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument(
+        "--radius",
+        type=float,
+        help="Also build a neighbor graph of this radius (nm) and benchmark the graph-backed queries",
+    )
+    args = parser.parse_args()
+
+    snapshot_path = Path(args.snapshot) if args.snapshot else load_latest_snapshot_path()
+
+    started = time.perf_counter()
+    index = AirportIndex.from_snapshot(snapshot_path)
+    print(f"Indexed {len(index):,} airports in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    if args.home not in index.position:
+        raise SystemExit(f"Home airport not found in snapshot: {args.home}")
+
+    filters = CandidateFilters(
+        first_leg_min=args.min_nm,
+        first_leg_max=args.max_nm,
+        total_leg_min=args.total_min_nm,
+        total_leg_max=args.total_max_nm,
+    )
+    queries = {
+        "first_leg": lambda: index.first_leg_candidates(args.home, filters),
+        "filtered_in_range": lambda: index.filtered_in_range_candidates(args.home, filters),
+        "nearby_outer": lambda: index.nearby_outer_candidates(args.home, filters),
+        "triangles": lambda: index.triangles(args.home, filters),
+    }
+
+    if args.radius:
+        started = time.perf_counter()
+        graph = NeighborGraph.build(index, args.radius)
+        print(
+            f"Built neighbor graph: {graph.edge_count:,} edges within {graph.radius_nm:g} nm "
+            f"in {(time.perf_counter() - started) * 1000:.1f} ms"
+        )
+        queries["graph_round_trips"] = lambda: graph.round_trips(index, args.home, filters)[0]
+        queries["graph_triangles"] = lambda: graph.triangles(index, args.home, filters)
+
+    for name, query in queries.items():
+        timings = []
+        for _ in range(args.iterations):
+            started = time.perf_counter()
+            results = query()
+            timings.append(time.perf_counter() - started)
+        if isinstance(results, dict):
+            results = results["total"]
+        timings.sort()
+        print(
+            f"{name}: {len(results)} results, "
+            f"median {timings[len(timings) // 2] * 1000:.3f} ms, "
+            f"p95 {timings[int(len(timings) * 0.95)] * 1000:.3f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -185,6 +185,12 @@ export async function handler(event) {
               where coalesce(nullif(fbo_name, ''), '') <> ''
             ) p
             group by p.airport_code
+          ),
+          -- Approaches store the chart's pdf_name; the cycle's chart directory is recorded once per d-TPP cycle
+          dtpp as (
+            select coalesce(details ->> 'pdf_base_url', '') as pdf_base_url
+            from dataset_versions
+            where dataset_name = 'airports_v2_source_dtpp'
           )
           select
             a.airport_code,
@@ -219,11 +225,16 @@ export async function handler(event) {
               select json_agg(
                 json_build_object(
                   'name', ap.approach_name,
-                  'pdf_url', coalesce(ap.pdf_url, '')
+                  'pdf_url', case
+                    when coalesce(ap.pdf_name, '') <> '' and coalesce(dtpp.pdf_base_url, '') <> ''
+                      then dtpp.pdf_base_url || ap.pdf_name
+                    else coalesce(ap.pdf_url, '')
+                  end
                 )
                 order by ap.approach_name
               )
               from airport_approaches_v2 ap
+              left join dtpp on true
               where ap.airport_code = a.airport_code
             ), '[]'::json) as approaches
           from airports_v2 a
@@ -246,51 +257,30 @@ export async function handler(event) {
       };
     }
 
+    // Runway and approach summaries are precomputed per cycle by backend_scripts/xc_airport_db.py
     const result = await client.query(`
-      with runway_summary as (
-        select
-          airport_code,
-          max(case when upper(coalesce(surface, '')) = 'ASPH' then coalesce(length_ft, 0) else 0 end) as max_asph,
-          max(case when upper(coalesce(surface, '')) = 'CONC' then coalesce(length_ft, 0) else 0 end) as max_conc,
-          max(case when upper(coalesce(surface, '')) = 'TURF' then coalesce(length_ft, 0) else 0 end) as max_turf,
-          max(case when upper(coalesce(surface, '')) not in ('ASPH', 'CONC', 'TURF') then coalesce(length_ft, 0) else 0 end) as max_other
-        from airport_runways_v2
-        group by airport_code
-      ),
-      approach_summary as (
-        select
-          airport_code,
-          count(*)::int as approach_count,
-          bool_or(upper(approach_name) like '%RNAV%') as has_rnav,
-          bool_or(upper(approach_name) like '%ILS%' or upper(approach_name) like '%LOC%') as has_ilsloc,
-          bool_or(upper(approach_name) like '%VOR%' or upper(approach_name) like '%NDB%') as has_vorndb
-        from airport_approaches_v2
-        group by airport_code
-      )
       select
-        a.airport_code,
-        a.airport_name,
-        a.city,
-        a.state,
-        a.country,
-        a.lat,
-        a.lon,
-        a.elevation,
-        coalesce(a.airspace_class, 'G') as airspace_class,
-        coalesce(nullif(a.fuel_raw, ''), 'None') as fuel_raw,
-        coalesce(rs.max_asph, 0) as max_asph,
-        coalesce(rs.max_conc, 0) as max_conc,
-        coalesce(rs.max_turf, 0) as max_turf,
-        coalesce(rs.max_other, 0) as max_other,
-        coalesce(ap.approach_count, 0) as approach_count,
-        coalesce(ap.has_rnav, false) as has_rnav,
-        coalesce(ap.has_ilsloc, false) as has_ilsloc,
-        coalesce(ap.has_vorndb, false) as has_vorndb
-      from airports_v2 a
-      left join runway_summary rs on rs.airport_code = a.airport_code
-      left join approach_summary ap on ap.airport_code = a.airport_code
-      where a.airport_code is not null
-      order by a.airport_code
+        airport_code,
+        airport_name,
+        city,
+        state,
+        country,
+        lat,
+        lon,
+        elevation,
+        coalesce(airspace_class, 'G') as airspace_class,
+        coalesce(nullif(fuel_raw, ''), 'None') as fuel_raw,
+        max_asph,
+        max_conc,
+        max_turf,
+        max_other,
+        approach_count,
+        has_rnav,
+        has_ilsloc,
+        has_vorndb
+      from airports_v2
+      where airport_code is not null
+      order by airport_code
     `);
 
     const airports = result.rows